@@ -0,0 +1,118 @@
+"""
+Compares formatting results cells for display the way it used to be done
+(iterating over rows with `DataFrame.iterrows()` and converting cells one
+by one) with the column-wise formatting from `tap_adql_sandbox.formatting`.
+
+    $ python ./benchmarks/formatting.py --rows 100000 1000000
+"""
+
+# 3rd-party dependencies
+#
+import numpy
+import pandas
+#
+# standard libraries
+#
+import argparse
+import time
+import typing
+#
+# own stuff
+#
+from tap_adql_sandbox.formatting import formatRows
+
+
+def makeSyntheticResults(rowsCount: int, seed: int = 42) -> pandas.DataFrame:
+    """
+    Something that resembles typical results: identifiers, coordinates,
+    magnitudes with missing values, names and byte strings.
+    """
+    rng = numpy.random.default_rng(seed)
+    missing = rng.random(rowsCount) < 0.1
+
+    magnitude = rng.normal(15, 2, rowsCount)
+    magnitude[missing] = numpy.nan
+
+    parallax = pandas.array(
+        rng.integers(0, 1000, rowsCount),
+        dtype="Int64"
+    )
+    parallax[missing] = pandas.NA
+
+    names = numpy.array(
+        [f"star {i}" for i in range(rowsCount)],
+        dtype=object
+    )
+
+    return pandas.DataFrame(
+        {
+            "source_id": rng.integers(0, 2**62, rowsCount, dtype=numpy.int64),
+            "ra": rng.uniform(0, 360, rowsCount),
+            "dec": rng.uniform(-90, 90, rowsCount),
+            "phot_g_mean_mag": magnitude,
+            "parallax_mas": parallax,
+            "name": names,
+            "spectral_type": numpy.array(
+                rng.choice([b"G2V", b"K1III", b"M4.5V"], rowsCount),
+                dtype=object
+            ),
+            "variable": rng.random(rowsCount) < 0.5
+        }
+    )
+
+
+def formatWithIterrows(data: pandas.DataFrame) -> typing.List[typing.List]:
+    """
+    What results table used to do before.
+    """
+    formatted = []
+    for index, row in data.iterrows():
+        formatted.append([str(cell) for cell in row])
+    return formatted
+
+
+def measure(
+    name: str,
+    func: typing.Callable,
+    data: pandas.DataFrame
+) -> float:
+    startTime = time.perf_counter()
+    func(data)
+    elapsed = time.perf_counter() - startTime
+    rowsPerSecond = len(data) / elapsed
+    print(
+        f"{name:>10}: {len(data):>9} rows in {elapsed:8.3f} s",
+        f"| {rowsPerSecond:>12,.0f} rows/s"
+    )
+    return rowsPerSecond
+
+
+def main() -> None:
+    argParser = argparse.ArgumentParser(
+        description="Benchmark results cells formatting"
+    )
+    argParser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=[100000, 1000000],
+        help="rows count of synthetic results (default: %(default)s)"
+    )
+    argParser.add_argument(
+        "--skip-iterrows",
+        action="store_true",
+        help="don't measure the old way, as it is very slow on large tables"
+    )
+    cliArgs = argParser.parse_args()
+
+    for rowsCount in cliArgs.rows:
+        data = makeSyntheticResults(rowsCount)
+        print(f"--- {rowsCount} rows, {data.shape[1]} columns")
+        after = measure("vectorized", formatRows, data)
+        if not cliArgs.skip_iterrows:
+            before = measure("iterrows", formatWithIterrows, data)
+            print(f"   speedup: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Local stand-in for a TAP service, which answers every sync query
+with a synthetic VOTable, so benchmarks don't depend on the network
+and on the load of a real service. What results it returns is defined
+by the service URL:
+
+    http://127.0.0.1:PORT/ROWS/COLUMNS/SERIALIZATION
+
+where serialization is either `tabledata` or `binary2`. The same
+results are generated only once and then kept in memory.
+"""
+
+# 3rd-party dependencies
+#
+from astropy.table import MaskedColumn, Table
+from astropy.io.votable import from_table
+import numpy
+#
+# standard libraries
+#
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import io
+import threading
+import typing
+
+serializations: typing.Tuple[str, ...] = ("tabledata", "binary2")
+
+# VOTable datatype => how to generate values of that type
+columnTypes: typing.Dict[
+    str,
+    typing.Callable[[numpy.random.Generator, int], numpy.ndarray]
+] = {
+    "double": lambda rng, n: rng.uniform(0, 360, n),
+    "float": lambda rng, n: rng.normal(15, 2, n).astype(numpy.float32),
+    "long": lambda rng, n: rng.integers(0, 2**62, n, dtype=numpy.int64),
+    "int": lambda rng, n: rng.integers(0, 10**6, n, dtype=numpy.int32),
+    "short": lambda rng, n: rng.integers(0, 1000, n, dtype=numpy.int16),
+    "boolean": lambda rng, n: rng.random(n) < 0.5,
+    "char": lambda rng, n: numpy.array(
+        rng.choice([b"G2V", b"K1III", b"M4.5V", b"DA"], n)
+    ),
+    "unicodeChar": lambda rng, n: numpy.array(
+        [f"star {i}" for i in range(n)]
+    )
+}
+
+
+def makeVOTable(
+    rowsCount: int,
+    columnsCount: int,
+    serialization: str,
+    types: typing.Sequence[str],
+    seed: int = 42
+) -> bytes:
+    """
+    VOTable with columns of the given datatypes (repeated, if there are
+    more columns than types). Every numeric column has about 10%
+    of missing values, as real results often do.
+    """
+    rng = numpy.random.default_rng(seed)
+    table = Table()
+    for i in range(columnsCount):
+        columnType: str = types[i % len(types)]
+        values = columnTypes[columnType](rng, rowsCount)
+        mask = (
+            rng.random(rowsCount) < 0.1
+            if values.dtype.kind in "fiu"
+            else numpy.zeros(rowsCount, dtype=bool)
+        )
+        table[f"{columnType}_{i}"] = MaskedColumn(values, mask=mask)
+    votable = from_table(table)
+    data = io.BytesIO()
+    # C writer of TABLEDATA in Astropy writes a byte past its buffer,
+    # which crashes whatever runs in the process after it
+    votable.to_xml(
+        data,
+        tabledata_format=serialization,
+        _debug_python_based_parser=True
+    )
+    return data.getvalue()
+
+
+class MockTAPService:
+    """
+    HTTP server in a background thread, to be used as a context manager:
+
+        with MockTAPService(["double", "long", "char"]) as service:
+            url = service.serviceURL(100000, 10, "binary2")
+    """
+
+    def __init__(
+        self,
+        types: typing.Sequence[str],
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        self.types: typing.List[str] = list(types)
+        self._votables: typing.Dict[typing.Tuple[int, int, str], bytes] = {}
+        self._lock: threading.Lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: typing.Optional[threading.Thread] = None
+
+    @property
+    def baseURL(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serviceURL(
+        self,
+        rowsCount: int,
+        columnsCount: int,
+        serialization: str
+    ) -> str:
+        return f"{self.baseURL}/{rowsCount}/{columnsCount}/{serialization}"
+
+    def getVOTable(
+        self,
+        rowsCount: int,
+        columnsCount: int,
+        serialization: str
+    ) -> bytes:
+        key = (rowsCount, columnsCount, serialization)
+        with self._lock:
+            if key not in self._votables:
+                self._votables[key] = makeVOTable(
+                    rowsCount,
+                    columnsCount,
+                    serialization,
+                    self.types
+                )
+            return self._votables[key]
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="mock-tap",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockTAPService":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _handler(self) -> typing.Type[BaseHTTPRequestHandler]:
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # keeping connections alive, as real services do
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                contentLength = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(contentLength)
+                self.respond()
+
+            def do_GET(self):
+                self.respond()
+
+            def respond(self):
+                parts = self.path.split("?")[0].strip("/").split("/")
+                try:
+                    rows, columns, serialization, endpoint = parts
+                    if (
+                        endpoint != "sync"
+                        or
+                        serialization not in serializations
+                    ):
+                        raise ValueError(self.path)
+                    data = service.getVOTable(
+                        int(rows),
+                        int(columns),
+                        serialization
+                    )
+                except ValueError:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-votable+xml")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,394 @@
+"""
+Measures the whole path of query results: from sending a query
+to a (local, see `mocktap.py`) TAP service, through downloading,
+parsing and converting results, to building the results table,
+driven the same way as the application does it (a background job
+with a render loop processing its calls), only without a viewport.
+
+For every combination of rows count and serialization it reports
+throughput, peak memory and percentiles of latencies (of the first rows
+showing up in the table and of the whole query), measured after
+a warm-up run. Results can be saved to JSON and compared with the ones
+from another commit:
+
+    $ python ./benchmarks/pipeline.py --rows 1000000 --json before.json
+    $ git checkout some-branch
+    $ python ./benchmarks/pipeline.py --rows 1000000 --compare before.json
+"""
+
+# 3rd-party dependencies
+#
+import dearpygui.dearpygui as dpg
+import numpy
+import pyarrow
+#
+# standard libraries
+#
+from datetime import datetime
+import argparse
+import json
+import os
+import pathlib
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import typing
+#
+# own stuff
+#
+from tap_adql_sandbox import config
+from tap_adql_sandbox import jobs
+from tap_adql_sandbox.execution import fetchResults
+from tap_adql_sandbox.query import formatBytes
+from tap_adql_sandbox.results import ResultBuffer
+from tap_adql_sandbox.stats import QueryStats
+from tap_adql_sandbox.table import ResultsTableView
+from mocktap import MockTAPService, columnTypes, serializations
+
+percentiles: typing.Tuple[int, ...] = (50, 90, 99)
+
+
+class MemoryTracker:
+    """
+    Peak of memory allocated while a run goes, relative to what was
+    allocated before: by Python objects and NumPy arrays (traced
+    with `tracemalloc`, which slows things down, so it shouldn't be
+    used for the runs that are timed) and by Arrow (sampled from
+    a background thread). Also samples the peak resident memory
+    of the whole process.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval: float = interval
+        self.peak: int = 0
+        self.residentPeak: int = 0
+        self._arrowBaseline: int = 0
+        self._arrowPeak: int = 0
+        self._stopped = threading.Event()
+        self._thread: typing.Optional[threading.Thread] = None
+
+    @staticmethod
+    def residentMemory() -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            # not Linux, so the peak of the whole process
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # kilobytes on Linux, bytes on Mac OS
+            return peak if sys.platform == "darwin" else peak * 1024
+
+    def __enter__(self) -> "MemoryTracker":
+        self._arrowBaseline = pyarrow.total_allocated_bytes()
+        self._arrowPeak = self._arrowBaseline
+        self.residentPeak = self.residentMemory()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        tracedPeak: int = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.peak = tracedPeak + self._arrowPeak - self._arrowBaseline
+
+    def _sample(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self._arrowPeak = max(
+                self._arrowPeak,
+                pyarrow.total_allocated_bytes()
+            )
+            self.residentPeak = max(self.residentPeak, self.residentMemory())
+
+
+def runQuery(
+    serviceURL: str,
+    view: typing.Optional[ResultsTableView],
+    frameTime: float
+) -> typing.Dict[str, typing.Any]:
+    """
+    Executes the query like `executeQuery()` does: results are fetched
+    by a job, and the table is updated from the render loop every time
+    another chunk of rows arrives. Returns the latencies and the stats
+    of the query.
+    """
+    queryText: str = "SELECT * FROM benchmark"
+    job = jobs.Job("benchmark")
+    buffer = ResultBuffer()
+    buffer.stats = QueryStats(serviceURL, queryText)
+    outcome: typing.Dict[str, typing.Any] = {}
+
+    def showResults(buffer: ResultBuffer) -> None:
+        if view is not None:
+            with buffer.stats.measure("ui"):
+                if view.data is buffer:
+                    view.dataAppended()
+                else:
+                    view.setData(buffer, 1200)
+        outcome.setdefault("firstRows", time.perf_counter() - startTime)
+
+    def queryDone(job: jobs.Job, buffer: ResultBuffer) -> None:
+        showResults(buffer)
+        outcome["total"] = time.perf_counter() - startTime
+
+    def queryFailed(job: jobs.Job, ex: Exception) -> None:
+        outcome["error"] = ex
+
+    buffer.onAppended = lambda b: jobs.callOnUiThread(showResults, b)
+    startTime: float = time.perf_counter()
+    jobs.submitJob(
+        job,
+        fetchResults,
+        serviceURL,
+        queryText,
+        buffer,
+        onDone=queryDone,
+        onError=queryFailed
+    )
+    # render loop
+    while "total" not in outcome and "error" not in outcome:
+        jobs.processUiCalls()
+        time.sleep(frameTime)
+    if "error" in outcome:
+        raise outcome["error"]
+    buffer.stats.finish("done", buffer.rowsCount)
+    if view is not None:
+        view.clear()
+    outcome["stats"] = buffer.stats
+    return outcome
+
+
+def benchmarkCase(
+    service: MockTAPService,
+    rowsCount: int,
+    columnsCount: int,
+    serialization: str,
+    repeat: int,
+    view: typing.Optional[ResultsTableView],
+    frameTime: float
+) -> typing.Dict[str, typing.Any]:
+    votableSize: int = len(
+        service.getVOTable(rowsCount, columnsCount, serialization)
+    )
+    serviceURL: str = service.serviceURL(
+        rowsCount,
+        columnsCount,
+        serialization
+    )
+    # warming up: imports, connection, Dear PyGui
+    runQuery(serviceURL, view, frameTime)
+
+    totals: typing.List[float] = []
+    firstRows: typing.List[float] = []
+    phases: typing.Dict[str, typing.List[float]] = {}
+    for _ in range(repeat):
+        outcome = runQuery(serviceURL, view, frameTime)
+        totals.append(outcome["total"])
+        firstRows.append(outcome["firstRows"])
+        for phase, seconds in outcome["stats"].phases.items():
+            phases.setdefault(phase, []).append(seconds)
+    # memory is measured separately, as tracing it slows everything down
+    with MemoryTracker() as memory:
+        runQuery(serviceURL, view, frameTime)
+
+    medianTotal: float = float(numpy.median(totals))
+    return {
+        "serialization": serialization,
+        "rows": rowsCount,
+        "columns": columnsCount,
+        "bytes": votableSize,
+        "total": {
+            f"p{p}": float(numpy.percentile(totals, p)) for p in percentiles
+        },
+        "firstRows": {
+            f"p{p}": float(numpy.percentile(firstRows, p))
+            for p in percentiles
+        },
+        "rowsPerSecond": rowsCount / medianTotal,
+        "bytesPerSecond": votableSize / medianTotal,
+        "peakMemory": memory.peak,
+        "residentPeak": memory.residentPeak,
+        "phases": {p: float(numpy.median(s)) for p, s in phases.items()}
+    }
+
+
+def caseKey(case: typing.Dict[str, typing.Any]) -> typing.Tuple:
+    return (case["serialization"], case["rows"], case["columns"])
+
+
+def printCase(
+    case: typing.Dict[str, typing.Any],
+    previous: typing.Optional[typing.Dict[str, typing.Any]],
+    showPhases: bool
+) -> None:
+    total = case["total"]
+    print(
+        f"{case['serialization']:>9}: {case['rows']:>9} rows",
+        f"| {formatBytes(case['bytes']):>9}",
+        "| total {}".format(
+            " ".join(f"{k} {v:.3f} s" for k, v in total.items())
+        ),
+        f"| first rows p50 {case['firstRows']['p50']:.3f} s",
+        f"| {case['rowsPerSecond']:>11,.0f} rows/s",
+        f"| {formatBytes(case['bytesPerSecond']):>9}/s",
+        f"| peak {formatBytes(case['peakMemory'])}",
+        f"(process {formatBytes(case['residentPeak'])})"
+    )
+    if previous is not None:
+        print(
+            " " * 10,
+            "compared to previous: total p50 {:.2f}x, peak {:.2f}x".format(
+                total["p50"] / previous["total"]["p50"],
+                case["peakMemory"] / max(previous["peakMemory"], 1)
+            )
+        )
+    if showPhases:
+        for phase, seconds in case["phases"].items():
+            print(" " * 10, f"{phase:>9}: {seconds:.3f} s")
+
+
+def getCommit() -> typing.Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=pathlib.Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    argParser = argparse.ArgumentParser(
+        description="Benchmark executing queries and showing their results"
+    )
+    argParser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=[10000, 100000],
+        help="rows count of synthetic results (default: %(default)s)"
+    )
+    argParser.add_argument(
+        "--columns",
+        type=int,
+        default=8,
+        help="columns count of synthetic results (default: %(default)s)"
+    )
+    argParser.add_argument(
+        "--types",
+        nargs="+",
+        choices=list(columnTypes),
+        default=list(columnTypes),
+        help=" ".join((
+            "VOTable datatypes of columns, repeated if there are more",
+            "columns than types (default: all of them)"
+        ))
+    )
+    argParser.add_argument(
+        "--serialization",
+        nargs="+",
+        choices=serializations,
+        default=list(serializations),
+        help="VOTable serializations (default: %(default)s)"
+    )
+    argParser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="how many times to execute every query (default: %(default)s)"
+    )
+    argParser.add_argument(
+        "--no-table",
+        action="store_true",
+        help="don't build the results table, only fetch the results"
+    )
+    argParser.add_argument(
+        "--phases",
+        action="store_true",
+        help="also print median time of every phase of the queries"
+    )
+    argParser.add_argument(
+        "--json",
+        metavar="FILE",
+        help="save the measurements to a JSON file"
+    )
+    argParser.add_argument(
+        "--compare",
+        metavar="FILE",
+        help="compare with the measurements saved with --json before"
+    )
+    cliArgs = argParser.parse_args()
+
+    # results shouldn't go to (or come from) the actual cache
+    config.resultsCacheEnabled = False
+    # a frame at 60 FPS, as the render loop runs with vsync
+    frameTime: float = 1 / 60
+
+    previousCases: typing.Dict[typing.Tuple, typing.Dict] = {}
+    if cliArgs.compare:
+        with open(cliArgs.compare, encoding="utf-8") as f:
+            previousCases = {caseKey(c): c for c in json.load(f)["cases"]}
+
+    view: typing.Optional[ResultsTableView] = None
+    if not cliArgs.no_table:
+        dpg.create_context()
+        with dpg.window() as window:
+            pass
+        view = ResultsTableView(window, "resultsTable", selectable=False)
+
+    cases: typing.List[typing.Dict[str, typing.Any]] = []
+    try:
+        with MockTAPService(cliArgs.types) as service:
+            for rowsCount in cliArgs.rows:
+                print(f"--- {rowsCount} rows, {cliArgs.columns} columns")
+                for serialization in cliArgs.serialization:
+                    case = benchmarkCase(
+                        service,
+                        rowsCount,
+                        cliArgs.columns,
+                        serialization,
+                        max(cliArgs.repeat, 1),
+                        view,
+                        frameTime
+                    )
+                    cases.append(case)
+                    printCase(
+                        case,
+                        previousCases.get(caseKey(case)),
+                        cliArgs.phases
+                    )
+    finally:
+        jobs.shutdownJobs()
+        if view is not None:
+            dpg.destroy_context()
+
+    if cliArgs.json:
+        with open(cliArgs.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "commit": getCommit(),
+                    "created": datetime.now().isoformat(timespec="seconds"),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "types": cliArgs.types,
+                    "repeat": cliArgs.repeat,
+                    "cases": cases
+                },
+                f,
+                indent=4
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,3 +2,10 @@ import pathlib
 
 applicationPath = pathlib.Path(__file__).parent.resolve()
 settingsFile = str(applicationPath / "settings.ini")
+# async (UWS) jobs that are still running on services, so they could be
+# resumed after the application restart
+asyncJobsFile = str(applicationPath / "async-jobs.json")
+# results of previously executed queries
+resultsCachePath = applicationPath / "cache"
+# IDs of objects resolved in Simbad
+simbadCacheFile = str(applicationPath / "simbad-ids.json")
@@ -0,0 +1,314 @@
+# standard libraries
+#
+import re
+import typing
+
+# string literals and quoted identifiers, which are to be kept intact
+adqlQuotedPattern: typing.Pattern = re.compile(
+    r"('(?:[^']|'')*'?|\"(?:[^\"]|\"\")*\"?)"
+)
+adqlCommentPattern: typing.Pattern = re.compile(r"--[^\n]*")
+adqlSeparatorPattern: typing.Pattern = re.compile(r"\s*([(),=])\s*")
+
+
+def normalizeQuery(queryText: str) -> str:
+    """
+    Brings the query to a form in which insignificant differences (comments,
+    whitespace, trailing semicolon) don't matter, so the same query typed
+    slightly differently can be recognized as the same. String literals
+    and quoted identifiers are left as they are.
+    """
+    parts: typing.List[str] = adqlQuotedPattern.split(queryText)
+    # every odd part is a quoted one
+    for i in range(0, len(parts), 2):
+        part: str = adqlCommentPattern.sub(" ", parts[i])
+        part = re.sub(r"\s+", " ", part)
+        parts[i] = adqlSeparatorPattern.sub(r"\1", part)
+    normalized: str = "".join(parts).strip()
+    while normalized.endswith(";"):
+        normalized = normalized[:-1].rstrip()
+    return normalized
+
+
+# top-level clauses that follow WHERE
+adqlClausePattern: typing.Pattern = re.compile(
+    r"\b(WHERE|GROUP\s+BY|HAVING|ORDER\s+BY|OFFSET"
+    r"|UNION|INTERSECT|EXCEPT)\b",
+    re.IGNORECASE
+)
+
+
+def maskQuery(queryText: str) -> str:
+    """
+    Replaces string literals, quoted identifiers, comments and everything
+    inside parentheses with spaces, so keywords found in what is left
+    are the ones of the top-level query, and their positions are the same
+    as in the original query.
+    """
+    masked: typing.List[str] = []
+    for i, part in enumerate(adqlQuotedPattern.split(queryText)):
+        if i % 2:
+            masked.append(" " * len(part))
+        else:
+            masked.append(
+                adqlCommentPattern.sub(lambda m: " " * len(m.group(0)), part)
+            )
+    maskedQuery: str = "".join(masked)
+
+    depth: int = 0
+    result: typing.List[str] = []
+    for c in maskedQuery:
+        if c == "(":
+            depth += 1
+        result.append(" " if depth > 0 else c)
+        if c == ")":
+            depth = max(depth - 1, 0)
+    return "".join(result)
+
+
+def findClauses(queryText: str) -> typing.Dict[str, typing.Tuple[int, int]]:
+    """
+    Positions (start and end of the keyword) of the top-level clauses
+    of the query, keyed by the upper-cased keyword with single spaces.
+    """
+    clauses: typing.Dict[str, typing.Tuple[int, int]] = {}
+    for match in adqlClausePattern.finditer(maskQuery(queryText)):
+        keyword: str = " ".join(match.group(1).upper().split())
+        if keyword not in clauses:
+            clauses[keyword] = (match.start(), match.end())
+    return clauses
+
+
+# TOP of the top-level SELECT
+adqlTopPattern: typing.Pattern = re.compile(
+    r"\bSELECT\s+(?:(?:ALL|DISTINCT)\s+)?TOP\s+(\d+)",
+    re.IGNORECASE
+)
+
+
+def findTop(queryText: str) -> typing.Optional[int]:
+    match = adqlTopPattern.search(maskQuery(queryText))
+    return int(match.group(1)) if match else None
+
+
+# FROM of the top-level SELECT
+adqlFromPattern: typing.Pattern = re.compile(r"\bFROM\b", re.IGNORECASE)
+# such as gaiadr3.gaia_source or "TAP_SCHEMA"."tables"
+adqlTableNamePattern: typing.Pattern = re.compile(
+    r'\s*((?:"[^"]*"|\w+)(?:\s*\.\s*(?:"[^"]*"|\w+))*)'
+)
+
+
+def findTableName(queryText: str) -> typing.Optional[str]:
+    """
+    Name (without the schema) of the first table that the query selects
+    from, unless it selects from a subquery.
+    """
+    match = adqlFromPattern.search(maskQuery(queryText))
+    if match is None:
+        return None
+    # masked query has spaces instead of quoted names
+    tableName = adqlTableNamePattern.match(queryText, match.end())
+    if tableName is None:
+        return None
+    return re.split(r"\s*\.\s*", tableName.group(1))[-1].strip('"')
+
+
+def stripComments(queryText: str) -> str:
+    parts: typing.List[str] = adqlQuotedPattern.split(queryText)
+    for i in range(0, len(parts), 2):
+        parts[i] = adqlCommentPattern.sub("", parts[i])
+    return "".join(parts)
+
+
+def addCondition(queryText: str, condition: str) -> str:
+    """
+    Adds the condition to the WHERE clause of the query (combining it
+    with the existing conditions, if there are any), or adds the WHERE
+    clause, if there isn't one.
+    """
+    # a comment at the end of WHERE clause would comment out
+    # the closing parenthesis
+    queryText = stripComments(queryText).strip()
+    while queryText.endswith(";"):
+        queryText = queryText[:-1].rstrip()
+
+    clauses = findClauses(queryText)
+    for keyword in ("UNION", "INTERSECT", "EXCEPT"):
+        if keyword in clauses:
+            raise ValueError(
+                f"Queries with {keyword} cannot be partitioned"
+            )
+    whereEnd: typing.Optional[int] = (
+        clauses["WHERE"][1] if "WHERE" in clauses else None
+    )
+    # where the clause following WHERE starts
+    nextClauseStart: int = min(
+        [
+            start
+            for keyword, (start, end) in clauses.items()
+            if keyword != "WHERE"
+        ],
+        default=len(queryText)
+    )
+
+    tail: str = queryText[nextClauseStart:]
+    if whereEnd is None:
+        return "".join((
+            queryText[:nextClauseStart].rstrip(),
+            f"\nWHERE {condition}",
+            f"\n{tail}" if tail else ""
+        ))
+    existing: str = queryText[whereEnd:nextClauseStart].strip()
+    return "".join((
+        queryText[:whereEnd],
+        f" ({condition})\nAND ({existing})",
+        f"\n{tail}" if tail else ""
+    ))
+
+
+def parseNumber(text: str) -> float:
+    """
+    Integers are kept as integers, as large identifiers (such as Gaia
+    `source_id`) cannot be represented precisely as floats.
+    """
+    text = text.strip()
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def formatNumber(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def partitionQuery(
+    queryText: str,
+    expression: str,
+    start: float,
+    stop: float,
+    partsCount: int
+) -> typing.List[str]:
+    """
+    Splits the query into sub-queries, each of which selects a part
+    of the [start, stop] range of the expression (usually a column).
+    Parts don't overlap, so together sub-queries return the same rows
+    as the original query would, which is why queries with TOP are not
+    split. Integer ranges are split on integer boundaries.
+    """
+    if stop < start:
+        raise ValueError("Range end is less than its start")
+    top: typing.Optional[int] = findTop(queryText)
+    if top is not None:
+        # every partition would return up to that many rows
+        raise ValueError(
+            " ".join((
+                f"Queries with TOP cannot be partitioned, as TOP {top}",
+                "would apply to every partition and not to all the results"
+            ))
+        )
+    partsCount = max(partsCount, 1)
+    isInteger: bool = isinstance(start, int) and isinstance(stop, int)
+    if isInteger:
+        partsCount = min(partsCount, int(stop - start) + 1)
+
+    boundaries: typing.List[float] = (
+        [
+            int(start) + (int(stop) - int(start) + 1) * i // partsCount
+            for i in range(partsCount)
+        ]
+        if isInteger
+        else [
+            start + (stop - start) / partsCount * i
+            for i in range(partsCount)
+        ]
+    ) + [stop]
+
+    queries: typing.List[str] = []
+    for i in range(partsCount):
+        lower = formatNumber(boundaries[i])
+        upper = formatNumber(boundaries[i + 1])
+        # the last part includes the end of the range
+        queries.append(
+            addCondition(
+                queryText,
+                (
+                    f"{expression} >= {lower} AND {expression} < {upper}"
+                    if i < partsCount - 1
+                    else f"{expression} >= {lower} AND {expression} <= {upper}"
+                )
+            )
+        )
+    return queries
+
+
+def healpixExpression(level: int, ra: str = "ra", dec: str = "dec") -> str:
+    return f"ivo_healpix_index({level}, {ra}, {dec})"
+
+
+def healpixRange(level: int) -> typing.Tuple[int, int]:
+    """
+    First and last HEALPix index at the level.
+    """
+    return 0, 12 * 4 ** level - 1
+
+
+def formatValue(value: typing.Any) -> str:
+    """
+    Value as an ADQL literal.
+    """
+    if isinstance(value, bytes):
+        value = value.decode("utf-8")
+    if isinstance(value, str):
+        escaped: str = value.replace("'", "''")
+        return f"'{escaped}'"
+    if hasattr(value, "item"):
+        # NumPy scalars
+        value = value.item()
+    return formatNumber(value)
+
+
+def orderByKey(queryText: str, keyColumn: str) -> str:
+    """
+    Makes the query sorted by the key column (replacing the existing
+    sorting, if there is one), which keyset pagination relies on.
+    Queries with TOP are not paginated, as it would select other rows
+    once sorted differently, and would apply to every page.
+    """
+    queryText = stripComments(queryText).strip()
+    while queryText.endswith(";"):
+        queryText = queryText[:-1].rstrip()
+    top: typing.Optional[int] = findTop(queryText)
+    if top is not None:
+        raise ValueError(
+            " ".join((
+                f"Queries with TOP cannot be paginated, as TOP {top}",
+                "would apply to every page and not to all the results"
+            ))
+        )
+    clauses = findClauses(queryText)
+    for keyword in ("OFFSET", "UNION", "INTERSECT", "EXCEPT"):
+        if keyword in clauses:
+            raise ValueError(f"Queries with {keyword} cannot be paginated")
+    if "ORDER BY" in clauses:
+        # it is the last clause
+        queryText = queryText[:clauses["ORDER BY"][0]].rstrip()
+    return f"{queryText}\nORDER BY {keyColumn} ASC"
+
+
+def keysetPageQuery(
+    orderedQueryText: str,
+    keyColumn: str,
+    lastValue: typing.Any
+) -> str:
+    """
+    Query for the next page of results, which starts
+    right after the last key value of the previous page.
+    """
+    return addCondition(
+        orderedQueryText,
+        f"{keyColumn} > {formatValue(lastValue)}"
+    )
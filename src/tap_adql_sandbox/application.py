@@ -0,0 +1,1465 @@
+from __future__ import annotations
+# 3rd-party dependencies
+#
+# pandas, NumPy, Arrow and requests take a while to import, so they
+# are imported with the first query (or export), and the main window
+# doesn't have to wait for them
+#
+import dearpygui.dearpygui as dpg
+from dearpygui.demo import show_demo
+from dearpygui import __version__ as dpgVersion  # get_dearpygui_version()
+#
+import pathlib
+#
+# standard libraries
+#
+from datetime import datetime
+import sys
+import traceback
+import webbrowser
+from packaging.version import Version
+import logging
+import typing
+#
+# own stuff
+#
+from . import config
+from . import cache
+from . import jobs
+from . import services
+from . import stats
+from . import uws
+from .simbad import simbadWindow, showSimbadIDsWindow
+from .multiservice import multiServiceWindow, showMultiServiceWindow
+from .localsql import localSQLWindow, showLocalSQLWindow
+from .servicetables import serviceTablesWindow, showServiceTablesWindow
+from .version import __version__, __copyright__
+from .theme import (
+    stylePrimaryColor,
+    stylePrimaryColorActive,
+    getErrorTheme,
+    getWindowTheme,
+    getHyperlinkTheme,
+    applyPalette,
+    styleHorizontalPadding,
+    styleScrollbarWidth
+)
+from .examples import tapServices
+from .execution import fetchResults
+from .adql import (
+    healpixExpression,
+    healpixRange,
+    parseNumber,
+    partitionQuery
+)
+from .query import formatBytes
+from .export import exportFormats, exportResults
+from .tabs import ResultsTab, ResultsTabs
+
+if typing.TYPE_CHECKING:
+    from .results import ResultBuffer
+
+mainWindowID: str = "main-window"
+queryTextID: str = "query-text"
+serviceUrlID: str = "service-url"
+
+repositoryURL: str = "https://github.com/retifrav/tap-adql-sandbox"
+
+# results in the active tab
+lastQueryResults: typing.Optional[ResultBuffer] = None
+executingQuery: bool = False
+currentQueryJob: typing.Optional[jobs.Job] = None
+currentExportJob: typing.Optional[jobs.Job] = None
+currentQueryStats: typing.Optional[stats.QueryStats] = None
+resultsTabs: ResultsTabs = ResultsTabs("resultsTabBar")
+
+
+def add_hyperlink(text: str, address: str):
+    b = dpg.add_button(
+        label=text,
+        callback=lambda: webbrowser.open(address)
+    )
+    dpg.bind_item_theme(b, getHyperlinkTheme())
+
+
+def lightPaletteToggled(sender, app_data: bool) -> None:
+    config.uiPalette = "light" if app_data else "dark"
+    applyPalette(config.uiPalette)
+
+
+def showLoading(isLoading: bool) -> None:
+    global executingQuery
+
+    if isLoading:
+        dpg.hide_item("btnExecuteQuery")
+        dpg.configure_item("menuExecuteQuery", enabled=False)
+        dpg.set_value("queryProgress", "")
+        dpg.show_item("queryProgressGroup")
+        executingQuery = True
+    else:
+        dpg.hide_item("queryProgressGroup")
+        dpg.show_item("btnExecuteQuery")
+        dpg.configure_item("menuExecuteQuery", enabled=True)
+        executingQuery = False
+
+
+def keyPressCallback(sender, app_data) -> None:
+    global executingQuery
+
+    # logging.debug(f"sender: {sender}, app_data: {app_data}")
+
+    # dpg.is_item_focused
+    if not dpg.is_item_active(queryTextID) or executingQuery:
+        return
+
+    if dpg.is_key_down(dpg.mvKey_R):
+        # executingQuery = True
+        logging.debug(
+            " ".join((
+                "Triggered executing query",
+                "from the keyboard shortcut"
+            ))
+        )
+        executeQuery()
+
+
+def executeQuery(jobURL: typing.Optional[str] = None) -> None:
+    # results of previous queries stay in their tabs,
+    # new results will get a new tab
+    dpg.hide_item("errorMessage")
+    dpg.set_value("errorMessage", "")
+
+    dpg.hide_item("exportStatus")
+    showLoading(True)
+
+    serviceURL: str = dpg.get_value(serviceUrlID).strip()
+    queryText: str = dpg.get_value(queryTextID).strip()
+
+    if not serviceURL:
+        showQueryError("No service URL provided.")
+        return
+
+    if not queryText:
+        showQueryError("Cannot execute an empty query.")
+        return
+
+    logging.debug(f"Query to execute:\n{queryText}")
+
+    partitions: typing.Optional[typing.List[str]] = None
+    if jobURL is None and dpg.get_value("partitionEnabled"):
+        try:
+            partitions = getPartitions(queryText)
+        except ValueError as ex:
+            showQueryError(f"Couldn't partition the query. {ex}")
+            return
+        logging.debug(
+            "Partitions to execute:\n{}".format("\n---\n".join(partitions))
+        )
+
+    paging: typing.Optional[typing.Tuple[str, int]] = None
+    if jobURL is None and dpg.get_value("pagingEnabled"):
+        if partitions:
+            showQueryError(
+                " ".join((
+                    "Partitioned query cannot be fetched by pages",
+                    "at the same time."
+                ))
+            )
+            return
+        keyColumn: str = dpg.get_value("pagingKeyColumn").strip()
+        if not keyColumn:
+            showQueryError("No key column to fetch pages by provided.")
+            return
+        paging = (keyColumn, dpg.get_value("pagingRowsLimit"))
+
+    startQuery(
+        serviceURL,
+        queryText,
+        dpg.get_value("asyncMode"),
+        jobURL,
+        partitions=partitions,
+        paging=paging,
+        # resumed async job has to be finished anyway
+        useCache=(
+            config.resultsCacheEnabled
+            and not dpg.get_value("bypassCache")
+            and jobURL is None
+        )
+    )
+
+
+def resumeAsyncQuery(
+    sender,
+    app_data,
+    user_data: typing.Dict[str, str]
+) -> None:
+    if executingQuery:
+        return
+    dpg.hide_item("window_asyncJobs")
+    dpg.set_value(serviceUrlID, user_data["serviceURL"])
+    dpg.set_value(queryTextID, user_data["query"])
+    dpg.set_value("asyncMode", True)
+
+    executeQuery(user_data["jobURL"])
+
+
+def getPartitions(queryText: str) -> typing.List[str]:
+    start: float
+    stop: float
+    if dpg.get_value("partitionMode") == "HEALPix":
+        level: int = dpg.get_value("partitionHealpixLevel")
+        expression: str = healpixExpression(
+            level,
+            dpg.get_value("partitionRA").strip(),
+            dpg.get_value("partitionDec").strip()
+        )
+        start, stop = healpixRange(level)
+    else:
+        expression = dpg.get_value("partitionColumn").strip()
+        if not expression:
+            raise ValueError("No column to partition by provided.")
+        try:
+            start = parseNumber(dpg.get_value("partitionFrom"))
+            stop = parseNumber(dpg.get_value("partitionTo"))
+        except ValueError:
+            raise ValueError("Range has to be set with numbers.")
+    return partitionQuery(
+        queryText,
+        expression,
+        start,
+        stop,
+        dpg.get_value("partitionCount")
+    )
+
+
+def partitionModeChanged(sender, app_data: str) -> None:
+    isHealpix: bool = app_data == "HEALPix"
+    dpg.configure_item("partitionRangeGroup", show=not isHealpix)
+    dpg.configure_item("partitionHealpixGroup", show=isHealpix)
+
+
+def fetchByPages() -> None:
+    if executingQuery:
+        return
+    dpg.set_value("pagingEnabled", True)
+    dpg.set_value("partitionEnabled", False)
+    dpg.configure_item("pagingHeader", default_open=True)
+    executeQuery()
+
+
+def startQuery(
+    serviceURL: str,
+    queryText: str,
+    asyncMode: bool,
+    jobURL: typing.Optional[str] = None,
+    useCache: bool = True,
+    partitions: typing.Optional[typing.List[str]] = None,
+    paging: typing.Optional[typing.Tuple[str, int]] = None
+) -> None:
+    global currentQueryJob, currentQueryStats
+    currentQueryJob = jobs.Job("query")
+    currentQueryJob.onProgress = queryProgressed
+    currentQueryStats = stats.QueryStats(serviceURL, queryText)
+    jobs.submitJob(
+        currentQueryJob,
+        runQuery,
+        serviceURL,
+        queryText,
+        dpg.get_item_width(mainWindowID),
+        asyncMode,
+        jobURL,
+        useCache,
+        partitions,
+        paging,
+        currentQueryStats,
+        onDone=queryFinished,
+        onError=queryFailed,
+        onCancelled=queryCancelled
+    )
+
+
+def cancelQuery() -> None:
+    if currentQueryJob is not None:
+        currentQueryJob.cancel()
+
+
+def runQuery(
+    job: jobs.Job,
+    serviceURL: str,
+    queryText: str,
+    windowWidth: int,
+    asyncMode: bool,
+    jobURL: typing.Optional[str],
+    useCache: bool,
+    partitions: typing.Optional[typing.List[str]],
+    paging: typing.Optional[typing.Tuple[str, int]],
+    queryStats: stats.QueryStats
+) -> ResultBuffer:
+    """
+    Runs in a worker thread: executes the query (or its partitions,
+    or its pages sorted by the key column) and streams the results
+    into a buffer, which the results table shows while it is being
+    filled. If the same query has already been executed
+    against the same service, the results are taken from cache instead.
+    """
+    from .debugging import printResults
+    from .paging import fetchPagedResults
+    from .partition import fetchPartitionedResults
+    from .results import ResultBuffer
+
+    buffer = ResultBuffer()
+    buffer.stats = queryStats
+    buffer.onAppended = lambda b: resultsAppended(job, b)
+
+    if partitions:
+        fetchPartitionedResults(
+            job,
+            serviceURL,
+            partitions,
+            buffer,
+            asyncMode,
+            useCache
+        )
+    elif paging:
+        keyColumn, rowsLimit = paging
+        fetchPagedResults(
+            job,
+            serviceURL,
+            queryText,
+            keyColumn,
+            buffer,
+            rowsLimit,
+            asyncMode,
+            useCache
+        )
+    else:
+        fetchResults(
+            job,
+            serviceURL,
+            queryText,
+            buffer,
+            asyncMode,
+            jobURL,
+            useCache
+        )
+
+    logging.debug(
+        f"Columns: {buffer.columnsCount}, rows: {buffer.rowsCount}"
+    )
+    printResults(job, buffer, "results", buffer.stats.phases)
+
+    return buffer
+
+
+def resultsAppended(job: jobs.Job, buffer: ResultBuffer) -> None:
+    """
+    Called from the worker thread every time another chunk of rows
+    has been parsed.
+    """
+    if (
+        # https://github.com/retifrav/tap-adql-sandbox/issues/8
+        # https://github.com/retifrav/tap-adql-sandbox/issues/14
+        Version(dpgVersion) < Version("2.0.0")
+        and
+        buffer.columnsCount > config.dpgColumnsMax
+    ):
+        raise ValueError(
+            " ".join((
+                "You have requested too many columns in your query.",
+                f"Dear PyGui version {dpgVersion} only supports maximum",
+                f"{config.dpgColumnsMax} columns in a table, and so trying",
+                "to display results for your query will crash",
+                "the application. Remove some columns from your SELECT",
+                "statement and try again."
+            ))
+        )
+    jobs.callOnUiThread(showPartialResults, job, buffer)
+
+
+def showPartialResults(job: jobs.Job, buffer: ResultBuffer) -> None:
+    if job is not currentQueryJob or job.cancelled:
+        return
+    try:
+        with buffer.stats.measure("ui"):
+            tab = resultsTabs.findTab(buffer)
+            if tab is None:
+                tab = resultsTabs.getTab(buffer)
+                tab.status = "(receiving)"
+                dpg.show_item("resultsGroup")
+            if tab.view.data is buffer:
+                tab.view.dataAppended()
+            else:
+                tab.view.setData(buffer, dpg.get_item_width(mainWindowID))
+        dpg.configure_item(tab.tabID, label=tab.label)
+        if tab is resultsTabs.activeTab:
+            dpg.set_value("resultsMemory", getMemoryStatus(buffer))
+    except Exception as ex:
+        # will be tried once again when all the results are there
+        logging.warning(f"Couldn't update the results table. {ex}")
+
+
+def queryProgressed(job: jobs.Job) -> None:
+    if job is not currentQueryJob:
+        return
+    dpg.set_value("queryProgress", job.stage)
+
+
+def queryFinished(job: jobs.Job, queryResults: ResultBuffer) -> None:
+    if job is currentQueryJob:
+        showLoading(False)
+    showResults(
+        queryResults,
+        (
+            "(from cache, saved on {})".format(
+                datetime.fromtimestamp(
+                    queryResults.cachedTime
+                ).strftime("%Y-%m-%d %H:%M")
+            )
+            if queryResults.cachedTime is not None
+            else "(not from cache)"
+        )
+    )
+    finishQueryStats(
+        job,
+        "from cache" if queryResults.stats.fromCache else "done",
+        queryResults.rowsCount
+    )
+
+
+def showResults(
+    queryResults: ResultBuffer,
+    status: str,
+    tabKey: typing.Optional[str] = None
+) -> bool:
+    """
+    Shows results in their tab (opening a new one, if they aren't shown
+    yet, or reusing the tab with that key) and makes them the ones
+    to be exported.
+    """
+    tab = resultsTabs.getTab(queryResults, tabKey)
+    tab.status = status
+    try:
+        with queryResults.stats.measure("ui"):
+            if tab.view.data is queryResults:
+                tab.view.dataAppended()
+            else:
+                tab.view.setData(
+                    queryResults,
+                    dpg.get_item_width(mainWindowID)
+                )
+    except Exception as ex:
+        errorMsg = "Couldn't generate the results table"
+        logging.error(f"{errorMsg}. {ex}")
+        if config.debugMode:
+            traceback.print_exc(file=sys.stderr)
+        resultsTabs.closeTab(tab)
+        showError(
+            f"{errorMsg}. There might be more details in console/stderr."
+        )
+        return False
+    dpg.hide_item("errorMessage")
+    resultsTabChanged(tab)
+    # finished results might not fit into memory with the other tabs
+    resultsTabs.enforceBudget()
+    return True
+
+
+def resultsTabChanged(tab: typing.Optional[ResultsTab]) -> None:
+    """
+    Updates the status of results above the tabs for the active tab.
+    """
+    global lastQueryResults
+
+    if tab is None:
+        lastQueryResults = None
+        dpg.hide_item("resultsGroup")
+        dpg.configure_item("menuSaveFile", enabled=False)
+        return
+    lastQueryResults = tab.buffer
+    resultsTabs.updateLabels()
+    dpg.set_value("resultsCacheStatus", tab.status)
+    dpg.set_value("resultsMemory", getMemoryStatus(tab.buffer))
+    tabsMemory: str = f"all tabs: {formatBytes(resultsTabs.memorySize)}"
+    if config.resultsTabsMemoryMax > 0:
+        tabsMemory += f" of {formatBytes(config.resultsTabsMemoryMax)}"
+    dpg.set_value("resultsTabsMemory", f"({tabsMemory})")
+    dpg.configure_item("resultsOverflowGroup", show=tab.buffer.overflow)
+    dpg.configure_item("menuSaveFile", enabled=tab.buffer.finished)
+    dpg.show_item("resultsGroup")
+
+
+def closeResultsTab() -> None:
+    tab = resultsTabs.activeTab
+    if tab is None:
+        return
+    # closing the tab of the query that is still running
+    if not tab.buffer.finished and executingQuery:
+        cancelQuery()
+    resultsTabs.closeTab(tab)
+
+
+def queryFailed(job: jobs.Job, ex: Exception) -> None:
+    logging.debug(f"Query failed: {ex}")
+    finishQueryStats(job, "failed")
+    markIncompleteResults("failed")
+    showQueryError(ex, job)
+
+
+def queryCancelled(job: jobs.Job) -> None:
+    logging.debug("Query was cancelled")
+    finishQueryStats(job, "cancelled")
+    markIncompleteResults("was cancelled")
+    showQueryError("Query was cancelled.", job)
+
+
+def markIncompleteResults(reason: str) -> None:
+    # only the query from the main window shows results while receiving
+    for tab in resultsTabs.tabs:
+        if not tab.buffer.finished:
+            tab.status = f"(incomplete, query {reason})"
+    if resultsTabs.activeTab is not None:
+        resultsTabChanged(resultsTabs.activeTab)
+
+
+def finishQueryStats(job: jobs.Job, status: str, rowsCount: int = 0) -> None:
+    # a query started after this one has its own stats already
+    if job is not currentQueryJob or currentQueryStats is None:
+        return
+    currentQueryStats.finish(status, rowsCount)
+    stats.addToHistory(currentQueryStats)
+    updateQueryStats()
+
+
+def updateQueryStats() -> None:
+    """
+    Shows phases of the last query and stats of the previous ones.
+    """
+    if not stats.history:
+        return
+    last: stats.QueryStats = stats.history[-1]
+    dpg.set_value(
+        "queryStatsSummary",
+        " ".join((
+            f"Last query: {last.status}, {last.rowsCount} rows,",
+            f"{formatBytes(last.bytesCount)} downloaded",
+            f"at {formatBytes(int(last.throughput))}/s,",
+            f"{last.totalTime:.3f} s in total."
+        ))
+    )
+    dpg.delete_item("tableQueryStats", children_only=True, slot=1)
+    for phase, phaseName in stats.phaseNames.items():
+        if phase not in last.phases:
+            continue
+        seconds: float = last.phases[phase]
+        with dpg.table_row(parent="tableQueryStats"):
+            dpg.add_text(default_value=phaseName)
+            dpg.add_text(default_value=f"{seconds:.3f} s")
+            dpg.add_text(
+                default_value=(
+                    f"{seconds / last.totalTime:.0%}"
+                    if last.totalTime > 0
+                    else ""
+                )
+            )
+    dpg.delete_item("tableQueryStatsHistory", children_only=True, slot=1)
+    for s in reversed(stats.history):
+        with dpg.table_row(parent="tableQueryStatsHistory"):
+            dpg.add_text(
+                default_value=datetime.fromtimestamp(
+                    s.startedTime
+                ).strftime("%H:%M:%S")
+            )
+            dpg.add_text(default_value=s.serviceURL)
+            dpg.add_text(default_value=s.status)
+            dpg.add_text(default_value=str(s.rowsCount))
+            dpg.add_text(default_value=formatBytes(s.bytesCount))
+            dpg.add_text(default_value=f"{s.totalTime:.3f}")
+            for phase in ("response", "download", "parse", "convert", "ui"):
+                dpg.add_text(default_value=f"{s.phases.get(phase, 0.0):.3f}")
+
+
+def exportQueryStats(sender, app_data, user_data) -> None:
+    statsFile: pathlib.Path = (
+        pathlib.Path(app_data["current_path"]) / app_data["file_name"]
+    )
+    if not statsFile.suffix:
+        statsFile = statsFile.with_suffix(".json")
+    try:
+        stats.exportHistory(statsFile)
+    except Exception as ex:
+        logging.error(f"Couldn't export query stats to [{statsFile}]. {ex}")
+
+
+def showError(errorMessage) -> None:
+    dpg.set_value("errorMessage", errorMessage)
+    dpg.show_item("errorMessage")
+
+
+def showQueryError(
+    errorMessage,
+    job: typing.Optional[jobs.Job] = None
+) -> None:
+    """
+    Shows the error of the query from the main window and lets
+    to execute another one, unless the error is of a query that has
+    already been replaced by a newer one.
+    """
+    showError(errorMessage)
+    if job is None or job is currentQueryJob:
+        showLoading(False)
+
+
+def preFillExample(sender, app_data, user_data: tuple[str, str]) -> None:
+    dpg.set_value(serviceUrlID, user_data[0])
+    dpg.set_value(queryTextID, user_data[1])
+
+
+def exportResultsToFile(sender, app_data, user_data) -> None:
+    global currentExportJob
+
+    logging.debug(f"app_data: {app_data}")
+    if lastQueryResults is None:
+        return
+    # this check might be redundant,
+    # as dialog window apparently performs it on its own
+    exportFileDir: pathlib.Path = pathlib.Path(app_data["current_path"])
+    if not exportFileDir.is_dir():
+        logging.error(f"The [{exportFileDir}] directory does not exist")
+        return
+    exportFile: pathlib.Path = exportFileDir / app_data["file_name"]
+    # format is chosen by the file extension, and if there isn't one,
+    # then by the selected filter
+    if exportFile.suffix.lower() not in exportFormats:
+        selectedFilter: str = app_data.get("current_filter", "")
+        if selectedFilter in exportFormats:
+            exportFile = exportFile.with_name(
+                f"{exportFile.name}{selectedFilter}"
+            )
+
+    dpg.configure_item("menuSaveFile", enabled=False)
+    dpg.set_value("exportProgressBar", 0.0)
+    dpg.configure_item("exportProgressBar", overlay="")
+    dpg.set_value("exportProgress", f"Exporting to {exportFile.name}")
+    dpg.show_item("exportProgressGroup")
+
+    currentExportJob = jobs.Job("export")
+    currentExportJob.onProgress = exportProgressed
+    jobs.submitJob(
+        currentExportJob,
+        exportResults,
+        lastQueryResults,
+        exportFile,
+        onDone=exportFinished,
+        onError=exportFailed,
+        onCancelled=exportCancelled
+    )
+
+
+def cancelExport() -> None:
+    if currentExportJob is not None:
+        currentExportJob.cancel()
+
+
+def exportProgressed(job: jobs.Job) -> None:
+    if job.progress >= 0:
+        dpg.set_value("exportProgressBar", job.progress)
+        dpg.configure_item(
+            "exportProgressBar",
+            overlay=f"{job.progress:.0%}"
+        )
+    dpg.set_value("exportProgress", job.stage)
+
+
+def exportEnded(message: str) -> None:
+    dpg.hide_item("exportProgressGroup")
+    dpg.configure_item("menuSaveFile", enabled=True)
+    dpg.set_value("exportStatus", message)
+    dpg.show_item("exportStatus")
+
+
+def exportFinished(job: jobs.Job, exportFile: pathlib.Path) -> None:
+    logging.debug(f"Exported results to [{exportFile}]")
+    exportEnded(f"Results have been exported to {exportFile}")
+
+
+def exportFailed(job: jobs.Job, ex: Exception) -> None:
+    logging.error(f"Couldn't export results: {ex}")
+    exportEnded(f"Couldn't export results. {ex}")
+
+
+def exportCancelled(job: jobs.Job) -> None:
+    exportEnded("Export was cancelled.")
+
+
+def showAsyncJobsWindow() -> None:
+    refreshAsyncJobsList()
+    dpg.show_item("window_asyncJobs")
+
+
+def refreshAsyncJobsList() -> None:
+    dpg.delete_item("tableAsyncJobs", children_only=True, slot=1)
+    pendingJobs = uws.loadPendingJobs()
+    dpg.configure_item("textNoAsyncJobs", show=not pendingJobs)
+    dpg.configure_item("tableAsyncJobs", show=bool(pendingJobs))
+    for j in pendingJobs:
+        if "jobURL" not in j:
+            continue
+        with dpg.table_row(parent="tableAsyncJobs"):
+            dpg.add_text(default_value=j.get("submitted", "?"))
+            dpg.add_text(default_value=j.get("serviceURL", "?"))
+            queryPreview: str = " ".join(j.get("query", "").split())
+            dpg.add_text(
+                default_value=(
+                    queryPreview
+                    if len(queryPreview) <= 50
+                    else f"{queryPreview[:49]}…"
+                )
+            )
+            phaseTextID = dpg.add_text(default_value="?")
+            with dpg.group(horizontal=True):
+                dpg.add_button(
+                    label="Phase",
+                    user_data=(j["jobURL"], phaseTextID),
+                    callback=checkAsyncJobPhase
+                )
+                dpg.add_button(
+                    label="Resume",
+                    user_data=j,
+                    callback=resumeAsyncQuery
+                )
+                dpg.add_button(
+                    label="Delete",
+                    user_data=j["jobURL"],
+                    callback=deleteAsyncJob
+                )
+
+
+def checkAsyncJobPhase(
+    sender,
+    app_data,
+    user_data: typing.Tuple[str, int]
+) -> None:
+    jobURL, phaseTextID = user_data
+
+    def phaseFetched(job: jobs.Job, phase: str) -> None:
+        if dpg.does_item_exist(phaseTextID):
+            dpg.set_value(phaseTextID, phase)
+
+    def phaseFailed(job: jobs.Job, ex: Exception) -> None:
+        logging.error(f"Couldn't get async job phase: {ex}")
+        if dpg.does_item_exist(phaseTextID):
+            dpg.set_value(phaseTextID, "unavailable")
+
+    dpg.set_value(phaseTextID, "...")
+    jobs.submitJob(
+        jobs.Job("async-job-phase"),
+        uws.getJobPhase,
+        jobURL,
+        onDone=phaseFetched,
+        onError=phaseFailed
+    )
+
+
+def deleteAsyncJob(sender, app_data, user_data: str) -> None:
+    jobs.submitJob(
+        jobs.Job("async-job-delete"),
+        uws.deleteJob,
+        user_data,
+        onDone=lambda job, result: refreshAsyncJobsList()
+    )
+
+
+def asyncJobsWindow() -> None:
+    with dpg.window(
+        tag="window_asyncJobs",
+        label="Async jobs",
+        min_size=(900, 400),
+        show=False
+    ):
+        dpg.add_text(
+            default_value=" ".join((
+                "Async jobs which were submitted, but which results",
+                "haven't been downloaded yet."
+            ))
+        )
+        dpg.add_spacer()
+        dpg.add_text(
+            tag="textNoAsyncJobs",
+            default_value="There are no such jobs.",
+            show=False
+        )
+        with dpg.table(
+            tag="tableAsyncJobs",
+            header_row=True,
+            resizable=True,
+            borders_outerH=True,
+            borders_innerV=True,
+            borders_innerH=True,
+            borders_outerV=True,
+            policy=dpg.mvTable_SizingStretchProp
+        ):
+            dpg.add_table_column(label="Submitted")
+            dpg.add_table_column(label="Service")
+            dpg.add_table_column(label="Query")
+            dpg.add_table_column(label="Phase")
+            dpg.add_table_column(label="Actions")
+        dpg.add_spacer()
+        dpg.add_button(label="Refresh", callback=refreshAsyncJobsList)
+
+
+def getMemoryStatus(queryResults: ResultBuffer) -> str:
+    status: str = "{} in memory".format(
+        formatBytes(sum(u[2] for u in queryResults.memoryUsage()))
+    )
+    if queryResults.isSpilled:
+        status += f", {formatBytes(queryResults.spilledSize)} on disk"
+    return status
+
+
+def showResultsMemoryWindow() -> None:
+    if lastQueryResults is None:
+        return
+    dpg.delete_item("tableResultsMemory", children_only=True, slot=1)
+    usage = sorted(
+        lastQueryResults.memoryUsage(),
+        key=lambda u: u[2],
+        reverse=True
+    )
+    for column, columnType, size in usage:
+        with dpg.table_row(parent="tableResultsMemory"):
+            dpg.add_text(default_value=column)
+            dpg.add_text(default_value=columnType)
+            dpg.add_text(default_value=formatBytes(size))
+    dpg.set_value(
+        "resultsMemoryTotal",
+        " ".join((
+            f"{lastQueryResults.rowsCount} rows and {len(usage)} columns",
+            f"take {getMemoryStatus(lastQueryResults)}."
+        ))
+    )
+    dpg.show_item("window_resultsMemory")
+
+
+def resultsMemoryWindow() -> None:
+    with dpg.window(
+        tag="window_resultsMemory",
+        label="Results memory usage",
+        min_size=(500, 400),
+        show=False
+    ):
+        dpg.add_text(tag="resultsMemoryTotal", default_value="")
+        dpg.add_spacer()
+        with dpg.table(
+            tag="tableResultsMemory",
+            header_row=True,
+            resizable=True,
+            borders_outerH=True,
+            borders_innerV=True,
+            borders_innerH=True,
+            borders_outerV=True,
+            policy=dpg.mvTable_SizingStretchProp
+        ):
+            dpg.add_table_column(label="Column")
+            dpg.add_table_column(label="Type")
+            dpg.add_table_column(label="Size")
+
+
+def showDPGabout() -> None:
+    dpg.hide_item("aboutWindow")
+    dpg.show_about()
+
+
+def buildInterface() -> None:
+    """
+    Creates all the windows of the application. It is called once
+    the viewport is already shown, see `__main__.py`.
+    """
+    #
+    # --- Simbad window
+    #
+    simbadWindow(showResults)
+    #
+    # --- async jobs window
+    #
+    asyncJobsWindow()
+    #
+    # --- results memory usage window
+    #
+    resultsMemoryWindow()
+    #
+    # --- multi-service window
+    #
+    multiServiceWindow(
+        lambda: dpg.get_value(queryTextID).strip(),
+        showResults
+    )
+    #
+    # --- local SQL window
+    #
+    localSQLWindow(lambda: lastQueryResults, showResults)
+    #
+    # --- service tables window
+    #
+    serviceTablesWindow(
+        lambda: dpg.get_value(serviceUrlID).strip(),
+        lambda q: dpg.set_value(queryTextID, q)
+    )
+    #
+    # --- main window
+    #
+    with dpg.window(tag=mainWindowID):
+        #
+        # --- menu
+        #
+        with dpg.menu_bar():
+            with dpg.menu(label="File"):
+                dpg.add_menu_item(
+                    tag="menuExecuteQuery",
+                    label="Execute query",
+                    shortcut="Cmd/Ctrl + R",
+                    callback=lambda: executeQuery()
+                )
+                dpg.add_spacer()
+                dpg.add_separator()
+                dpg.add_spacer()
+                dpg.add_menu_item(
+                    tag="menuSaveFile",
+                    label="Export results...",
+                    enabled=False,
+                    callback=lambda: dpg.show_item("dialogSaveFile")
+                )
+                dpg.add_spacer()
+                dpg.add_separator()
+                dpg.add_spacer()
+                dpg.add_menu_item(
+                    label="Exit",
+                    callback=lambda: dpg.stop_dearpygui()
+                )
+
+            with dpg.menu(label="View"):
+                dpg.add_menu_item(
+                    label="Light theme",
+                    check=True,
+                    default_value=config.uiPalette == "light",
+                    callback=lightPaletteToggled
+                )
+
+            # with dpg.menu(label="Settings"):
+            #     dpg.add_menu_item(
+            #         label="Setting 1",
+            #         callback=lambda: print("ololo"),
+            #         check=True
+            #     )
+            #     dpg.add_menu_item(
+            #         label="Setting 2",
+            #         callback=lambda: print("ololo")
+            #     )
+
+            with dpg.menu(label="Tools"):
+                dpg.add_menu_item(
+                    tag="menu_getSimbadIDs",
+                    label="Lookup IDs in Simbad",
+                    callback=showSimbadIDsWindow
+                )
+                dpg.add_menu_item(
+                    label="Service tables",
+                    callback=showServiceTablesWindow
+                )
+                dpg.add_menu_item(
+                    label="Async jobs",
+                    callback=showAsyncJobsWindow
+                )
+                dpg.add_menu_item(
+                    label="Execute on several services",
+                    callback=showMultiServiceWindow
+                )
+                dpg.add_menu_item(
+                    label="Local SQL over results",
+                    callback=showLocalSQLWindow
+                )
+                dpg.add_menu_item(
+                    label="Clear results cache",
+                    enabled=config.resultsCacheEnabled,
+                    callback=lambda: cache.clearCache()
+                )
+
+            if config.debugMode:
+                with dpg.menu(label="Dev"):
+                    dpg.add_menu_item(
+                        label="Performance metrics",
+                        callback=lambda: dpg.show_metrics()
+                    )
+                    dpg.add_menu_item(
+                        label="Items registry",
+                        callback=lambda: dpg.show_item_registry()
+                    )
+                    dpg.add_menu_item(
+                        label="Styling",
+                        callback=lambda: dpg.show_style_editor()
+                    )
+                    dpg.add_spacer()
+                    dpg.add_separator()
+                    dpg.add_spacer()
+                    dpg.add_menu_item(
+                        label="Documentation",
+                        callback=lambda: dpg.show_documentation()
+                    )
+                    dpg.add_spacer()
+                    dpg.add_separator()
+                    dpg.add_spacer()
+                    dpg.add_menu_item(
+                        label="Dear PyGui demo",
+                        callback=lambda: show_demo()
+                    )
+                    dpg.add_menu_item(
+                        label="Dear ImGui demo",
+                        callback=lambda: dpg.show_imgui_demo()
+                    )
+
+            with dpg.menu(label="Help"):
+                with dpg.menu(label="Examples"):
+                    for ts in tapServices:
+                        with dpg.menu(label=tapServices[ts]["name"]):
+                            for e in tapServices[ts]["examples"]:
+                                dpg.add_menu_item(
+                                    label=e["description"],
+                                    user_data=(
+                                        tapServices[ts]["url"],
+                                        e["query"]
+                                    ),
+                                    callback=preFillExample
+                                )
+                dpg.add_spacer()
+                dpg.add_separator()
+                dpg.add_spacer()
+                dpg.add_menu_item(
+                    label="About...",
+                    callback=lambda: dpg.show_item("aboutWindow")
+                )
+        #
+        # -- contents
+        #
+        dpg.add_input_text(
+            tag=serviceUrlID,
+            hint="TAP service",
+            width=-1
+        )
+        dpg.add_input_text(
+            tag=queryTextID,
+            # FIXME doesn't work (yet)
+            # https://github.com/hoffstadt/DearPyGui/issues/1519
+            hint="ADQL query",
+            default_value="".join((
+                "SELECT TOP 11 *\n",
+                "FROM some_table\n",
+                "WHERE some_thing = 1"
+            )),
+            width=-1,
+            height=300,
+            multiline=True,
+            tab_input=True
+        )
+        with dpg.group(horizontal=True):
+            dpg.add_button(
+                tag="btnExecuteQuery",
+                label="Execute query",
+                callback=lambda: executeQuery()
+            )
+            dpg.add_checkbox(
+                tag="asyncMode",
+                label="async (UWS) job",
+                default_value=False
+            )
+            dpg.add_checkbox(
+                tag="bypassCache",
+                label="bypass cache",
+                default_value=False,
+                show=config.resultsCacheEnabled
+            )
+        with dpg.collapsing_header(label="Partitioning", default_open=False):
+            dpg.add_checkbox(
+                tag="partitionEnabled",
+                label=" ".join((
+                    "split the query into partitions",
+                    "and execute them in parallel"
+                )),
+                default_value=False
+            )
+            with dpg.group(horizontal=True):
+                dpg.add_radio_button(
+                    tag="partitionMode",
+                    items=["column range", "HEALPix"],
+                    default_value="column range",
+                    horizontal=True,
+                    callback=partitionModeChanged
+                )
+                dpg.add_input_int(
+                    tag="partitionCount",
+                    label="partitions",
+                    default_value=8,
+                    min_value=1,
+                    min_clamped=True,
+                    width=100
+                )
+            with dpg.group(tag="partitionRangeGroup", horizontal=True):
+                dpg.add_input_text(
+                    tag="partitionColumn",
+                    hint="column",
+                    default_value="source_id",
+                    width=200
+                )
+                dpg.add_input_text(
+                    tag="partitionFrom",
+                    hint="from",
+                    width=200
+                )
+                dpg.add_input_text(
+                    tag="partitionTo",
+                    hint="to (including)",
+                    width=200
+                )
+            with dpg.group(
+                tag="partitionHealpixGroup",
+                horizontal=True,
+                show=False
+            ):
+                dpg.add_input_int(
+                    tag="partitionHealpixLevel",
+                    label="level",
+                    default_value=3,
+                    min_value=0,
+                    max_value=29,
+                    min_clamped=True,
+                    max_clamped=True,
+                    width=100
+                )
+                dpg.add_input_text(
+                    tag="partitionRA",
+                    hint="RA column",
+                    default_value="ra",
+                    width=100
+                )
+                dpg.add_input_text(
+                    tag="partitionDec",
+                    hint="Dec column",
+                    default_value="dec",
+                    width=100
+                )
+                dpg.add_text(
+                    default_value="(service has to support ivo_healpix_index)"
+                )
+        with dpg.collapsing_header(
+            tag="pagingHeader",
+            label="Paging",
+            default_open=False
+        ):
+            dpg.add_checkbox(
+                tag="pagingEnabled",
+                label=" ".join((
+                    "if service truncates results, fetch the rest",
+                    "by pages sorted by a key column"
+                )),
+                default_value=False
+            )
+            with dpg.group(horizontal=True):
+                dpg.add_input_text(
+                    tag="pagingKeyColumn",
+                    hint="key column",
+                    default_value="source_id",
+                    width=200
+                )
+                dpg.add_input_int(
+                    tag="pagingRowsLimit",
+                    label="rows at most",
+                    default_value=config.pagingRowsMax,
+                    min_value=1,
+                    min_clamped=True,
+                    step=0,
+                    width=150
+                )
+                dpg.add_text(
+                    default_value="(key values have to be unique)"
+                )
+        with dpg.collapsing_header(
+            tag="queryStatsHeader",
+            label="Query stats",
+            default_open=False
+        ):
+            dpg.add_text(
+                tag="queryStatsSummary",
+                default_value="No queries have been executed yet."
+            )
+            with dpg.table(
+                tag="tableQueryStats",
+                header_row=True,
+                borders_outerH=True,
+                borders_innerV=True,
+                borders_innerH=True,
+                borders_outerV=True,
+                policy=dpg.mvTable_SizingStretchProp
+            ):
+                dpg.add_table_column(label="Phase")
+                dpg.add_table_column(label="Time")
+                dpg.add_table_column(label="Share")
+            dpg.add_text(default_value="Previous queries (seconds):")
+            with dpg.table(
+                tag="tableQueryStatsHistory",
+                header_row=True,
+                resizable=True,
+                scrollY=True,
+                height=200,
+                borders_outerH=True,
+                borders_innerV=True,
+                borders_innerH=True,
+                borders_outerV=True,
+                policy=dpg.mvTable_SizingStretchProp
+            ):
+                for label in (
+                    "Started",
+                    "Service",
+                    "Status",
+                    "Rows",
+                    "Size",
+                    "Total",
+                    "Response",
+                    "Download",
+                    "Parse",
+                    "Convert",
+                    "UI"
+                ):
+                    dpg.add_table_column(label=label)
+            dpg.add_button(
+                label="Export history to JSON",
+                callback=lambda: dpg.show_item("dialogExportQueryStats")
+            )
+        with dpg.group(
+            tag="queryProgressGroup",
+            horizontal=True,
+            show=False
+        ):
+            dpg.add_loading_indicator(
+                tag="loadingAnimation",
+                style=1,
+                radius=2.0,
+                # speed=2,
+                indent=7,
+                color=stylePrimaryColorActive,
+                secondary_color=stylePrimaryColor
+            )
+            dpg.add_button(
+                tag="btnCancelQuery",
+                label="Cancel",
+                callback=cancelQuery
+            )
+            dpg.add_text(tag="queryProgress", default_value="")
+
+        dpg.add_spacer()
+
+        dpg.add_text(
+            tag="errorMessage",
+            default_value="Error",
+            # https://github.com/hoffstadt/DearPyGui/issues/1275
+            wrap=(config.windowMinWidth - 50),
+            show=False
+        )
+
+        with dpg.group(tag="resultsGroup", show=False):
+            with dpg.group(horizontal=True):
+                dpg.add_text(default_value="Query results:")
+                dpg.add_text(tag="resultsCacheStatus", default_value="")
+                dpg.add_text(tag="resultsMemory", default_value="")
+                dpg.add_button(
+                    label="Details",
+                    callback=showResultsMemoryWindow
+                )
+                dpg.add_text(tag="resultsTabsMemory", default_value="")
+                dpg.add_button(
+                    label="Close tab",
+                    callback=closeResultsTab
+                )
+            with dpg.group(
+                tag="resultsOverflowGroup",
+                horizontal=True,
+                show=False
+            ):
+                dpg.add_text(
+                    tag="resultsOverflowWarning",
+                    default_value=" ".join((
+                        "Results were truncated by the service",
+                        "(MAXREC limit), there are more rows."
+                    ))
+                )
+                dpg.add_button(
+                    label="Fetch the rest by pages",
+                    callback=fetchByPages
+                )
+            with dpg.group(
+                tag="exportProgressGroup",
+                horizontal=True,
+                show=False
+            ):
+                dpg.add_progress_bar(
+                    tag="exportProgressBar",
+                    default_value=0.0,
+                    width=200
+                )
+                dpg.add_button(
+                    label="Cancel",
+                    callback=cancelExport
+                )
+                dpg.add_text(tag="exportProgress", default_value="")
+            dpg.add_text(
+                tag="exportStatus",
+                default_value="",
+                wrap=(config.windowMinWidth - 50),
+                show=False
+            )
+            dpg.add_tab_bar(
+                tag="resultsTabBar",
+                reorderable=True,
+                callback=resultsTabs.tabSelected
+            )
+            resultsTabs.onChanged = resultsTabChanged
+    #
+    # --- save file dialog
+    #
+    with dpg.file_dialog(
+        id="dialogSaveFile",
+        directory_selector=False,
+        width=800,
+        height=600,
+        modal=True,
+        show=False,
+        callback=exportResultsToFile
+    ):
+        for extension, formatName in exportFormats.items():
+            dpg.add_file_extension(
+                extension,
+                custom_text=f"[{formatName}]",
+                color=(30, 225, 0)
+            )
+    #
+    # --- query stats export dialog
+    #
+    with dpg.file_dialog(
+        id="dialogExportQueryStats",
+        directory_selector=False,
+        width=800,
+        height=600,
+        modal=True,
+        show=False,
+        callback=exportQueryStats
+    ):
+        dpg.add_file_extension(".json", color=(30, 225, 0))
+    #
+    # --- error dialog
+    #
+    # with dpg.window(
+    #     tag="errorDialog",
+    #     label="Error",
+    #     modal=True,
+    #     show=False,
+    #     width=300
+    # ):
+    #     dpg.add_text(
+    #         tag="errorDialogText",
+    #         default_value="Unknown error"
+    #     )
+    #     dpg.add_button(
+    #         label="Close",
+    #         callback=lambda: dpg.hide_item("errorDialog")
+    #     )
+    #     dpg.add_spacer(height=2)
+    #
+    # --- about window
+    #
+    with dpg.window(
+        tag="aboutWindow",
+        label="About application",
+        modal=True,
+        min_size=(780, 440),
+        show=False
+    ):
+        dpg.add_text(
+            "".join((
+                "A sandbox application for executing ",
+                "ADQL queries via TAP interface\n",
+                "of various data sources, ",
+                "such as astronomical databases, using PyVO.\n",
+                "Essentially, this is a GUI for PyVO."
+            ))
+        )
+
+        dpg.add_text(f"Version: {__version__}")
+
+        dpg.add_text("License: GPLv3")
+        with dpg.group(horizontal=True):
+            dpg.add_text("Source code:")
+            add_hyperlink(repositoryURL, repositoryURL)
+
+        dpg.add_text(__copyright__)
+
+        dpg.add_spacer()
+        dpg.add_separator()
+        dpg.add_spacer(height=5)
+        with dpg.group(horizontal=True):
+            dpg.add_text("Created with Dear PyGui")
+            dpg.add_button(
+                label="about that...",
+                callback=showDPGabout
+            )
+        dpg.add_spacer(height=5)
+        dpg.add_separator()
+        dpg.add_spacer(height=10)
+        dpg.add_button(
+            label="Close",
+            callback=lambda: dpg.hide_item("aboutWindow")
+        )
+        dpg.add_spacer(height=2)
+
+    # themes/styles bindings
+    dpg.bind_item_theme("errorMessage", getErrorTheme())
+    dpg.bind_item_theme("errorMessageSimbadIDs", getErrorTheme())
+    dpg.bind_item_theme("errorMessageSimbadBatch", getErrorTheme())
+    dpg.bind_item_theme("errorMessageServiceTables", getErrorTheme())
+    dpg.bind_item_theme("resultsOverflowWarning", getErrorTheme())
+    dpg.bind_item_theme("aboutWindow", getWindowTheme())
+    # dpg.bind_item_theme("errorDialog", getWindowTheme())
+    # dpg.bind_item_theme("errorDialogText", getErrorTheme())
+
+    # keyboard shortcuts
+    with dpg.handler_registry():
+        # --- for the query text
+        # Mac OS | Control
+        dpg.add_key_press_handler(341, callback=keyPressCallback)
+        # Mac OS | left Command
+        dpg.add_key_press_handler(343, callback=keyPressCallback)
+        # Mac OS | right Command
+        dpg.add_key_press_handler(347, callback=keyPressCallback)
+        # Linux | right Ctrl?
+        dpg.add_key_press_handler(345, callback=keyPressCallback)
+        # Windows | left and right Ctrl
+        dpg.add_key_press_handler(17, callback=keyPressCallback)
+
+    # things to do on application start
+    dpg.set_value(
+        serviceUrlID,
+        tapServices["padc"]["url"]
+    )
+    dpg.set_value(
+        queryTextID,
+        tapServices["padc"]["examples"][5]["query"]
+    )
+    pendingAsyncJobs: int = len(uws.loadPendingJobs())
+    if pendingAsyncJobs:
+        logging.info(
+            " ".join((
+                f"There are {pendingAsyncJobs} async jobs",
+                "which results haven't been downloaded yet"
+            ))
+        )
+        showAsyncJobsWindow()
+
+
+def shutdown() -> None:
+    services.closeSessions()
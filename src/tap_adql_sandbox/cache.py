@@ -0,0 +1,232 @@
+from __future__ import annotations
+# 3rd-party dependencies
+#
+# pandas is imported only for reading results, the rest of the cache
+# (such as listing or clearing it) doesn't need it
+#
+# standard libraries
+#
+import hashlib
+import json
+import os
+import pathlib
+import threading
+import time
+import logging
+import typing
+#
+# own stuff
+#
+from . import config
+from . import resultsCachePath
+from .adql import normalizeQuery
+
+if typing.TYPE_CHECKING:
+    import pandas
+
+resultsCacheIndexFile = resultsCachePath / "index.json"
+
+resultsCacheLock: threading.Lock = threading.Lock()
+
+
+def getCacheKey(serviceURL: str, queryText: str) -> str:
+    return hashlib.sha256(
+        "\n".join((
+            serviceURL.strip().rstrip("/"),
+            normalizeQuery(queryText)
+        )).encode("utf-8")
+    ).hexdigest()
+
+
+def loadIndex() -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+    try:
+        with open(resultsCacheIndexFile, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as ex:
+        logging.warning(
+            " ".join((
+                "Couldn't read results cache index",
+                f"[{resultsCacheIndexFile}]: {ex}"
+            ))
+        )
+        return {}
+    if not isinstance(index, dict):
+        logging.warning(f"Unexpected contents of [{resultsCacheIndexFile}]")
+        return {}
+    return index
+
+
+def saveIndex(index: typing.Dict[str, typing.Dict[str, typing.Any]]) -> None:
+    try:
+        resultsCachePath.mkdir(parents=True, exist_ok=True)
+        indexFileTmp = resultsCacheIndexFile.with_suffix(".tmp")
+        with open(indexFileTmp, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=4)
+        os.replace(indexFileTmp, resultsCacheIndexFile)
+    except OSError as ex:
+        logging.warning(
+            " ".join((
+                "Couldn't save results cache index",
+                f"[{resultsCacheIndexFile}]: {ex}"
+            ))
+        )
+
+
+def removeEntryFile(entry: typing.Dict[str, typing.Any]) -> None:
+    try:
+        (resultsCachePath / entry["file"]).unlink()
+    except FileNotFoundError:
+        pass
+    except OSError as ex:
+        logging.warning(f"Couldn't delete cached results: {ex}")
+
+
+def isExpired(entry: typing.Dict[str, typing.Any]) -> bool:
+    return time.time() - entry["created"] > config.resultsCacheAgeMax
+
+
+def writeResults(data: pandas.DataFrame, key: str) -> str:
+    """
+    Results are saved to Parquet, unless their values cannot be represented
+    in it (objects of different types in one column, for example), in which
+    case they are saved to pickle.
+    """
+    resultsCachePath.mkdir(parents=True, exist_ok=True)
+    try:
+        fileName = f"{key}.parquet"
+        data.to_parquet(resultsCachePath / fileName, index=False)
+        return fileName
+    except Exception as ex:
+        logging.debug(f"Couldn't save results to Parquet: {ex}")
+        try:
+            (resultsCachePath / f"{key}.parquet").unlink()
+        except OSError:
+            pass
+    fileName = f"{key}.pkl"
+    data.to_pickle(resultsCachePath / fileName)
+    return fileName
+
+
+def readResults(fileName: str) -> pandas.DataFrame:
+    import pandas
+
+    resultsFile = resultsCachePath / fileName
+    if resultsFile.suffix == ".parquet":
+        return pandas.read_parquet(resultsFile)
+    return pandas.read_pickle(resultsFile)
+
+
+def getResultsFile(entry: typing.Dict[str, typing.Any]) -> pathlib.Path:
+    return resultsCachePath / entry["file"]
+
+
+def listCachedResults() -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+    """
+    Information about all the cached results that haven't expired yet,
+    by their keys.
+    """
+    with resultsCacheLock:
+        index = loadIndex()
+    return {k: e for k, e in index.items() if not isExpired(e)}
+
+
+def getCachedResults(
+    serviceURL: str,
+    queryText: str
+) -> typing.Optional[typing.Tuple[pandas.DataFrame, typing.Dict]]:
+    """
+    Returns previously saved results of the same query (up to insignificant
+    differences in its text) from the same service and the information
+    about them, or nothing, if there are no such results or they are too old.
+    """
+    key: str = getCacheKey(serviceURL, queryText)
+    with resultsCacheLock:
+        index = loadIndex()
+        entry = index.get(key)
+        if entry is None:
+            return None
+        if isExpired(entry):
+            logging.debug(f"Cached results [{key}] have expired")
+            removeEntryFile(entry)
+            del index[key]
+            saveIndex(index)
+            return None
+        try:
+            data = readResults(entry["file"])
+        except Exception as ex:
+            logging.warning(f"Couldn't read cached results [{key}]: {ex}")
+            removeEntryFile(entry)
+            del index[key]
+            saveIndex(index)
+            return None
+        entry["accessed"] = time.time()
+        saveIndex(index)
+    return data, entry
+
+
+def storeResults(
+    serviceURL: str,
+    queryText: str,
+    data: pandas.DataFrame,
+    overflow: bool = False
+) -> None:
+    key: str = getCacheKey(serviceURL, queryText)
+    with resultsCacheLock:
+        index = loadIndex()
+        if key in index:
+            removeEntryFile(index.pop(key))
+        try:
+            fileName = writeResults(data, key)
+            size: int = (resultsCachePath / fileName).stat().st_size
+        except Exception as ex:
+            logging.warning(f"Couldn't save results to cache: {ex}")
+            return
+        if size > config.resultsCacheSizeMax:
+            # otherwise all the other results would be evicted first
+            logging.debug(f"Results are larger than the whole cache [{key}]")
+            removeEntryFile({"file": fileName})
+            saveIndex(index)
+            return
+        now: float = time.time()
+        index[key] = {
+            "serviceURL": serviceURL,
+            "query": queryText,
+            "file": fileName,
+            "size": size,
+            "rows": len(data),
+            "overflow": overflow,
+            "created": now,
+            "accessed": now
+        }
+        evictResults(index)
+        saveIndex(index)
+    logging.debug(f"Saved results to cache [{key}], {size} bytes")
+
+
+def evictResults(
+    index: typing.Dict[str, typing.Dict[str, typing.Any]]
+) -> None:
+    """
+    Drops expired results and then the least recently used ones
+    until the total size fits into `config.resultsCacheSizeMax`.
+    """
+    for key in [k for k, e in index.items() if isExpired(e)]:
+        removeEntryFile(index.pop(key))
+
+    totalSize: int = sum(e["size"] for e in index.values())
+    for key in sorted(index, key=lambda k: index[k]["accessed"]):
+        if totalSize <= config.resultsCacheSizeMax:
+            break
+        entry = index.pop(key)
+        totalSize -= entry["size"]
+        removeEntryFile(entry)
+        logging.debug(f"Evicted cached results [{key}]")
+
+
+def clearCache() -> None:
+    with resultsCacheLock:
+        for entry in loadIndex().values():
+            removeEntryFile(entry)
+        saveIndex({})
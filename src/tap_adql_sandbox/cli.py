@@ -0,0 +1,311 @@
+"""
+Headless mode for executing queries without the application window,
+such as on machines that don't have a display:
+
+    $ tap-adql-sandbox run --service URL --query some.adql --out some.parquet
+"""
+
+from __future__ import annotations
+# standard libraries
+#
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
+import pathlib
+import sys
+import threading
+import logging
+import typing
+#
+# own stuff
+#
+# the arguments parser is built every time the application starts,
+# so the rest (and pandas and PyVO with it) is imported only when
+# queries are actually run
+#
+from . import config
+from . import jobs
+from . import stats
+from .adql import parseNumber, partitionQuery
+from .export import exportFormats, exportResults
+
+if typing.TYPE_CHECKING:
+    from .results import ResultBuffer
+
+printLock: threading.Lock = threading.Lock()
+
+
+def addRunArguments(argParser: argparse.ArgumentParser) -> None:
+    argParser.add_argument(
+        "--service",
+        required=True,
+        metavar="URL",
+        help="TAP service URL"
+    )
+    argParser.add_argument(
+        "--query",
+        required=True,
+        nargs="+",
+        metavar="FILE",
+        help="file(s) with ADQL query, - for reading it from stdin"
+    )
+    argParser.add_argument(
+        "--out",
+        metavar="PATH",
+        help=" ".join((
+            "file to export results to, format is chosen by its extension;",
+            "if there are several queries, then it is a directory,",
+            "in which files are named after query files (so those",
+            "have to have different names)"
+        ))
+    )
+    argParser.add_argument(
+        "--format",
+        choices=[e.lstrip(".") for e in exportFormats],
+        default="parquet",
+        help=" ".join((
+            "format of files exported to the --out directory",
+            "(default: %(default)s)"
+        ))
+    )
+    argParser.add_argument(
+        "--print",
+        action="store_true",
+        help=" ".join((
+            "print results as a table even if they are exported",
+            "(they are always printed without --out)"
+        ))
+    )
+    argParser.add_argument(
+        "--async",
+        dest="asyncMode",
+        action="store_true",
+        help="execute queries as async (UWS) jobs (default: %(default)s)"
+    )
+    argParser.add_argument(
+        "--bypass-cache",
+        action="store_true",
+        help=" ".join((
+            "don't take results from cache, but still save them there",
+            "(default: %(default)s)"
+        ))
+    )
+    argParser.add_argument(
+        "--partition",
+        nargs=4,
+        metavar=("COLUMN", "FROM", "TO", "PARTS"),
+        help=" ".join((
+            "split every query into PARTS partitions by ranges",
+            "of COLUMN values from FROM to TO (including)"
+        ))
+    )
+    argParser.add_argument(
+        "--keyset-paging",
+        nargs=2,
+        metavar=("KEY", "LIMIT"),
+        help=" ".join((
+            "if service truncates results, fetch the rest by pages",
+            "sorted by KEY column (values have to be unique),",
+            "up to LIMIT rows in total"
+        ))
+    )
+    argParser.add_argument(
+        "--stats",
+        metavar="FILE",
+        help=" ".join((
+            "save stats of the queries (timings of their phases,",
+            "downloaded bytes) to a JSON file"
+        ))
+    )
+    argParser.add_argument(
+        "--concurrency",
+        type=int,
+        default=config.jobsWorkersMax,
+        metavar="N",
+        help="how many queries to execute at once (default: %(default)s)"
+    )
+
+
+def readQuery(queryFile: str) -> str:
+    if queryFile == "-":
+        return sys.stdin.read().strip()
+    return pathlib.Path(queryFile).read_text(encoding="utf-8").strip()
+
+
+def getOutputFile(
+    cliArgs: argparse.Namespace,
+    queryFile: str
+) -> typing.Optional[pathlib.Path]:
+    if not cliArgs.out:
+        return None
+    out = pathlib.Path(cliArgs.out)
+    if len(cliArgs.query) == 1 and not out.is_dir():
+        return out
+    stem: str = "stdin" if queryFile == "-" else pathlib.Path(queryFile).stem
+    return out / f"{stem}.{cliArgs.format}"
+
+
+def runQueryFile(
+    job: jobs.Job,
+    cliArgs: argparse.Namespace,
+    queryFile: str
+) -> ResultBuffer:
+    from .formatting import tabulateResults
+    from .results import ResultBuffer
+
+    buffer = ResultBuffer()
+    queryText: str = readQuery(queryFile)
+    buffer.stats = stats.QueryStats(cliArgs.service, queryText)
+    try:
+        fetchQueryResults(job, cliArgs, queryText, buffer)
+    except Exception:
+        buffer.stats.finish("failed")
+        raise
+    finally:
+        stats.addToHistory(buffer.stats)
+    buffer.stats.finish(
+        "from cache" if buffer.stats.fromCache else "done",
+        buffer.rowsCount
+    )
+    logging.info(
+        " ".join((
+            f"[{queryFile}] {buffer.rowsCount} rows",
+            "from cache" if buffer.cachedTime is not None else "from service",
+            f"in {buffer.stats.totalTime:.2f} s"
+        ))
+    )
+    if buffer.overflow:
+        logging.warning(f"[{queryFile}] results were truncated by service")
+
+    outputFile = getOutputFile(cliArgs, queryFile)
+    if outputFile is not None:
+        outputFile.parent.mkdir(parents=True, exist_ok=True)
+        exportResults(job, buffer, outputFile)
+        logging.info(f"[{queryFile}] results exported to [{outputFile}]")
+    if outputFile is None or cliArgs.print:
+        table: str = tabulateResults(buffer.toDataFrame())
+        with printLock:
+            if len(cliArgs.query) > 1:
+                print(f"--- {queryFile}")
+            print(table)
+    return buffer
+
+
+def fetchQueryResults(
+    job: jobs.Job,
+    cliArgs: argparse.Namespace,
+    queryText: str,
+    buffer: ResultBuffer
+) -> None:
+    from .execution import fetchResults
+    from .partition import fetchPartitionedResults
+    from .paging import fetchPagedResults
+
+    if cliArgs.partition:
+        column, start, stop, partsCount = cliArgs.partition
+        fetchPartitionedResults(
+            job,
+            cliArgs.service,
+            partitionQuery(
+                queryText,
+                column,
+                parseNumber(start),
+                parseNumber(stop),
+                int(partsCount)
+            ),
+            buffer,
+            cliArgs.asyncMode,
+            useCache=not cliArgs.bypass_cache
+        )
+    elif cliArgs.keyset_paging:
+        keyColumn, rowsLimit = cliArgs.keyset_paging
+        fetchPagedResults(
+            job,
+            cliArgs.service,
+            queryText,
+            keyColumn,
+            buffer,
+            int(rowsLimit),
+            cliArgs.asyncMode,
+            useCache=not cliArgs.bypass_cache
+        )
+    else:
+        fetchResults(
+            job,
+            cliArgs.service,
+            queryText,
+            buffer,
+            cliArgs.asyncMode,
+            useCache=not cliArgs.bypass_cache
+        )
+
+
+def run(cliArgs: argparse.Namespace) -> int:
+    """
+    Executes query files, several at once, and returns the exit code:
+    0 if all of them succeeded and 1 otherwise.
+    """
+    from . import services
+
+    if cliArgs.partition and cliArgs.keyset_paging:
+        logging.error("--partition and --keyset-paging cannot be combined")
+        return 1
+    if cliArgs.query.count("-") > 1:
+        logging.error("Query can be read from stdin only once")
+        return 1
+    # file that results are exported to => query file
+    outputFiles: typing.Dict[pathlib.Path, str] = {}
+    for queryFile in cliArgs.query:
+        outputFile = getOutputFile(cliArgs, queryFile)
+        if outputFile is None:
+            continue
+        if outputFile in outputFiles:
+            logging.error(
+                " ".join((
+                    f"Results of [{outputFiles[outputFile]}]",
+                    f"and [{queryFile}] would be exported to the same",
+                    f"[{outputFile}] file, query files have to have",
+                    "different names"
+                ))
+            )
+            return 1
+        outputFiles[outputFile] = queryFile
+
+    queryJobs: typing.Dict[str, jobs.Job] = {
+        q: jobs.Job(f"query {q}") for q in cliArgs.query
+    }
+    failedCount: int = 0
+    interrupted: bool = False
+    executor = ThreadPoolExecutor(
+        max_workers=max(cliArgs.concurrency, 1),
+        thread_name_prefix="query"
+    )
+    try:
+        futures = {
+            executor.submit(runQueryFile, job, cliArgs, q): q
+            for q, job in queryJobs.items()
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as ex:
+                failedCount += 1
+                logging.error(f"[{futures[future]}] failed: {ex}")
+    except KeyboardInterrupt:
+        logging.error("Interrupted, cancelling queries")
+        interrupted = True
+        # async jobs are kept on services, so they could be resumed
+        jobs.shuttingDown = True
+        for job in queryJobs.values():
+            job.cancel()
+    finally:
+        # workers might still be blocked in network calls
+        executor.shutdown(wait=not interrupted, cancel_futures=True)
+        services.closeSessions()
+
+    if cliArgs.stats:
+        try:
+            stats.exportHistory(pathlib.Path(cliArgs.stats))
+        except Exception as ex:
+            logging.error(f"Couldn't save stats to [{cliArgs.stats}]: {ex}")
+
+    return 1 if failedCount or interrupted else 0
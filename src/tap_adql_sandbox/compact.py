@@ -0,0 +1,282 @@
+# 3rd-party dependencies
+#
+import numpy
+import pandas
+#
+# standard libraries
+#
+import typing
+#
+# own stuff
+#
+from . import config
+
+# strings are kept in Arrow arrays instead of Python objects
+compactStringType = pandas.StringDtype("pyarrow")
+
+integerTypes: typing.Dict[str, typing.List[numpy.dtype]] = {
+    "i": [numpy.dtype(t) for t in ("int8", "int16", "int32", "int64")],
+    "u": [numpy.dtype(t) for t in ("uint8", "uint16", "uint32", "uint64")]
+}
+
+
+def valuesType(dtype: typing.Any) -> numpy.dtype:
+    """
+    NumPy type of the values, whether the column is nullable or not.
+    """
+    return numpy.dtype(getattr(dtype, "numpy_dtype", dtype))
+
+
+def isNumeric(dtype: typing.Any) -> bool:
+    return (
+        not isinstance(dtype, pandas.CategoricalDtype)
+        and
+        (
+            pandas.api.types.is_integer_dtype(dtype)
+            or
+            pandas.api.types.is_float_dtype(dtype)
+        )
+    )
+
+
+def smallestIntegerType(
+    values: numpy.ndarray,
+    dtype: numpy.dtype
+) -> numpy.dtype:
+    """
+    The smallest integer type of the same signedness, which can hold
+    all the values.
+    """
+    if not len(values):
+        return dtype
+    lowest, highest = values.min(), values.max()
+    for candidate in integerTypes[dtype.kind]:
+        if candidate.itemsize >= dtype.itemsize:
+            break
+        limits = numpy.iinfo(candidate)
+        if limits.min <= lowest and highest <= limits.max:
+            return candidate
+    return dtype
+
+
+def compactColumn(
+    column: pandas.Series,
+    previousType: typing.Optional[typing.Any] = None
+) -> pandas.Series:
+    """
+    Converts the column to a type that takes less memory without losing
+    anything: integers to the smallest type that fits their values,
+    doubles to floats if they are exactly the same, strings to Arrow
+    strings. Nullable columns stay nullable, so missing values don't turn
+    columns into objects. If the same column in previous chunks
+    of results already has some type, then the column is not made any
+    smaller than that, so chunks could be put together without changing
+    their types once again.
+    """
+    dtype = column.dtype
+    if isinstance(dtype, pandas.CategoricalDtype):
+        # categories of different chunks are not the same
+        if previousType is None or previousType == dtype:
+            return column
+        return column.astype(compactStringType)
+    if isNumeric(dtype):
+        smallest: numpy.dtype = valuesType(dtype)
+        if pandas.api.types.is_integer_dtype(dtype):
+            # missing values don't matter, zero fits into any type
+            values = column.to_numpy(dtype=smallest, na_value=0)
+            smallest = smallestIntegerType(values, smallest)
+        elif smallest == numpy.float64 and not (
+            previousType is not None and valuesType(previousType) == smallest
+        ):
+            values = column.to_numpy(dtype=smallest, na_value=numpy.nan)
+            # values that don't fit become infinities, which won't be equal
+            with numpy.errstate(over="ignore", invalid="ignore"):
+                singles = values.astype(numpy.float32)
+            if numpy.array_equal(singles, values, equal_nan=True):
+                smallest = numpy.dtype(numpy.float32)
+        if previousType is not None and isNumeric(previousType):
+            smallest = numpy.promote_types(smallest, valuesType(previousType))
+        return setValuesType(column, smallest)
+    if pandas.api.types.is_string_dtype(dtype) and dtype != compactStringType:
+        if (
+            pandas.api.types.is_object_dtype(dtype)
+            and
+            pandas.api.types.infer_dtype(column, skipna=True) != "string"
+        ):
+            # bytes, arrays and whatnot
+            return column
+        return column.astype(compactStringType)
+    return column
+
+
+def setValuesType(
+    column: pandas.Series,
+    dtype: numpy.dtype
+) -> pandas.Series:
+    """
+    Converts numeric column to another type, keeping it nullable
+    if it was.
+    """
+    if valuesType(column.dtype) == dtype:
+        return column
+    if (
+        isinstance(column.dtype, pandas.api.extensions.ExtensionDtype)
+        and
+        dtype.kind in "iu"
+    ):
+        # such as Int16 or UInt8
+        nullableType: str = f"Int{dtype.itemsize * 8}"
+        return column.astype(
+            f"U{nullableType}" if dtype.kind == "u" else nullableType
+        )
+    return column.astype(dtype)
+
+
+def compactTypes(
+    chunk: pandas.DataFrame,
+    previousTypes: typing.Optional[typing.Dict[str, typing.Any]] = None
+) -> pandas.DataFrame:
+    if previousTypes is None:
+        previousTypes = {}
+    return pandas.DataFrame(
+        {
+            c: compactColumn(chunk[c], previousTypes.get(str(c)))
+            for c in chunk.columns
+        },
+        copy=False
+    )
+
+
+def columnTypes(chunk: pandas.DataFrame) -> typing.Dict[str, typing.Any]:
+    return {str(c): dtype for c, dtype in chunk.dtypes.items()}
+
+
+def widenedTypes(
+    previousTypes: typing.Dict[str, typing.Any],
+    types: typing.Dict[str, typing.Any]
+) -> typing.Dict[str, typing.Any]:
+    """
+    Columns of the (already compacted) chunk with these types, which got
+    a wider type than the same columns in previous chunks, so those would
+    need to be converted too.
+    """
+    widened: typing.Dict[str, typing.Any] = {}
+    for c, dtype in types.items():
+        previousType = previousTypes.get(c)
+        if previousType is None or previousType == dtype:
+            continue
+        if isNumeric(previousType) and isNumeric(dtype):
+            if valuesType(previousType) != valuesType(dtype):
+                widened[c] = dtype
+        elif isinstance(previousType, pandas.CategoricalDtype):
+            widened[c] = compactStringType
+    return widened
+
+
+def widenTypes(
+    chunk: pandas.DataFrame,
+    widened: typing.Dict[str, typing.Any]
+) -> pandas.DataFrame:
+    return chunk.assign(**{
+        c: (
+            setValuesType(chunk[c], valuesType(dtype))
+            if isNumeric(dtype)
+            else chunk[c].astype(dtype)
+        )
+        for c, dtype in widened.items()
+    })
+
+
+def numericTypes(chunk: pandas.DataFrame) -> typing.Dict[str, numpy.dtype]:
+    return {
+        str(c): valuesType(dtype)
+        for c, dtype in chunk.dtypes.items()
+        if isNumeric(dtype)
+    }
+
+
+def mergeTypes(
+    types: typing.Dict[str, numpy.dtype],
+    otherTypes: typing.Dict[str, numpy.dtype]
+) -> typing.Dict[str, numpy.dtype]:
+    """
+    Types that can hold the values of the same columns from both.
+    """
+    merged: typing.Dict[str, numpy.dtype] = dict(types)
+    for c, dtype in otherTypes.items():
+        merged[c] = (
+            numpy.promote_types(merged[c], dtype) if c in merged else dtype
+        )
+    return merged
+
+
+def restoreTypes(
+    chunk: pandas.DataFrame,
+    types: typing.Dict[str, numpy.dtype]
+) -> pandas.DataFrame:
+    """
+    Converts numeric columns back to the types of values they came in
+    (see `numericTypes()`), keeping them nullable. Compact types are only
+    for storing the values: arithmetic on them (in filters, SQL and such)
+    would silently overflow, `int16` column multiplied by 100 and so on.
+    """
+    restored = {
+        str(c): setValuesType(chunk[c], types[str(c)])
+        for c in chunk.columns
+        if str(c) in types
+        and isNumeric(chunk[c].dtype)
+        and valuesType(chunk[c].dtype) != types[str(c)]
+    }
+    return chunk.assign(**restored) if restored else chunk
+
+
+def widestTypes(chunk: pandas.DataFrame) -> pandas.DataFrame:
+    """
+    Converts numeric columns to 64-bit types of the same kind (keeping
+    them nullable), so arithmetic on them doesn't overflow even if
+    the service itself sent them as `short` or `float`.
+    """
+    widest = {
+        c: setValuesType(
+            chunk[c],
+            numpy.dtype(f"{valuesType(chunk[c].dtype).kind}8")
+        )
+        for c in chunk.columns
+        if isNumeric(chunk[c].dtype)
+        and valuesType(chunk[c].dtype).itemsize < 8
+    }
+    return chunk.assign(**widest) if widest else chunk
+
+
+def categorizeStrings(data: pandas.DataFrame) -> pandas.DataFrame:
+    """
+    Converts string columns with few distinct values (such as object
+    types or catalog names) to categoricals, so every value is stored
+    only once. It is done with all the results, because categoricals
+    from different chunks would have different categories.
+    """
+    categorized = {
+        c: data[c].astype("category")
+        for c in data.columns
+        if data[c].dtype == compactStringType
+        and
+        data[c].nunique() <= len(data) * config.resultsCategoriesRatioMax
+    }
+    return data.assign(**categorized) if categorized else data
+
+
+def expandTypes(data: pandas.DataFrame) -> pandas.DataFrame:
+    """
+    Converts categoricals and Arrow strings back to plain objects, for
+    the libraries that don't know how to handle those.
+    """
+    expanded = {
+        c: pandas.Series(
+            data[c].to_numpy(dtype=object, na_value=None),
+            index=data.index
+        )
+        for c in data.columns
+        if isinstance(data[c].dtype, pandas.CategoricalDtype)
+        or data[c].dtype == compactStringType
+    }
+    return data.assign(**expanded) if expanded else data
@@ -1,8 +1,20 @@
+import typing
+
 debugMode: bool = False
 
 tabulateFloatfmtPrecision: str = "g"
+# in debug mode only that many first and last rows of results
+# are printed, and all of them are dumped to files in that directory
+# (in the format of that extension), if it is set
+debugPreviewRows: int = 10
+debugDumpPath: typing.Optional[str] = None
+debugDumpFormat: str = ".csv"
+# how missing (masked) values are displayed in results table
+nullCellText: str = "--"
 
 windowMinWidth: int = 900
+# palette of the interface colors: dark or light
+uiPalette: str = "dark"
 
 noEnumerationColumn: bool = False
 
@@ -12,3 +24,97 @@ noEnumerationColumn: bool = False
 # - https://github.com/ocornut/imgui/issues/2957#issuecomment-758136035
 # - https://github.com/ocornut/imgui/pull/4876
 dpgColumnsMax: int = 64
+
+# background jobs (queries and such)
+jobsWorkersMax: int = 4
+# how often a running job may post its progress to the UI, in seconds
+jobsProgressInterval: float = 0.1
+# how much time the render loop may spend on calls from jobs, in seconds
+uiCallsTimeBudget: float = 0.01
+
+# connections kept open to the same host
+servicesConnectionsMax: int = 10
+# how long fetched services metadata is used before fetching it again,
+# in seconds
+servicesMetadataTTL: typing.Dict[str, float] = {
+    "capabilities": 24 * 60 * 60,
+    "availability": 5 * 60,
+    "tables": 60 * 60
+}
+
+# size of chunks for reading query results from the network, in bytes
+downloadChunkSize: int = 64 * 1024
+# results are parsed and passed on in chunks of that many rows,
+# which also limits how much memory parsing takes
+resultsChunkRows: int = 10000
+# the first chunk is smaller, so results table could show up sooner
+resultsFirstChunkRows: int = 100
+
+# results are exported to files in chunks of that many rows
+exportChunkRows: int = 50000
+
+# partitioned queries: how many partitions are executed at once,
+# how many times a failed partition is retried and how long to wait
+# before the first retry (doubling for every next one), in seconds
+partitionConcurrency: int = 4
+partitionRetries: int = 2
+partitionRetryDelay: float = 2.0
+
+# fetching results by pages (when service truncates them at MAXREC):
+# default limit of how many rows to fetch in total
+pagingRowsMax: int = 1000000
+
+# name of the column with service name in union of results
+# from several services
+multiServiceSourceColumn: str = "service"
+
+# results are kept in compact column types: integers and floats
+# of the smallest size that holds their values, strings in Arrow arrays
+# or as categoricals, if there are no more than that ratio of distinct
+# values among them
+resultsCompactTypes: bool = True
+resultsCategoriesRatioMax: float = 0.2
+
+# results that take more than that many bytes of memory are spilled
+# to disk, into memory-mapped files of about that size in a temporary
+# directory (in the system one, unless it is set); 0 disables spilling
+resultsSpillThreshold: int = 2 * 1024 * 1024 * 1024
+resultsSpillFileSize: int = 256 * 1024 * 1024
+resultsSpillPath: typing.Optional[str] = None
+# results of all the tabs together may take that many bytes of memory,
+# after that the tabs that weren't looked at for the longest time
+# are spilled to disk; 0 disables that
+resultsTabsMemoryMax: int = 4 * 1024 * 1024 * 1024
+
+# stats (timings of phases) of that many last queries are kept
+queryStatsHistoryMax: int = 100
+
+# results table is paged, only this many rows are created as widgets
+resultsTableRowsVisible: int = 50
+# approximate height of a results table row, in pixels
+resultsTableRowHeight: int = 30
+# for how long a copied cell shows that it was copied, in seconds
+cellCopiedFeedbackTime: float = 1.0
+
+# polling of async (UWS) jobs phase, in seconds
+asyncPollIntervalMin: float = 1.0
+asyncPollIntervalMax: float = 30.0
+asyncPollIntervalFactor: float = 1.5
+# delete jobs on the service once their results are downloaded
+asyncDeleteFinishedJobs: bool = True
+
+# results of queries are cached on disk, so executing the same query
+# against the same service again doesn't need to wait for the service
+resultsCacheEnabled: bool = True
+# least recently used results are evicted when the cache grows larger
+# than that, in bytes
+resultsCacheSizeMax: int = 512 * 1024 * 1024
+# cached results older than that are not used, in seconds
+resultsCacheAgeMax: float = 7 * 24 * 60 * 60
+
+# Simbad, in which IDs of objects are looked up: identifiers are resolved
+# by that many in one query, and resolved ones are cached on disk
+# for that long, in seconds
+simbadServiceURL: str = "https://simbad.cds.unistra.fr/simbad/sim-tap"
+simbadBatchMax: int = 200
+simbadCacheAgeMax: float = 30 * 24 * 60 * 60
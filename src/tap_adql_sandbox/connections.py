@@ -0,0 +1,51 @@
+"""
+HTTP connections, which opening (looking up the host and connecting)
+is measured as the `connect` phase of the query that opens them, so
+that phase is only there when a new connection was opened and not
+when a pooled one was reused. Connections through proxies aren't
+measured.
+"""
+
+# 3rd-party dependencies
+#
+import requests
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+#
+# standard libraries
+#
+import socket
+import typing
+#
+# own stuff
+#
+from .stats import measureConnecting
+
+
+class MeasuredHTTPConnection(HTTPConnection):
+    def _new_conn(self) -> socket.socket:
+        with measureConnecting():
+            return super()._new_conn()
+
+
+class MeasuredHTTPSConnection(HTTPSConnection):
+    def _new_conn(self) -> socket.socket:
+        with measureConnecting():
+            return super()._new_conn()
+
+
+class MeasuredHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = MeasuredHTTPConnection
+
+
+class MeasuredHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = MeasuredHTTPSConnection
+
+
+class MeasuredHTTPAdapter(requests.adapters.HTTPAdapter):
+    def init_poolmanager(self, *args: typing.Any, **kwargs: typing.Any):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": MeasuredHTTPConnectionPool,
+            "https": MeasuredHTTPSConnectionPool
+        }
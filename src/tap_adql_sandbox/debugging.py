@@ -0,0 +1,103 @@
+# standard libraries
+#
+from datetime import datetime
+import pathlib
+import logging
+import typing
+#
+# own stuff
+#
+from . import config
+from .export import exportResults
+from .formatting import tabulateResults
+from .jobs import Job
+from .query import formatBytes
+from .results import ResultBuffer
+
+
+def previewResults(
+    buffer: ResultBuffer,
+    timings: typing.Optional[typing.Dict[str, float]] = None
+) -> str:
+    """
+    Summary of the results (their shape, column types, memory and
+    timings) and a table with only `config.debugPreviewRows` first
+    and last rows, so it takes the same time regardless of how many rows
+    there are. Rows are taken as slices, nothing is converted
+    as a whole.
+    """
+    rowsCount: int = buffer.rowsCount
+    previewRows: int = config.debugPreviewRows
+    usage = buffer.memoryUsage()
+    memory: str = formatBytes(sum(u[2] for u in usage))
+    if buffer.isSpilled:
+        memory += f" (and {formatBytes(buffer.spilledSize)} on disk)"
+    lines: typing.List[str] = [
+        f"Rows: {rowsCount}, columns: {buffer.columnsCount}, memory: {memory}"
+    ]
+    if timings:
+        lines.append(
+            "Timings: {}".format(
+                ", ".join(f"{k}: {v:.3f} s" for k, v in timings.items())
+            )
+        )
+    lines.append(
+        "Types: {}".format(
+            ", ".join(f"{c} ({t})" for c, t, _ in usage)
+        )
+    )
+    if rowsCount <= previewRows * 2:
+        lines.append(tabulateResults(buffer.slice(0, rowsCount)))
+    else:
+        lines.append(tabulateResults(buffer.slice(0, previewRows)))
+        lines.append(f"... {rowsCount - previewRows * 2} more rows ...")
+        lines.append(
+            tabulateResults(buffer.slice(rowsCount - previewRows, rowsCount))
+        )
+    return "\n".join(lines)
+
+
+def dumpResults(
+    job: Job,
+    buffer: ResultBuffer,
+    name: str
+) -> typing.Optional[pathlib.Path]:
+    """
+    Exports all the results to a file in `config.debugDumpPath`
+    directory, if it is set.
+    """
+    if not config.debugDumpPath:
+        return None
+    dumpPath = pathlib.Path(config.debugDumpPath)
+    dumpPath.mkdir(parents=True, exist_ok=True)
+    filePath = dumpPath / "{}-{}{}".format(
+        name,
+        datetime.now().strftime("%Y%m%d-%H%M%S-%f"),
+        config.debugDumpFormat
+    )
+    return exportResults(job, buffer, filePath)
+
+
+def printResults(
+    job: Job,
+    buffer: ResultBuffer,
+    name: str,
+    timings: typing.Optional[typing.Dict[str, float]] = None
+) -> None:
+    """
+    In debug mode prints a preview of the results to stdout,
+    and dumps all of them to a file, if that is enabled.
+    """
+    if not config.debugMode:
+        return
+    try:
+        # won't look nice with logging.debug(), so it's a print()
+        print(previewResults(buffer, timings))
+    except Exception as ex:
+        logging.warning(f"Couldn't print results. {ex}")
+    try:
+        dumpFile = dumpResults(job, buffer, name)
+        if dumpFile is not None:
+            logging.debug(f"Results are dumped to [{dumpFile}]")
+    except Exception as ex:
+        logging.warning(f"Couldn't dump results. {ex}")
@@ -0,0 +1,68 @@
+# standard libraries
+#
+import logging
+import typing
+#
+# own stuff
+#
+from . import config
+from . import cache
+from . import uws
+from .jobs import Job
+from .query import executeSyncQuery
+
+if typing.TYPE_CHECKING:
+    from .results import ResultBuffer
+
+
+def fetchResults(
+    job: Job,
+    serviceURL: str,
+    queryText: str,
+    buffer: "ResultBuffer",
+    asyncMode: bool = False,
+    jobURL: typing.Optional[str] = None,
+    useCache: bool = True
+) -> "ResultBuffer":
+    """
+    Executes the query (as a sync request or as an async job) and streams
+    the results into the buffer, saving them to cache afterwards. If the
+    same query has already been executed against the same service,
+    the results are taken from cache instead.
+    """
+    cachedResults = None
+    if useCache and config.resultsCacheEnabled:
+        with buffer.stats.measure("cache"):
+            cachedResults = cache.getCachedResults(serviceURL, queryText)
+    if cachedResults is not None:
+        data, cacheEntry = cachedResults
+        logging.debug(f"Results found in cache, rows: {len(data)}")
+        buffer.stats.fromCache = True
+        buffer.cachedTime = cacheEntry["created"]
+        buffer.overflow = cacheEntry.get("overflow", False)
+        buffer.append(data)
+        buffer.finish()
+        return buffer
+
+    if asyncMode:
+        uws.executeAsyncQuery(job, serviceURL, queryText, buffer, jobURL)
+    else:
+        executeSyncQuery(job, serviceURL, queryText, buffer)
+    if not config.resultsCacheEnabled:
+        return buffer
+    if buffer.isSpilled:
+        logging.debug("Results are spilled to disk, too large for cache")
+    elif buffer.memorySize > config.resultsCacheSizeMax:
+        # they would only be evicted right after being written
+        logging.debug("Results are larger than the whole cache")
+    else:
+        job.checkCancelled()
+        job.reportProgress("Saving results to cache")
+        with buffer.stats.measure("cache"):
+            cache.storeResults(
+                serviceURL,
+                queryText,
+                buffer.toDataFrame(),
+                buffer.overflow
+            )
+    return buffer
@@ -0,0 +1,643 @@
+from __future__ import annotations
+# 3rd-party dependencies
+#
+# Astropy, Arrow, NumPy and pandas are imported by the exporters that
+# need them, so the list of formats is available (to the command line
+# arguments parser) without waiting for all of them to be imported
+#
+# standard libraries
+#
+import pathlib
+import logging
+import typing
+#
+# own stuff
+#
+from . import config
+from .jobs import Job
+
+if typing.TYPE_CHECKING:
+    import numpy
+    import pandas
+    import pyarrow
+    from .results import ResultBuffer
+
+# file extension => format name, as shown in the save file dialog
+exportFormats: typing.Dict[str, str] = {
+    ".parquet": "Parquet",
+    ".feather": "Feather (Arrow IPC)",
+    ".arrow": "Arrow IPC",
+    ".fits": "FITS",
+    ".vot": "VOTable (BINARY2)",
+    ".h5": "HDF5",
+    ".csv": "CSV",
+    ".pkl": "pickle"
+}
+
+
+# kind and size of numbers => (FITS column format, type it is written
+# in and TZERO, which unsigned integers are offset by)
+fitsNumberFormats: typing.Dict[
+    str,
+    typing.Tuple[str, str, typing.Optional[int]]
+] = {
+    # FITS has no signed bytes
+    "i1": ("I", ">i2", None),
+    "u1": ("B", "u1", None),
+    "i2": ("I", ">i2", None),
+    "u2": ("I", ">i2", 1 << 15),
+    "i4": ("J", ">i4", None),
+    "u4": ("J", ">i4", 1 << 31),
+    "i8": ("K", ">i8", None),
+    "u8": ("K", ">i8", 1 << 63),
+    "f2": ("E", ">f4", None),
+    "f4": ("E", ">f4", None),
+    "f8": ("D", ">f8", None),
+    "c8": ("C", ">c8", None),
+    "c16": ("M", ">c16", None)
+}
+
+# kind and size of numbers => (VOTable datatype, type it is written in)
+votableNumberTypes: typing.Dict[str, typing.Tuple[str, str]] = {
+    # VOTable has no signed bytes, and unsigned are only bytes
+    "i1": ("short", ">i2"),
+    "u1": ("unsignedByte", "u1"),
+    "i2": ("short", ">i2"),
+    "u2": ("int", ">i4"),
+    "i4": ("int", ">i4"),
+    "u4": ("long", ">i8"),
+    "i8": ("long", ">i8"),
+    "u8": ("long", ">i8"),
+    "f2": ("float", ">f4"),
+    "f4": ("float", ">f4"),
+    "f8": ("double", ">f8"),
+    "c8": ("floatComplex", ">c8"),
+    "c16": ("doubleComplex", ">c16")
+}
+
+
+class FileColumn:
+    """
+    A column of results, as it is written into FITS and VOTable files.
+    Every value there takes the same number of bytes, so strings take
+    as many bytes as the longest one of all the results, which is found
+    out before writing anything (see `measureColumns()`).
+    """
+
+    def __init__(self, name: str, dtype: typing.Any):
+        import numpy
+        import pandas
+        from .compact import isNumeric, valuesType
+
+        self.name: str = name
+        self.kind: str = "string"
+        self.valuesType: numpy.dtype = numpy.dtype(object)
+        if pandas.api.types.is_bool_dtype(dtype):
+            self.kind = "boolean"
+        elif isNumeric(dtype) or pandas.api.types.is_complex_dtype(dtype):
+            self.kind = "number"
+            self.valuesType = valuesType(dtype)
+        self.hasNulls: bool = False
+        # the longest string in bytes of UTF-8 and in UTF-16 code units
+        self.maxBytes: int = 0
+        self.maxUnits: int = 0
+        self.isASCII: bool = True
+
+    @property
+    def numberKey(self) -> str:
+        """
+        Kind and size of numbers, such as `i4`, as in the tables
+        of formats.
+        """
+        return f"{self.valuesType.kind}{self.valuesType.itemsize}"
+
+    def measure(self, column: pandas.Series) -> None:
+        import pandas
+
+        nulls = column.isna()
+        self.hasNulls = self.hasNulls or bool(nulls.any())
+        if self.kind != "string":
+            return
+        values = (
+            column.cat.categories
+            if isinstance(column.dtype, pandas.CategoricalDtype)
+            else column[~nulls]
+        )
+        for text in map(toText, values.tolist()):
+            size: int = len(text.encode("utf-8"))
+            self.maxBytes = max(self.maxBytes, size)
+            if size == len(text):
+                self.maxUnits = max(self.maxUnits, size)
+            else:
+                self.isASCII = False
+                self.maxUnits = max(
+                    self.maxUnits,
+                    len(text.encode("utf-16-be")) // 2
+                )
+
+    def texts(self, column: pandas.Series) -> numpy.ndarray:
+        """
+        Values as strings (bytes decoded), with missing ones None.
+        """
+        values = column.to_numpy(dtype=object, na_value=None)
+        for i, v in enumerate(values):
+            if v is not None and not isinstance(v, str):
+                values[i] = toText(v)
+        return values
+
+    def encode(self, column: pandas.Series, encoding: str) -> numpy.ndarray:
+        """
+        Strings as bytes, with missing ones empty.
+        """
+        import numpy
+
+        return numpy.array(
+            [b"" if v is None else v.encode(encoding)
+             for v in self.texts(column)],
+            dtype=bytes
+        )
+
+    def flags(
+        self,
+        column: pandas.Series,
+        true: bytes,
+        false: bytes,
+        null: bytes
+    ) -> numpy.ndarray:
+        import numpy
+
+        values = numpy.where(
+            column.to_numpy(dtype=bool, na_value=False),
+            true,
+            false
+        )
+        values[column.isna().to_numpy()] = null
+        return values
+
+    def numbers(
+        self,
+        column: pandas.Series,
+        dtype: numpy.dtype
+    ) -> numpy.ndarray:
+        """
+        Values in the type they are written in, with missing ones zero
+        (or NaN).
+        """
+        import numpy
+
+        return column.to_numpy(
+            dtype=dtype.newbyteorder("="),
+            na_value=0 if dtype.kind in "iu" else numpy.nan
+        )
+
+
+def toText(value: typing.Any) -> str:
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return str(value)
+
+
+def measureColumns(job: Job, buffer: ResultBuffer) -> typing.List[FileColumn]:
+    """
+    Goes through all the results (chunk by chunk) to find the longest
+    strings and the columns with missing values, which FITS, VOTable
+    and HDF5 need to know before the first row is written.
+    """
+    from .compact import expandTypes
+
+    columns: typing.List[FileColumn] = [
+        FileColumn(str(c), dtype)
+        for c, dtype in expandTypes(buffer.slice(0, 0)).dtypes.items()
+    ]
+    rowsCount: int = buffer.rowsCount
+    for offset, chunk in buffer.iterateChunks():
+        job.checkCancelled()
+        job.reportProgress(
+            f"Checked {offset} of {rowsCount} rows",
+            offset / rowsCount if rowsCount else 0.0
+        )
+        for i, column in enumerate(columns):
+            column.measure(chunk.iloc[:, i])
+    return columns
+
+
+def iterateChunks(job: Job, buffer: ResultBuffer, asArrow: bool = False):
+    """
+    Yields results by `config.exportChunkRows` rows, which are slices
+    of the buffer and not copies, reporting the progress and checking
+    for the job being cancelled in between. Arrow slices of results
+    spilled to disk are taken right from the memory-mapped files,
+    with dictionaries (categoricals) expanded to plain values.
+    """
+    rowsCount: int = buffer.rowsCount
+    for start in range(0, max(rowsCount, 1), config.exportChunkRows):
+        job.checkCancelled()
+        job.reportProgress(
+            f"Exported {start} of {rowsCount} rows",
+            start / rowsCount if rowsCount else 0.0
+        )
+        stop: int = start + config.exportChunkRows
+        yield (
+            expandDictionaries(buffer.sliceArrow(start, stop))
+            if asArrow
+            else buffer.slice(start, stop)
+        )
+
+
+def expandDictionaries(table: pyarrow.Table) -> pyarrow.Table:
+    """
+    Dictionary columns are how strings are stored in memory and not
+    what the results are, so they aren't written into files as such,
+    and pandas metadata doesn't make them categoricals either.
+    """
+    import json
+    import pyarrow
+
+    names: typing.List[str] = [
+        f.name for f in table.schema
+        if pyarrow.types.is_dictionary(f.type)
+    ]
+    if not names:
+        return table
+    metadata: typing.Dict[bytes, bytes] = dict(table.schema.metadata or {})
+    if b"pandas" in metadata:
+        pandasMetadata = json.loads(metadata[b"pandas"])
+        for c in pandasMetadata["columns"]:
+            if c["field_name"] in names:
+                c.update(pandas_type="unicode", numpy_type="object")
+                c["metadata"] = None
+        metadata[b"pandas"] = json.dumps(pandasMetadata).encode("utf-8")
+    return table.cast(
+        pyarrow.schema(
+            [
+                pyarrow.field(f.name, f.type.value_type, f.nullable)
+                if f.name in names
+                else f
+                for f in table.schema
+            ],
+            metadata=metadata
+        )
+    )
+
+
+def exportParquet(
+    job: Job,
+    buffer: ResultBuffer,
+    filePath: pathlib.Path
+) -> None:
+    import pyarrow.parquet
+
+    writer: typing.Optional[pyarrow.parquet.ParquetWriter] = None
+    try:
+        for table in iterateChunks(job, buffer, asArrow=True):
+            if writer is None:
+                writer = pyarrow.parquet.ParquetWriter(filePath, table.schema)
+            elif not table.schema.equals(writer.schema):
+                table = table.cast(writer.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def exportArrow(
+    job: Job,
+    buffer: ResultBuffer,
+    filePath: pathlib.Path
+) -> None:
+    import pyarrow.ipc
+
+    writer: typing.Optional[pyarrow.ipc.RecordBatchFileWriter] = None
+    schema: typing.Optional[pyarrow.Schema] = None
+    try:
+        for table in iterateChunks(job, buffer, asArrow=True):
+            if writer is None:
+                schema = table.schema
+                writer = pyarrow.ipc.new_file(str(filePath), schema)
+            elif not table.schema.equals(schema):
+                table = table.cast(schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def exportHDF5(
+    job: Job,
+    buffer: ResultBuffer,
+    filePath: pathlib.Path
+) -> None:
+    try:
+        import tables  # noqa: F401
+    except ImportError:
+        raise ValueError(
+            " ".join((
+                "Exporting to HDF5 requires PyTables package,",
+                "which can be installed with: pip install tables"
+            ))
+        )
+    import numpy
+    import pandas
+
+    # PyTables knows neither nullable numbers nor strings that get longer
+    # in later chunks, so missing numbers become NaN, and strings columns
+    # are as wide as the longest string of all the results
+    columns: typing.List[FileColumn] = measureColumns(job, buffer)
+    stringColumns: typing.List[FileColumn] = []
+    nullableColumns: typing.List[FileColumn] = []
+    for c, dtype in zip(columns, buffer.slice(0, 0).dtypes):
+        if (
+            pandas.api.types.is_object_dtype(dtype)
+            or pandas.api.types.is_string_dtype(dtype)
+            or isinstance(dtype, pandas.CategoricalDtype)
+        ):
+            stringColumns.append(c)
+        elif pandas.api.types.is_extension_array_dtype(dtype):
+            nullableColumns.append(c)
+    for chunk in iterateChunks(job, buffer):
+        chunk.assign(
+            **{
+                c.name: pandas.Series(
+                    c.texts(chunk[c.name]),
+                    index=chunk.index,
+                    dtype=object
+                )
+                for c in stringColumns
+            },
+            **{
+                c.name: chunk[c.name].to_numpy(
+                    dtype=numpy.float64,
+                    na_value=numpy.nan
+                )
+                for c in nullableColumns
+            }
+        ).to_hdf(
+            filePath,
+            key="results",
+            mode="a",
+            format="table",
+            append=True,
+            index=False,
+            min_itemsize={c.name: max(c.maxBytes, 1) for c in stringColumns}
+        )
+
+
+def exportCSV(
+    job: Job,
+    buffer: ResultBuffer,
+    filePath: pathlib.Path
+) -> None:
+    with open(filePath, "w", encoding="utf-8", newline="") as f:
+        isFirstChunk: bool = True
+        for chunk in iterateChunks(job, buffer):
+            chunk.to_csv(f, header=isFirstChunk, index=False)
+            isFirstChunk = False
+
+
+def exportFITS(
+    job: Job,
+    buffer: ResultBuffer,
+    filePath: pathlib.Path
+) -> None:
+    """
+    Writes a binary table, which header (with the number of rows and
+    widths of columns) is known beforehand, so rows are written chunk
+    by chunk, without the whole table being put together in memory.
+    """
+    from astropy.io import fits
+    import numpy
+
+    columns: typing.List[FileColumn] = measureColumns(job, buffer)
+    header = fits.Header([
+        ("XTENSION", "BINTABLE"),
+        ("BITPIX", 8),
+        ("NAXIS", 2),
+        ("NAXIS1", 0),
+        ("NAXIS2", buffer.rowsCount),
+        ("PCOUNT", 0),
+        ("GCOUNT", 1),
+        ("TFIELDS", len(columns))
+    ])
+    # (type, TZERO, TNULL) of every column
+    formats: typing.List[
+        typing.Tuple[numpy.dtype, typing.Optional[int], typing.Optional[int]]
+    ] = []
+    for i, c in enumerate(columns, start=1):
+        zero: typing.Optional[int] = None
+        null: typing.Optional[int] = None
+        if c.kind == "boolean":
+            form, dtype = "L", numpy.dtype("S1")
+        elif c.kind == "number":
+            if c.numberKey not in fitsNumberFormats:
+                raise ValueError(
+                    f"Column [{c.name}] of {c.valuesType} can't be in FITS"
+                )
+            form, typeName, zero = fitsNumberFormats[c.numberKey]
+            dtype = numpy.dtype(typeName)
+            if c.hasNulls and dtype.kind in "iu":
+                # for offset unsigned integers that is the largest value
+                null = int(
+                    numpy.iinfo(dtype).max
+                    if zero is not None or dtype.kind == "u"
+                    else numpy.iinfo(dtype).min
+                )
+        else:
+            size: int = max(c.maxBytes, 1)
+            form, dtype = f"{size}A", numpy.dtype(f"S{size}")
+        header[f"TTYPE{i}"] = c.name
+        header[f"TFORM{i}"] = form
+        if zero is not None:
+            header[f"TZERO{i}"] = zero
+        if null is not None:
+            header[f"TNULL{i}"] = null
+        formats.append((dtype, zero, null))
+    recordType = numpy.dtype(
+        [(f"c{i}", dtype) for i, (dtype, _, _) in enumerate(formats)]
+    )
+    header["NAXIS1"] = recordType.itemsize
+
+    with fits.StreamingHDU(str(filePath), header) as stream:
+        for chunk in iterateChunks(job, buffer):
+            if not len(chunk):
+                continue
+            records = numpy.zeros(len(chunk), dtype=recordType)
+            for i, (c, (dtype, zero, null)) in enumerate(
+                zip(columns, formats)
+            ):
+                column = chunk.iloc[:, i]
+                if c.kind == "boolean":
+                    values = c.flags(column, b"T", b"F", b"\0")
+                elif c.kind == "number":
+                    values = c.numbers(
+                        column,
+                        numpy.dtype(f"u{dtype.itemsize}")
+                        if zero is not None
+                        else dtype
+                    )
+                    if zero is not None:
+                        # offset by TZERO, which is the sign bit
+                        values = (values ^ values.dtype.type(zero)).view(
+                            dtype.newbyteorder("=")
+                        )
+                    if null is not None:
+                        values[column.isna().to_numpy()] = null
+                else:
+                    values = c.encode(column, "utf-8")
+                records[f"c{i}"] = values
+            stream.write(records.view(numpy.uint8))
+
+
+def exportVOTable(
+    job: Job,
+    buffer: ResultBuffer,
+    filePath: pathlib.Path
+) -> None:
+    """
+    Writes BINARY2 serialization, where every row is null flags followed
+    by the values, so rows are encoded to base64 chunk by chunk, without
+    the whole table being put together in memory.
+    """
+    import base64
+    import numpy
+    from xml.sax.saxutils import quoteattr
+
+    columns: typing.List[FileColumn] = measureColumns(job, buffer)
+    fields: typing.List[str] = []
+    types: typing.List[numpy.dtype] = []
+    for c in columns:
+        arraysize: str = ""
+        if c.kind == "boolean":
+            datatype, typeName = "boolean", "S1"
+        elif c.kind == "number":
+            if c.numberKey not in votableNumberTypes:
+                raise ValueError(
+                    f"Column [{c.name}] of {c.valuesType} can't be in VOTable"
+                )
+            datatype, typeName = votableNumberTypes[c.numberKey]
+        elif c.isASCII:
+            arraysize = str(max(c.maxBytes, 1))
+            datatype, typeName = "char", f"S{arraysize}"
+        else:
+            arraysize = str(max(c.maxUnits, 1))
+            datatype, typeName = "unicodeChar", f"S{int(arraysize) * 2}"
+        fields.append(
+            "".join((
+                f"<FIELD name={quoteattr(c.name)} datatype=\"{datatype}\"",
+                f" arraysize=\"{arraysize}\"" if arraysize else "",
+                "/>"
+            ))
+        )
+        types.append(numpy.dtype(typeName))
+    nullFlagsSize: int = (len(columns) + 7) // 8
+    recordType = numpy.dtype(
+        [("nulls", numpy.uint8, (nullFlagsSize,))]
+        + [(f"c{i}", dtype) for i, dtype in enumerate(types)]
+    )
+
+    with open(filePath, "wb") as f:
+        f.write(
+            "\n".join((
+                "<?xml version=\"1.0\" encoding=\"UTF-8\"?>",
+                " ".join((
+                    "<VOTABLE version=\"1.4\"",
+                    "xmlns=\"http://www.ivoa.net/xml/VOTable/v1.3\">"
+                )),
+                "<RESOURCE type=\"results\">",
+                "<INFO name=\"QUERY_STATUS\" value=\"OK\"/>",
+                "<TABLE>",
+                *fields,
+                "<DATA>",
+                "<BINARY2>",
+                "<STREAM encoding=\"base64\">",
+                ""
+            )).encode("utf-8")
+        )
+        # base64 lines are 76 characters of 57 bytes, whatever doesn't
+        # make a whole line yet goes with the next chunk
+        pending: bytes = b""
+        for chunk in iterateChunks(job, buffer):
+            records = numpy.zeros(len(chunk), dtype=recordType)
+            nulls = numpy.zeros((len(chunk), len(columns)), dtype=bool)
+            for i, c in enumerate(columns):
+                column = chunk.iloc[:, i]
+                nulls[:, i] = column.isna().to_numpy()
+                if c.kind == "boolean":
+                    values = c.flags(column, b"T", b"F", b"?")
+                elif c.kind == "number":
+                    values = c.numbers(column, types[i])
+                else:
+                    values = c.encode(
+                        column,
+                        "ascii" if c.isASCII else "utf-16-be"
+                    )
+                records[f"c{i}"] = values
+            records["nulls"] = numpy.packbits(nulls, axis=1)
+            pending += records.tobytes()
+            wholeLines: int = len(pending) - len(pending) % 57
+            f.write(base64.encodebytes(pending[:wholeLines]))
+            pending = pending[wholeLines:]
+        f.write(base64.encodebytes(pending))
+        footer: typing.List[str] = [
+            "</STREAM>",
+            "</BINARY2>",
+            "</DATA>",
+            "</TABLE>"
+        ]
+        if buffer.overflow:
+            footer.append("<INFO name=\"QUERY_STATUS\" value=\"OVERFLOW\"/>")
+        footer.extend(("</RESOURCE>", "</VOTABLE>", ""))
+        f.write("\n".join(footer).encode("utf-8"))
+
+
+def exportPickle(
+    job: Job,
+    buffer: ResultBuffer,
+    filePath: pathlib.Path
+) -> None:
+    job.reportProgress("Writing pickle", 0.0)
+    buffer.toDataFrame().to_pickle(filePath)
+
+
+exporters: typing.Dict[
+    str,
+    typing.Callable[[Job, ResultBuffer, pathlib.Path], None]
+] = {
+    ".parquet": exportParquet,
+    ".feather": exportArrow,
+    ".arrow": exportArrow,
+    ".fits": exportFITS,
+    ".vot": exportVOTable,
+    ".h5": exportHDF5,
+    ".csv": exportCSV,
+    ".pkl": exportPickle
+}
+
+
+def exportResults(
+    job: Job,
+    buffer: ResultBuffer,
+    filePath: pathlib.Path
+) -> pathlib.Path:
+    """
+    Writes results to the file in the format corresponding to the file
+    extension. Partially written file is deleted, if exporting fails
+    or gets cancelled.
+    """
+    exporter = exporters.get(filePath.suffix.lower())
+    if exporter is None:
+        raise ValueError(
+            f"Unknown format of the [{filePath.name}] file, supported are: "
+            + ", ".join(exportFormats)
+        )
+    # some writers would append to the existing file
+    filePath.unlink(missing_ok=True)
+    try:
+        exporter(job, buffer, filePath)
+    except Exception:
+        try:
+            filePath.unlink(missing_ok=True)
+        except OSError as ex:
+            logging.warning(f"Couldn't delete [{filePath}]: {ex}")
+        raise
+    job.reportProgress(f"Exported {buffer.rowsCount} rows", 1.0)
+    return filePath
@@ -0,0 +1,128 @@
+# 3rd-party dependencies
+#
+import numpy
+import pandas
+#
+# standard libraries
+#
+import typing
+#
+# own stuff
+#
+from . import config
+
+
+def getFloatFormatter(floatfmt: str) -> typing.Callable[[float], str]:
+    """
+    Returns a function formatting floats the same way tabulate does with
+    its `floatfmt`. The printf-style operator is noticeably faster than
+    `format()`, so it is used whenever the format allows that.
+    """
+    try:
+        (f"%{floatfmt}") % 1.0
+        return f"%{floatfmt}".__mod__
+    except (TypeError, ValueError):
+        return lambda value: format(value, floatfmt)
+
+
+def formatObject(
+    value: typing.Any,
+    floatFormatter: typing.Callable[[float], str]
+) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    if isinstance(value, float):
+        return floatFormatter(value)
+    return str(value)
+
+
+def formatColumn(
+    column: pandas.Series,
+    floatFormatter: typing.Optional[typing.Callable[[float], str]] = None
+) -> numpy.ndarray:
+    """
+    Converts the whole column to display strings in one pass. Values
+    are taken from the underlying NumPy array, so nothing gets boxed
+    into pandas objects, and missing values become `config.nullCellText`.
+    """
+    if floatFormatter is None:
+        floatFormatter = getFloatFormatter(config.tabulateFloatfmtPrecision)
+
+    cellsCount: int = len(column)
+    formatted: numpy.ndarray = numpy.empty(cellsCount, dtype=object)
+    if cellsCount == 0:
+        return formatted
+
+    dtype = column.dtype
+    # nullable (masked) dtypes keep their values in a NumPy array too
+    numpyDtype = getattr(dtype, "numpy_dtype", dtype)
+    missing: numpy.ndarray = column.isna().to_numpy()
+
+    if isinstance(dtype, pandas.CategoricalDtype):
+        # every distinct value is formatted only once, missing values
+        # have -1 code, which takes the last item
+        categories: numpy.ndarray = numpy.append(
+            formatColumn(pandas.Series(dtype.categories), floatFormatter),
+            config.nullCellText
+        )
+        formatted[:] = categories[column.cat.codes.to_numpy()]
+    elif pandas.api.types.is_bool_dtype(dtype):
+        values = column.to_numpy(dtype=bool, na_value=False)
+        formatted[:] = numpy.where(values, "True", "False")
+    elif pandas.api.types.is_integer_dtype(dtype):
+        values = column.to_numpy(dtype=numpyDtype, na_value=0)
+        formatted[:] = list(map(str, values.tolist()))
+    elif pandas.api.types.is_float_dtype(dtype):
+        values = column.to_numpy(dtype=numpyDtype, na_value=numpy.nan)
+        formatted[:] = list(map(floatFormatter, values.tolist()))
+    elif (
+        pandas.api.types.is_string_dtype(dtype)
+        and
+        not pandas.api.types.is_object_dtype(dtype)
+    ):
+        # dedicated string dtype already holds nothing but strings
+        formatted[:] = column.to_numpy(
+            dtype=object,
+            na_value=config.nullCellText
+        )
+    else:
+        # byte strings, arrays, mixed objects and whatnot
+        formatted[:] = [
+            formatObject(v, floatFormatter)
+            for v in column.to_numpy(dtype=object)
+        ]
+
+    if missing.any():
+        formatted[missing] = config.nullCellText
+    return formatted
+
+
+def formatRows(data: pandas.DataFrame) -> typing.List[numpy.ndarray]:
+    """
+    Formats every column of the data, producing a list of columns
+    of display strings, which is what the results table consumes.
+    """
+    floatFormatter = getFloatFormatter(config.tabulateFloatfmtPrecision)
+    return [
+        formatColumn(data.iloc[:, c], floatFormatter)
+        for c in range(data.shape[1])
+    ]
+
+
+def tabulateResults(data: pandas.DataFrame) -> str:
+    """
+    Results as a text table, for printing them to stdout. Tabulate is
+    only needed for that (in debug mode or in headless one), so it isn't
+    imported until then.
+    """
+    from tabulate import tabulate
+
+    return tabulate(
+        data,
+        headers="keys",
+        showindex=False,
+        tablefmt="psql",
+        floatfmt=config.tabulateFloatfmtPrecision
+    )
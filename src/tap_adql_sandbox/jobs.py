@@ -0,0 +1,244 @@
+# standard libraries
+#
+from concurrent.futures import ThreadPoolExecutor, Future
+import heapq
+import itertools
+import queue
+import threading
+import time
+import sys
+import traceback
+import logging
+import typing
+#
+# own stuff
+#
+from . import config
+
+
+class JobCancelledError(Exception):
+    pass
+
+
+class Job:
+    """
+    A unit of background work. The worker function receives the job
+    and is expected to call `checkCancelled()` between stages and to
+    report its progress with `reportProgress()`.
+    """
+
+    def __init__(self, name: str):
+        self.name: str = name
+        self.stage: str = ""
+        # fraction from 0 to 1, or negative if it is unknown
+        self.progress: float = -1.0
+        self.future: typing.Optional[Future] = None
+        self.onProgress: typing.Optional[typing.Callable] = None
+
+        self._cancelledEvent: threading.Event = threading.Event()
+        self._cancelCallbacks: typing.List[typing.Callable] = []
+        self._lock: threading.Lock = threading.Lock()
+        self._lastProgressReport: float = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelledEvent.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._cancelledEvent.is_set():
+                return
+            self._cancelledEvent.set()
+            callbacks = list(self._cancelCallbacks)
+            self._cancelCallbacks.clear()
+        logging.debug(f"Cancelling job [{self.name}]")
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as ex:
+                logging.debug(f"Cancel callback of [{self.name}] failed: {ex}")
+
+    def onCancel(self, callback: typing.Callable) -> None:
+        """
+        Registers a callback (such as closing an HTTP response) to be
+        called from whichever thread cancels the job. If the job is
+        already cancelled, the callback is called right away.
+        """
+        with self._lock:
+            if not self._cancelledEvent.is_set():
+                self._cancelCallbacks.append(callback)
+                return
+        callback()
+
+    def checkCancelled(self) -> None:
+        if self._cancelledEvent.is_set():
+            raise JobCancelledError(f"Job [{self.name}] was cancelled")
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Sleeps in the worker thread, but wakes up as soon
+        as the job gets cancelled.
+        """
+        if self._cancelledEvent.wait(seconds):
+            self.checkCancelled()
+
+    def reportProgress(self, stage: str, progress: float = -1.0) -> None:
+        stageChanged: bool = stage != self.stage
+        self.stage = stage
+        self.progress = progress
+        if self.onProgress is None:
+            return
+        # don't flood the UI thread with updates
+        now = time.monotonic()
+        if (
+            not stageChanged
+            and
+            now - self._lastProgressReport < config.jobsProgressInterval
+        ):
+            return
+        self._lastProgressReport = now
+        callOnUiThread(self.onProgress, self)
+
+
+executor: ThreadPoolExecutor = ThreadPoolExecutor(
+    max_workers=config.jobsWorkersMax,
+    thread_name_prefix="job"
+)
+activeJobs: typing.Set[Job] = set()
+activeJobsLock: threading.Lock = threading.Lock()
+# set when jobs are cancelled because the application is closing,
+# so they could tell that from being cancelled by user
+shuttingDown: bool = False
+
+uiCalls: "queue.SimpleQueue[typing.Tuple[typing.Callable, tuple]]" = (
+    queue.SimpleQueue()
+)
+
+
+def callOnUiThread(func: typing.Callable, *args) -> None:
+    """
+    Schedules a call to be made from the render loop, which is the only
+    place where it is safe to show/hide items and change their values
+    in relation to each other.
+    """
+    uiCalls.put((func, args))
+
+
+# calls scheduled for later, as a heap of (when, ID, function, arguments),
+# IDs keep the calls scheduled for the same time in order
+laterCalls: typing.List[
+    typing.Tuple[float, int, typing.Callable, tuple]
+] = []
+laterCallsLock: threading.Lock = threading.Lock()
+laterCallsIDs: typing.Iterator[int] = itertools.count(1)
+
+
+def callLater(delay: float, func: typing.Callable, *args) -> int:
+    """
+    Schedules a call to be made from the render loop once `delay` seconds
+    pass. Nothing waits for it in the meantime, unlike sleeping in a UI
+    callback, which holds up all the other callbacks. Returns the ID,
+    with which the call can be cancelled.
+    """
+    with laterCallsLock:
+        callID: int = next(laterCallsIDs)
+        heapq.heappush(
+            laterCalls,
+            (time.monotonic() + delay, callID, func, args)
+        )
+    return callID
+
+
+def cancelLaterCall(callID: int) -> None:
+    with laterCallsLock:
+        for i, call in enumerate(laterCalls):
+            if call[1] == callID:
+                laterCalls[i] = laterCalls[-1]
+                laterCalls.pop()
+                heapq.heapify(laterCalls)
+                return
+
+
+def processUiCalls() -> None:
+    """
+    Should be called once per frame from the render loop.
+    """
+    now = time.monotonic()
+    with laterCallsLock:
+        while laterCalls and laterCalls[0][0] <= now:
+            _, _, func, args = heapq.heappop(laterCalls)
+            uiCalls.put((func, args))
+    deadline = now + config.uiCallsTimeBudget
+    while time.monotonic() < deadline:
+        try:
+            func, args = uiCalls.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            func(*args)
+        except Exception as ex:
+            logging.error(f"UI call [{func.__name__}] failed: {ex}")
+            if config.debugMode:
+                traceback.print_exc(file=sys.stderr)
+
+
+def submitJob(
+    job: Job,
+    func: typing.Callable,
+    *args,
+    onDone: typing.Optional[typing.Callable] = None,
+    onError: typing.Optional[typing.Callable] = None,
+    onCancelled: typing.Optional[typing.Callable] = None
+) -> Job:
+    """
+    Runs `func(job, *args)` in the worker pool. Depending on the outcome,
+    one of `onDone(job, result)`, `onError(job, exception)` or
+    `onCancelled(job)` is called on the UI thread. Cancelled jobs are
+    reported immediately, without waiting for the worker to notice.
+    """
+    if onCancelled is not None:
+        job.onCancel(lambda: callOnUiThread(onCancelled, job))
+
+    def worker():
+        try:
+            result = func(job, *args)
+        except Exception as ex:
+            if job.cancelled or isinstance(ex, JobCancelledError):
+                logging.debug(f"Job [{job.name}] stopped after cancelling")
+                return
+            logging.debug(f"Job [{job.name}] failed: {ex}")
+            if config.debugMode:
+                traceback.print_exc(file=sys.stderr)
+            if onError is not None:
+                callOnUiThread(onError, job, ex)
+            return
+        finally:
+            with activeJobsLock:
+                activeJobs.discard(job)
+        if job.cancelled:
+            logging.debug(f"Discarding results of cancelled job [{job.name}]")
+            return
+        if onDone is not None:
+            callOnUiThread(onDone, job, result)
+
+    with activeJobsLock:
+        activeJobs.add(job)
+    job.future = executor.submit(worker)
+    return job
+
+
+def cancelAllJobs() -> None:
+    with activeJobsLock:
+        jobs = list(activeJobs)
+    for job in jobs:
+        job.cancel()
+
+
+def shutdownJobs() -> None:
+    global shuttingDown
+
+    shuttingDown = True
+    cancelAllJobs()
+    # workers might still be blocked in network calls,
+    # there is no point in waiting for them on exit
+    executor.shutdown(wait=False)
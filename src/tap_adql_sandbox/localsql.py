@@ -0,0 +1,406 @@
+"""
+SQL queries over results that are already here (the ones in the active
+results tab and the cached ones), executed locally, without asking
+the service again. They are executed with DuckDB, if it is installed,
+which scans results right from their Arrow/Parquet data, otherwise
+with SQLite from the standard library, into which the results have
+to be copied first.
+"""
+
+from __future__ import annotations
+# 3rd-party dependencies
+#
+import dearpygui.dearpygui as dpg
+#
+# standard libraries
+#
+import pathlib
+import re
+import sqlite3
+import time
+import logging
+import typing
+#
+# own stuff
+#
+from . import cache
+from . import config
+from . import jobs
+from .adql import findTableName
+from .table import ResultsTableView
+
+if typing.TYPE_CHECKING:
+    import pandas
+    from .results import ResultBuffer
+
+# results in the active tab are available in SQL under that name
+resultsTableName: str = "results"
+
+# results in memory or a file with cached results
+TableSource = typing.Union["ResultBuffer", pathlib.Path]
+
+# what to call to get the results in the active tab and to show results
+# in the main window, set by localSQLWindow()
+getLastResults: typing.Callable[
+    [],
+    typing.Optional[ResultBuffer]
+] = lambda: None
+showResults: typing.Callable[[ResultBuffer, str], bool] = lambda b, s: False
+
+localQueryJob: typing.Optional[jobs.Job] = None
+localResults: typing.Optional[ResultBuffer] = None
+resultsView: typing.Optional[ResultsTableView] = None
+
+
+def getCachedTableNames(
+    entries: typing.Dict[str, typing.Dict[str, typing.Any]]
+) -> typing.Dict[str, str]:
+    """
+    Names of the cached results in SQL by their keys: `cached_` and
+    the table they were queried from (such as `cached_gaia_source`),
+    numbered in the order they were cached, if there are several
+    of the same table.
+    """
+    names: typing.Dict[str, str] = {}
+    for key, entry in sorted(
+        entries.items(),
+        key=lambda e: e[1]["created"]
+    ):
+        tableName: str = re.sub(
+            r"[^0-9a-z_]",
+            "_",
+            (findTableName(entry["query"]) or "results").lower()
+        )
+        name: str = f"cached_{tableName}"
+        number: int = 2
+        while name in names.values():
+            name = f"cached_{tableName}_{number}"
+            number += 1
+        names[key] = name
+    return names
+
+
+def getTables() -> typing.Dict[str, TableSource]:
+    """
+    Results that can be queried, by their names in SQL.
+    """
+    tables: typing.Dict[str, TableSource] = {}
+    lastResults = getLastResults()
+    if lastResults is not None and not lastResults.isEmpty:
+        tables[resultsTableName] = lastResults
+    if config.resultsCacheEnabled:
+        entries = cache.listCachedResults()
+        for key, name in getCachedTableNames(entries).items():
+            tables[name] = cache.getResultsFile(entries[key])
+    return tables
+
+
+def findReferencedTables(
+    queryText: str,
+    tables: typing.Dict[str, TableSource]
+) -> typing.Dict[str, TableSource]:
+    """
+    Only the tables that are mentioned in the query need to be loaded.
+    """
+    words: typing.Set[str] = {
+        w.lower() for w in re.findall(r"\w+", queryText)
+    }
+    return {n: s for n, s in tables.items() if n.lower() in words}
+
+
+def executeWithDuckDB(
+    job: jobs.Job,
+    duckdb: typing.Any,
+    queryText: str,
+    tables: typing.Dict[str, TableSource]
+) -> pandas.DataFrame:
+    from .results import ResultBuffer
+
+    connection = duckdb.connect(":memory:")
+    job.onCancel(connection.interrupt)
+    try:
+        for name, source in tables.items():
+            if isinstance(source, ResultBuffer):
+                # Arrow slices of the chunks are put together without
+                # copying, and DuckDB scans them as they are
+                connection.register(
+                    name,
+                    source.sliceArrow(0, source.rowsCount)
+                )
+            elif source.suffix == ".parquet":
+                connection.read_parquet(str(source)).create_view(name)
+            else:
+                connection.register(name, cache.readResults(source.name))
+        job.checkCancelled()
+        return connection.execute(queryText).fetch_arrow_table().to_pandas()
+    finally:
+        connection.close()
+
+
+def executeWithSQLite(
+    job: jobs.Job,
+    queryText: str,
+    tables: typing.Dict[str, TableSource]
+) -> pandas.DataFrame:
+    import pandas
+    from .compact import expandTypes
+    from .results import ResultBuffer
+
+    connection = sqlite3.connect(":memory:", check_same_thread=False)
+    job.onCancel(connection.interrupt)
+    try:
+        for name, source in tables.items():
+            chunks: typing.Iterable[pandas.DataFrame] = (
+                (data for _, data in source.iterateChunks())
+                if isinstance(source, ResultBuffer)
+                else (cache.readResults(source.name),)
+            )
+            for data in chunks:
+                job.checkCancelled()
+                # SQLite doesn't know about categoricals and Arrow strings
+                expandTypes(data).to_sql(
+                    name,
+                    connection,
+                    index=False,
+                    if_exists="append"
+                )
+        job.checkCancelled()
+        return pandas.read_sql_query(queryText, connection)
+    finally:
+        connection.close()
+
+
+def runLocalQuery(
+    job: jobs.Job,
+    queryText: str,
+    tables: typing.Dict[str, TableSource]
+) -> typing.Tuple[ResultBuffer, str, float]:
+    """
+    Runs in a worker thread. Returns the results, the name of the engine
+    and how long it took.
+    """
+    from .results import ResultBuffer
+
+    startTime: float = time.perf_counter()
+    tables = findReferencedTables(queryText, tables)
+    try:
+        import duckdb
+    except ImportError:
+        duckdb = None
+    engine: str = "SQLite" if duckdb is None else "DuckDB"
+    job.reportProgress(f"Executing with {engine}")
+    data = (
+        executeWithSQLite(job, queryText, tables)
+        if duckdb is None
+        else executeWithDuckDB(job, duckdb, queryText, tables)
+    )
+    job.checkCancelled()
+    return (
+        ResultBuffer.fromDataFrame(data),
+        engine,
+        time.perf_counter() - startTime
+    )
+
+
+def executeLocalQuery() -> None:
+    global localQueryJob
+
+    cancelLocalQuery()
+    dpg.hide_item("errorMessageLocalSQL")
+    dpg.hide_item("btn_localSQLShow")
+    queryText: str = dpg.get_value("localSQLQuery").strip()
+    if not queryText:
+        showLocalQueryError("Cannot execute an empty query.")
+        return
+
+    localQueryJob = jobs.Job("local query")
+    localQueryJob.onProgress = localQueryProgressed
+    dpg.set_value("localSQLStatus", "")
+    dpg.show_item("btn_localSQLCancel")
+    jobs.submitJob(
+        localQueryJob,
+        runLocalQuery,
+        queryText,
+        getTables(),
+        onDone=localQueryDone,
+        onError=localQueryFailed,
+        onCancelled=localQueryCancelled
+    )
+
+
+def cancelLocalQuery() -> None:
+    if localQueryJob is not None:
+        localQueryJob.cancel()
+
+
+def localQueryProgressed(job: jobs.Job) -> None:
+    if job is localQueryJob:
+        dpg.set_value("localSQLStatus", job.stage)
+
+
+def localQueryDone(
+    job: jobs.Job,
+    result: typing.Tuple[ResultBuffer, str, float]
+) -> None:
+    global localResults
+
+    if job is not localQueryJob or resultsView is None:
+        return
+    localResults, engine, elapsed = result
+    dpg.hide_item("btn_localSQLCancel")
+    dpg.set_value(
+        "localSQLStatus",
+        f"{localResults.rowsCount} rows in {elapsed:.3f} s ({engine})"
+    )
+    try:
+        resultsView.setData(
+            localResults,
+            dpg.get_item_width("window_localSQL")
+        )
+    except Exception as ex:
+        logging.error(f"Couldn't generate the results table. {ex}")
+        resultsView.clear()
+    dpg.show_item("btn_localSQLShow")
+
+
+def localQueryFailed(job: jobs.Job, ex: Exception) -> None:
+    if job is not localQueryJob:
+        return
+    logging.debug(f"Local query failed: {ex}")
+    showLocalQueryError(str(ex))
+
+
+def localQueryCancelled(job: jobs.Job) -> None:
+    if job is localQueryJob:
+        showLocalQueryError("Query was cancelled.")
+
+
+def showLocalQueryError(errorMessage: str) -> None:
+    dpg.hide_item("btn_localSQLCancel")
+    dpg.set_value("localSQLStatus", "")
+    dpg.set_value("errorMessageLocalSQL", errorMessage)
+    dpg.show_item("errorMessageLocalSQL")
+
+
+def showInMainWindow() -> None:
+    if localResults is not None:
+        showResults(localResults, "(from local SQL query)")
+
+
+def refreshTablesList() -> None:
+    dpg.delete_item("tableLocalSQLTables", children_only=True, slot=1)
+    lastResults = getLastResults()
+    rows: typing.List[typing.Tuple[str, str, str, str]] = []
+    if lastResults is not None and not lastResults.isEmpty:
+        rows.append(
+            (resultsTableName, str(lastResults.rowsCount), "", "active tab")
+        )
+    if config.resultsCacheEnabled:
+        entries = cache.listCachedResults()
+        names: typing.Dict[str, str] = getCachedTableNames(entries)
+        for key, entry in sorted(
+            entries.items(),
+            key=lambda e: e[1]["accessed"],
+            reverse=True
+        ):
+            rows.append(
+                (
+                    names[key],
+                    str(entry["rows"]),
+                    entry["serviceURL"],
+                    " ".join(entry["query"].split())
+                )
+            )
+    for row in rows:
+        with dpg.table_row(parent="tableLocalSQLTables"):
+            for value in row:
+                dpg.add_text(default_value=value)
+
+
+def showLocalSQLWindow() -> None:
+    refreshTablesList()
+    dpg.show_item("window_localSQL")
+
+
+def localSQLWindow(
+    resultsGetter: typing.Callable[[], typing.Optional[ResultBuffer]],
+    resultsShower: typing.Callable[[ResultBuffer, str], bool]
+) -> None:
+    global getLastResults, showResults, resultsView
+
+    getLastResults = resultsGetter
+    showResults = resultsShower
+
+    with dpg.window(
+        tag="window_localSQL",
+        label="Local SQL",
+        min_size=(750, 550),
+        show=False,
+        on_close=cancelLocalQuery
+    ):
+        dpg.add_text(
+            default_value=" ".join((
+                "SQL query over the results in the active tab",
+                f"([{resultsTableName}] table) and the cached results",
+                "(named after the tables they were queried from),",
+                "executed locally, without sending anything to the service.",
+                "It is executed with DuckDB, if it is installed",
+                "(pip install duckdb), otherwise with SQLite."
+            )),
+            wrap=700
+        )
+        dpg.add_spacer()
+        with dpg.collapsing_header(label="Tables", default_open=True):
+            with dpg.table(
+                tag="tableLocalSQLTables",
+                header_row=True,
+                resizable=True,
+                scrollY=True,
+                height=150,
+                borders_outerH=True,
+                borders_innerV=True,
+                borders_innerH=True,
+                borders_outerV=True,
+                policy=dpg.mvTable_SizingStretchProp
+            ):
+                dpg.add_table_column(label="Name")
+                dpg.add_table_column(label="Rows")
+                dpg.add_table_column(label="Service")
+                dpg.add_table_column(label="Query")
+            dpg.add_button(label="Refresh", callback=refreshTablesList)
+        dpg.add_input_text(
+            tag="localSQLQuery",
+            default_value=f"SELECT COUNT(*) FROM {resultsTableName}",
+            multiline=True,
+            tab_input=True,
+            width=-1,
+            height=120
+        )
+        with dpg.group(horizontal=True):
+            dpg.add_button(label="Execute", callback=executeLocalQuery)
+            dpg.add_button(
+                tag="btn_localSQLCancel",
+                label="Cancel",
+                callback=cancelLocalQuery,
+                show=False
+            )
+            dpg.add_button(
+                tag="btn_localSQLShow",
+                label="Show in main window",
+                callback=showInMainWindow,
+                show=False
+            )
+            dpg.add_text(tag="localSQLStatus", default_value="")
+        dpg.add_text(
+            tag="errorMessageLocalSQL",
+            default_value="",
+            wrap=700,
+            show=False
+        )
+        dpg.add_spacer()
+        dpg.add_group(tag="localSQLResultsGroup")
+
+    resultsView = ResultsTableView(
+        "localSQLResultsGroup",
+        "localSQLResultsTable"
+    )
@@ -0,0 +1,361 @@
+from __future__ import annotations
+# 3rd-party dependencies
+#
+import dearpygui.dearpygui as dpg
+#
+# standard libraries
+#
+import time
+import logging
+import typing
+#
+# own stuff
+#
+from . import config
+from . import jobs
+from . import stats
+from .examples import tapServices
+from .execution import fetchResults
+
+if typing.TYPE_CHECKING:
+    from .results import ResultBuffer
+
+# service key => job/results of the last execution
+serviceJobs: typing.Dict[str, jobs.Job] = {}
+serviceResults: typing.Dict[str, ResultBuffer] = {}
+# services that have either returned results, failed or were cancelled
+endedServices: typing.Set[str] = set()
+serviceNames: typing.Dict[str, str] = {}
+# what to call to get the query text and to show results
+# in the main window, set by multiServiceWindow()
+getQueryText: typing.Callable[[], str] = lambda: ""
+showResults: typing.Callable[..., bool] = lambda b, s, k=None: False
+# results from all the services are shown in the same tab
+resultsTabKey: str = "multi-service"
+# union of the results of the services, and which results are in it
+unionBuffer: typing.Optional[ResultBuffer] = None
+unionParts: typing.List[ResultBuffer] = []
+
+
+def runServiceQuery(
+    job: jobs.Job,
+    serviceURL: str,
+    queryText: str,
+    useCache: bool
+) -> typing.Tuple[ResultBuffer, float]:
+    from .results import ResultBuffer
+
+    startTime: float = time.perf_counter()
+    buffer = ResultBuffer()
+    buffer.stats = stats.QueryStats(serviceURL, queryText)
+    fetchResults(
+        job,
+        serviceURL,
+        queryText,
+        buffer,
+        useCache=useCache
+    )
+    return buffer, time.perf_counter() - startTime
+
+
+def unionResults(results: typing.Dict[str, ResultBuffer]) -> ResultBuffer:
+    """
+    Puts results from different services one after another, adding
+    a column with the name of the service. Columns that only some
+    of the services have are filled with missing values for the others.
+    Results that are in the union already aren't copied again, the ones
+    of the services that have returned since are appended to it, unless
+    they have new columns, then the union is put together anew.
+    """
+    global unionBuffer
+    from .results import ResultBuffer
+
+    sourceColumn: str = config.multiServiceSourceColumn
+    columns: typing.List[str] = [sourceColumn]
+    for buffer in results.values():
+        columns.extend(c for c in buffer.columns if c not in columns)
+    if (
+        unionBuffer is None
+        or unionBuffer.columns != columns
+        or any(
+            not any(part is b for b in results.values())
+            for part in unionParts
+        )
+    ):
+        unionBuffer = ResultBuffer()
+        unionParts.clear()
+    for key, buffer in results.items():
+        if any(part is buffer for part in unionParts):
+            continue
+        for offset, chunk in buffer.iterateChunks():
+            # empty chunk is only needed for getting the columns
+            if not len(chunk) and not unionBuffer.isEmpty:
+                continue
+            unionBuffer.append(
+                chunk.assign(
+                    **{sourceColumn: serviceNames[key]}
+                ).reindex(columns=columns)
+            )
+        unionBuffer.overflow = unionBuffer.overflow or buffer.overflow
+        unionParts.append(buffer)
+    unionBuffer.finish(concatenate=False)
+    return unionBuffer
+
+
+def setStatus(
+    key: str,
+    status: str,
+    rows: str = "",
+    elapsed: str = ""
+) -> None:
+    for column, value in (
+        ("Status", status),
+        ("Rows", rows),
+        ("Time", elapsed)
+    ):
+        tag = f"multiService{column}-{key}"
+        if dpg.does_item_exist(tag):
+            dpg.set_value(tag, value)
+
+
+def serviceQueryProgressed(job: jobs.Job) -> None:
+    for key, j in serviceJobs.items():
+        if j is job:
+            setStatus(key, job.stage)
+
+
+def serviceQueryDone(
+    job: jobs.Job,
+    result: typing.Tuple[ResultBuffer, float]
+) -> None:
+    key = next((k for k, j in serviceJobs.items() if j is job), None)
+    if key is None:
+        return
+    buffer, elapsed = result
+    serviceResults[key] = buffer
+    endedServices.add(key)
+    buffer.stats.finish(
+        "from cache" if buffer.stats.fromCache else "done",
+        buffer.rowsCount
+    )
+    stats.addToHistory(buffer.stats)
+    setStatus(
+        key,
+        "from cache" if buffer.cachedTime is not None else "done",
+        str(buffer.rowsCount),
+        f"{elapsed:.2f} s"
+    )
+    dpg.show_item(f"multiServiceShow-{key}")
+    logging.debug(
+        f"[{serviceNames[key]}] returned {buffer.rowsCount} rows "
+        f"in {elapsed:.2f} s"
+    )
+
+    # partial results, as they keep coming
+    if dpg.get_value("multiServiceUnion"):
+        showUnion()
+    elif len(serviceResults) == 1:
+        showServiceResults(None, None, key)
+    updateSummary()
+
+
+def serviceQueryFailed(job: jobs.Job, ex: Exception) -> None:
+    for key, j in serviceJobs.items():
+        if j is job:
+            logging.error(f"[{serviceNames[key]}] query failed: {ex}")
+            setStatus(key, f"failed: {ex}")
+            endedServices.add(key)
+    updateSummary()
+
+
+def serviceQueryCancelled(job: jobs.Job) -> None:
+    for key, j in serviceJobs.items():
+        if j is job:
+            setStatus(key, "cancelled")
+            endedServices.add(key)
+    updateSummary()
+
+
+def updateSummary() -> None:
+    running: int = len(serviceJobs) - len(endedServices)
+    dpg.set_value(
+        "multiServiceSummary",
+        (
+            f"{len(serviceResults)} of {len(serviceJobs)} services done, "
+            f"{running} still running"
+            if running
+            else f"{len(serviceResults)} of {len(serviceJobs)} services done"
+        )
+    )
+    dpg.configure_item("btn_multiServiceCancel", show=bool(running))
+
+
+def showUnion() -> None:
+    if not serviceResults:
+        return
+    showResults(
+        unionResults(serviceResults),
+        f"(union of {len(serviceResults)} of {len(serviceJobs)} services)",
+        resultsTabKey
+    )
+
+
+def unionToggled(sender, app_data: bool) -> None:
+    if app_data:
+        showUnion()
+    elif serviceResults:
+        showServiceResults(None, None, next(iter(serviceResults)))
+
+
+def showServiceResults(sender, app_data, user_data: str) -> None:
+    showResults(
+        serviceResults[user_data],
+        f"(from {serviceNames[user_data]})",
+        resultsTabKey
+    )
+
+
+def getSelectedServices() -> typing.Dict[str, str]:
+    selected: typing.Dict[str, str] = {}
+    for key, service in tapServices.items():
+        if dpg.get_value(f"multiServiceSelected-{key}"):
+            selected[key] = service["url"]
+    return selected
+
+
+def executeOnServices() -> None:
+    global unionBuffer
+
+    cancelServiceQueries()
+
+    queryText: str = getQueryText()
+    selectedServices = getSelectedServices()
+    dpg.hide_item("errorMessageMultiService")
+    if not queryText or not selectedServices:
+        dpg.set_value(
+            "errorMessageMultiService",
+            (
+                "Cannot execute an empty query."
+                if not queryText
+                else "No services selected."
+            )
+        )
+        dpg.show_item("errorMessageMultiService")
+        return
+
+    serviceJobs.clear()
+    serviceResults.clear()
+    endedServices.clear()
+    unionBuffer = None
+    unionParts.clear()
+    dpg.delete_item("tableMultiService", children_only=True, slot=1)
+    dpg.show_item("tableMultiService")
+    for key, serviceURL in selectedServices.items():
+        with dpg.table_row(parent="tableMultiService"):
+            dpg.add_text(default_value=serviceNames[key])
+            dpg.add_text(tag=f"multiServiceStatus-{key}", default_value="")
+            dpg.add_text(tag=f"multiServiceRows-{key}", default_value="")
+            dpg.add_text(tag=f"multiServiceTime-{key}", default_value="")
+            dpg.add_button(
+                tag=f"multiServiceShow-{key}",
+                label="Show",
+                user_data=key,
+                callback=showServiceResults,
+                show=False
+            )
+        job = jobs.Job(f"query {key}")
+        job.onProgress = serviceQueryProgressed
+        serviceJobs[key] = job
+        setStatus(key, "queued")
+        jobs.submitJob(
+            job,
+            runServiceQuery,
+            serviceURL,
+            queryText,
+            not dpg.get_value("bypassCache"),
+            onDone=serviceQueryDone,
+            onError=serviceQueryFailed,
+            onCancelled=serviceQueryCancelled
+        )
+    updateSummary()
+
+
+def cancelServiceQueries() -> None:
+    for job in serviceJobs.values():
+        job.cancel()
+
+
+def showMultiServiceWindow() -> None:
+    dpg.show_item("window_multiService")
+
+
+def multiServiceWindow(
+    queryTextGetter: typing.Callable[[], str],
+    resultsShower: typing.Callable[..., bool]
+) -> None:
+    global getQueryText, showResults
+
+    getQueryText = queryTextGetter
+    showResults = resultsShower
+
+    with dpg.window(
+        tag="window_multiService",
+        label="Execute on several services",
+        min_size=(750, 450),
+        show=False,
+        on_close=cancelServiceQueries
+    ):
+        dpg.add_text(
+            default_value=" ".join((
+                "Query from the main window is executed on all",
+                "the selected services at once."
+            ))
+        )
+        dpg.add_spacer()
+        for key, service in tapServices.items():
+            serviceNames[key] = service["name"]
+            dpg.add_checkbox(
+                tag=f"multiServiceSelected-{key}",
+                label=f"{service['name']} ({service['url']})"
+            )
+        dpg.add_spacer()
+        dpg.add_checkbox(
+            tag="multiServiceUnion",
+            label=" ".join((
+                "show union of results with",
+                f"[{config.multiServiceSourceColumn}] column"
+            )),
+            callback=unionToggled
+        )
+        with dpg.group(horizontal=True):
+            dpg.add_button(label="Execute", callback=executeOnServices)
+            dpg.add_button(
+                tag="btn_multiServiceCancel",
+                label="Cancel",
+                callback=cancelServiceQueries,
+                show=False
+            )
+            dpg.add_text(tag="multiServiceSummary", default_value="")
+        dpg.add_text(
+            tag="errorMessageMultiService",
+            default_value="",
+            wrap=700,
+            show=False
+        )
+        dpg.add_spacer()
+        with dpg.table(
+            tag="tableMultiService",
+            header_row=True,
+            resizable=True,
+            borders_outerH=True,
+            borders_innerV=True,
+            borders_innerH=True,
+            borders_outerV=True,
+            policy=dpg.mvTable_SizingStretchProp,
+            show=False
+        ):
+            dpg.add_table_column(label="Service")
+            dpg.add_table_column(label="Status")
+            dpg.add_table_column(label="Rows")
+            dpg.add_table_column(label="Time")
+            dpg.add_table_column(label="Results")
@@ -0,0 +1,186 @@
+# 3rd-party dependencies
+#
+import numpy
+import pandas
+#
+# standard libraries
+#
+import weakref
+import typing
+#
+# own stuff
+#
+from .compact import widestTypes
+from .results import ResultBuffer
+
+# buffer => column => (rows count, sorted row numbers, missing values count);
+# indexes are computed once per column and then reused, as long
+# as no rows are appended to the buffer
+sortIndexes: "weakref.WeakKeyDictionary[ResultBuffer, typing.Dict]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def getColumn(buffer: ResultBuffer, column: str) -> pandas.Series:
+    pieces = [data[column] for _, data in buffer.iterateChunks([column])]
+    if not pieces:
+        return pandas.Series(dtype=object)
+    return pandas.concat(pieces, ignore_index=True)
+
+
+def sortValues(values: pandas.Series) -> numpy.ndarray:
+    """
+    Row numbers in the order of ascending values, missing values last.
+    """
+    try:
+        return values.sort_values(
+            kind="stable",
+            na_position="last"
+        ).index.to_numpy()
+    except TypeError:
+        # objects of different types, which can't be compared
+        return values.astype(str).where(values.notna()).sort_values(
+            kind="stable",
+            na_position="last"
+        ).index.to_numpy()
+
+
+def sortIndex(
+    buffer: ResultBuffer,
+    column: str,
+    ascending: bool = True
+) -> numpy.ndarray:
+    """
+    Row numbers of the results sorted by the column. Sorting the other
+    way around reverses the same index, keeping missing values last.
+    """
+    columns = sortIndexes.setdefault(buffer, {})
+    cached = columns.get(column)
+    if cached is None or cached[0] != buffer.rowsCount:
+        values = getColumn(buffer, column)
+        cached = (
+            buffer.rowsCount,
+            sortValues(values),
+            int(values.isna().sum())
+        )
+        columns[column] = cached
+    _, index, missingCount = cached
+    if ascending:
+        return index
+    presentCount: int = len(index) - missingCount
+    return numpy.concatenate(
+        (index[:presentCount][::-1], index[presentCount:])
+    )
+
+
+def filterRows(buffer: ResultBuffer, expression: str) -> numpy.ndarray:
+    """
+    Row numbers of the results, for which the expression is true. It is
+    evaluated by `pandas.DataFrame.eval()` chunk by chunk, so it can use
+    column names (in `backticks`, if they aren't valid identifiers),
+    comparisons and such: `ra > 10 and phot_g_mean_mag < 15`. Numeric
+    columns are widened to 64 bits first, so `mag * 100 > 50000` works
+    the same for a `short` column as for a `long` one.
+    """
+    rows: typing.List[numpy.ndarray] = []
+    for offset, data in buffer.iterateChunks():
+        matches = widestTypes(data).eval(expression)
+        if (
+            not isinstance(matches, pandas.Series)
+            or
+            not pandas.api.types.is_bool_dtype(matches.dtype)
+        ):
+            raise ValueError(
+                "Filter has to be a condition, such as: ra > 10"
+            )
+        rows.append(
+            numpy.flatnonzero(matches.fillna(False).to_numpy(dtype=bool))
+            + offset
+        )
+    return (
+        numpy.concatenate(rows) if rows else numpy.array([], dtype=int)
+    )
+
+
+def containsText(values: pandas.Series, text: str) -> numpy.ndarray:
+    """
+    Which of the values contain the text, ignoring the case. Categories
+    are searched only once, not for every value.
+    """
+    if isinstance(values.dtype, pandas.CategoricalDtype):
+        matches = containsText(
+            pandas.Series(values.cat.categories),
+            text
+        )
+        codes = values.cat.codes.to_numpy()
+        return numpy.where(codes >= 0, matches[codes], False)
+    if values.dtype == object:
+        firstValue = values.dropna().head(1)
+        if len(firstValue) and isinstance(firstValue.iloc[0], bytes):
+            values = values.str.decode("utf-8", errors="replace")
+    return values.str.contains(
+        text,
+        case=False,
+        regex=False,
+        na=False
+    ).to_numpy(dtype=bool)
+
+
+def isTextColumn(values: pandas.Series) -> bool:
+    return (
+        isinstance(values.dtype, pandas.CategoricalDtype)
+        or
+        pandas.api.types.is_string_dtype(values.dtype)
+    )
+
+
+def searchRows(buffer: ResultBuffer, text: str) -> numpy.ndarray:
+    """
+    Row numbers of the results, which text columns contain the text.
+    """
+    rows: typing.List[numpy.ndarray] = []
+    for offset, data in buffer.iterateChunks():
+        matches = numpy.zeros(len(data), dtype=bool)
+        for column in data.columns:
+            if not isTextColumn(data[column]):
+                continue
+            try:
+                matches |= containsText(data[column], text)
+            except (AttributeError, TypeError):
+                # objects that only look like strings from their type
+                continue
+        rows.append(numpy.flatnonzero(matches) + offset)
+    return (
+        numpy.concatenate(rows) if rows else numpy.array([], dtype=int)
+    )
+
+
+def orderRows(
+    buffer: ResultBuffer,
+    sortColumn: typing.Optional[str] = None,
+    ascending: bool = True,
+    filterExpression: str = "",
+    searchText: str = ""
+) -> typing.Optional[numpy.ndarray]:
+    """
+    Row numbers of the results to show, or `None` for all of them
+    in their original order.
+    """
+    rows: typing.Optional[numpy.ndarray] = None
+    if filterExpression:
+        rows = filterRows(buffer, filterExpression)
+    if searchText:
+        foundRows = searchRows(buffer, searchText)
+        rows = (
+            foundRows
+            if rows is None
+            else numpy.intersect1d(rows, foundRows, assume_unique=True)
+        )
+    if sortColumn is not None:
+        index = sortIndex(buffer, sortColumn, ascending)
+        if rows is not None:
+            isShown = numpy.zeros(buffer.rowsCount, dtype=bool)
+            isShown[rows] = True
+            index = index[isShown[index]]
+        rows = index
+    return rows
@@ -0,0 +1,77 @@
+# standard libraries
+#
+import logging
+#
+# own stuff
+#
+from .adql import keysetPageQuery, orderByKey
+from .execution import fetchResults
+from .jobs import Job
+from .results import ResultBuffer
+
+
+def fetchPagedResults(
+    job: Job,
+    serviceURL: str,
+    queryText: str,
+    keyColumn: str,
+    buffer: ResultBuffer,
+    rowsLimit: int,
+    asyncMode: bool = False,
+    useCache: bool = True
+) -> ResultBuffer:
+    """
+    Executes the query sorted by the key column, and while the service
+    keeps truncating the results (MAXREC overflow), executes it again
+    for the rows after the last key value of the previous page, appending
+    every page to the buffer, until all the rows are there or there are
+    `rowsLimit` of them. Key values have to be unique, otherwise rows
+    with the same key value on the border of pages would be lost.
+    """
+    orderedQueryText: str = orderByKey(queryText, keyColumn)
+    pageQueryText: str = orderedQueryText
+    pageNumber: int = 1
+    while True:
+        job.reportProgress(
+            f"Fetching page {pageNumber}, {buffer.rowsCount} rows so far"
+        )
+        page = fetchResults(
+            job,
+            serviceURL,
+            pageQueryText,
+            ResultBuffer(),
+            asyncMode,
+            useCache=useCache
+        )
+        if keyColumn not in page.columns:
+            raise ValueError(
+                " ".join((
+                    f"Key column [{keyColumn}] has to be selected",
+                    "for fetching results by pages"
+                ))
+            )
+        buffer.stats.merge(page.stats)
+        pageRows: int = page.rowsCount
+        rowsLeft: int = rowsLimit - buffer.rowsCount
+        if pageRows > rowsLeft:
+            page = ResultBuffer.fromDataFrame(page.slice(0, rowsLeft))
+            page.overflow = True
+        buffer.extend(page)
+        buffer.overflow = page.overflow
+        logging.debug(
+            f"Page {pageNumber}: {pageRows} rows, overflow: {page.overflow}"
+        )
+
+        if not page.overflow or pageRows == 0:
+            break
+        if buffer.rowsCount >= rowsLimit:
+            logging.warning(
+                f"Stopped fetching pages at the limit of {rowsLimit} rows"
+            )
+            break
+        lastValue = page.slice(pageRows - 1, pageRows)[keyColumn].iloc[0]
+        pageQueryText = keysetPageQuery(orderedQueryText, keyColumn, lastValue)
+        pageNumber += 1
+
+    buffer.finish(concatenate=False)
+    return buffer
@@ -0,0 +1,142 @@
+# standard libraries
+#
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
+import typing
+#
+# own stuff
+#
+from . import config
+from .execution import fetchResults
+from .jobs import Job, JobCancelledError
+from .results import ResultBuffer
+
+
+def fetchPartition(
+    job: Job,
+    serviceURL: str,
+    queryText: str,
+    partitionNumber: int,
+    asyncMode: bool,
+    useCache: bool
+) -> ResultBuffer:
+    """
+    Executes one of the sub-queries in its own job (which gets cancelled
+    together with the main one), retrying it if it fails.
+    """
+    import pyvo
+
+    # the same for all the attempts, so it is registered only once
+    partitionJob = Job(f"{job.name} partition {partitionNumber}")
+    job.onCancel(partitionJob.cancel)
+    attempt: int = 0
+    while True:
+        try:
+            return fetchResults(
+                partitionJob,
+                serviceURL,
+                queryText,
+                ResultBuffer(),
+                asyncMode,
+                useCache=useCache
+            )
+        except (JobCancelledError, pyvo.dal.DALQueryError):
+            # there is no point in retrying a query that the service
+            # has rejected
+            raise
+        except Exception as ex:
+            job.checkCancelled()
+            if attempt >= config.partitionRetries:
+                raise
+            attempt += 1
+            logging.warning(
+                " ".join((
+                    f"Partition {partitionNumber} failed, retrying",
+                    f"({attempt} of {config.partitionRetries}): {ex}"
+                ))
+            )
+            job.sleep(config.partitionRetryDelay * 2 ** (attempt - 1))
+
+
+def fetchPartitionedResults(
+    job: Job,
+    serviceURL: str,
+    queries: typing.List[str],
+    buffer: ResultBuffer,
+    asyncMode: bool = False,
+    useCache: bool = True
+) -> ResultBuffer:
+    """
+    Executes the sub-queries of a partitioned query, several at once,
+    and appends their results to the buffer in the order of partitions,
+    so rows come in the same order as they would from the whole query.
+    Results of partitions are not copied, the buffer just takes over
+    their chunks.
+    """
+    partitionsCount: int = len(queries)
+    finished: typing.Dict[int, ResultBuffer] = {}
+    nextToMerge: int = 0
+    doneCount: int = 0
+    job.reportProgress(f"Executing {partitionsCount} partitions", 0.0)
+    # cancelling it stops all the partitions, but not the main job
+    partitionsJob = Job(f"{job.name} partitions")
+    job.onCancel(partitionsJob.cancel)
+
+    executor = ThreadPoolExecutor(
+        max_workers=max(config.partitionConcurrency, 1),
+        thread_name_prefix="partition"
+    )
+    try:
+        futures = {
+            executor.submit(
+                fetchPartition,
+                partitionsJob,
+                serviceURL,
+                query,
+                i + 1,
+                asyncMode,
+                useCache
+            ): i
+            for i, query in enumerate(queries)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            doneCount += 1
+            try:
+                finished[i] = future.result()
+                buffer.stats.merge(finished[i].stats)
+            except JobCancelledError:
+                raise
+            except Exception as ex:
+                job.checkCancelled()
+                raise RuntimeError(
+                    f"Partition {i + 1} of {partitionsCount} failed: {ex}"
+                ) from ex
+            # partitions that completed earlier have to wait
+            # for the previous ones
+            while nextToMerge in finished:
+                buffer.extend(finished.pop(nextToMerge))
+                nextToMerge += 1
+            job.reportProgress(
+                " ".join((
+                    f"{doneCount} of {partitionsCount} partitions done,",
+                    f"{buffer.rowsCount} rows"
+                )),
+                doneCount / partitionsCount
+            )
+    except BaseException:
+        # the rest of partitions are not needed anymore
+        partitionsJob.cancel()
+        raise
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if buffer.overflow:
+        logging.warning(
+            " ".join((
+                "Results of some partitions were truncated by service,",
+                "more partitions are needed"
+            ))
+        )
+    buffer.finish(concatenate=False)
+    return buffer
@@ -0,0 +1,107 @@
+"""
+Timings of the application start (`--profile-startup`), so it is visible
+when something makes it slower: how long it took to get to every phase
+of the start and which modules took the longest to import.
+"""
+
+# standard libraries
+#
+import builtins
+import importlib.util
+import sys
+import time
+import logging
+import typing
+
+
+class StartupProfile:
+    """
+    Phases are counted from the moment the profile is created. Imports
+    are measured by wrapping `builtins.__import__` until the report
+    is made, and the time of every module includes the modules
+    it imports, the same as the cumulative time of `python -X importtime`.
+    """
+
+    def __init__(self, importsReported: int = 10):
+        self.startTime: float = time.perf_counter()
+        self.importsReported: int = importsReported
+        self.phases: typing.List[typing.Tuple[str, float]] = []
+        # module name => seconds it took to import it
+        self.imports: typing.Dict[str, float] = {}
+        self._originalImport: typing.Callable = builtins.__import__
+        builtins.__import__ = self._timedImport
+
+    def phase(self, name: str) -> None:
+        self.phases.append((name, time.perf_counter() - self.startTime))
+
+    def report(self) -> None:
+        """
+        Logs the phases and the slowest imports. Imports made after that
+        are not measured anymore.
+        """
+        builtins.__import__ = self._originalImport
+        lines: typing.List[str] = ["Startup profile:"]
+        for name, seconds in self.phases:
+            lines.append(f"{seconds:8.3f} s | {name}")
+        lines.append("Slowest imports (including what they import):")
+        # submodules of other packages would only repeat their packages
+        imports = [
+            (name, seconds) for name, seconds in self.imports.items()
+            if "." not in name or name.startswith(f"{__package__}.")
+        ]
+        for name, seconds in sorted(
+            imports,
+            key=lambda i: i[1],
+            reverse=True
+        )[:self.importsReported]:
+            lines.append(f"{seconds:8.3f} s | {name}")
+        logging.info("\n".join(lines))
+
+    def _timedImport(
+        self,
+        name: str,
+        globals=None,
+        locals=None,
+        fromlist=(),
+        level: int = 0
+    ):
+        moduleName: str = name
+        if level:
+            moduleName = importlib.util.resolve_name(
+                f"{'.' * level}{name}",
+                (globals or {}).get("__package__")
+            )
+        # `from . import something` imports the submodules from the list
+        notImported: typing.List[str] = [
+            m for m in (
+                moduleName,
+                *(f"{moduleName}.{f}" for f in (fromlist or ()))
+            )
+            if m not in sys.modules
+        ]
+        if not notImported:
+            return self._originalImport(
+                name,
+                globals,
+                locals,
+                fromlist,
+                level
+            )
+        startTime: float = time.perf_counter()
+        try:
+            return self._originalImport(
+                name,
+                globals,
+                locals,
+                fromlist,
+                level
+            )
+        finally:
+            # names in the list that are not modules stay not imported
+            for m in notImported:
+                if m in sys.modules:
+                    self.imports.setdefault(
+                        m,
+                        time.perf_counter() - startTime
+                    )
+                    break
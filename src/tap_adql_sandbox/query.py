@@ -0,0 +1,170 @@
+from __future__ import annotations
+# 3rd-party dependencies
+#
+# PyVO, requests and everything that results are parsed with are
+# imported only when a query is executed, see `services.py`
+#
+# standard libraries
+#
+from xml.parsers import expat
+import time
+import logging
+import typing
+#
+# own stuff
+#
+from . import config
+from .jobs import Job
+from .services import getService
+
+if typing.TYPE_CHECKING:
+    import requests
+    from .results import ResultBuffer
+
+
+def formatBytes(bytesCount: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(bytesCount) < 1024 or unit == "GB":
+            break
+        bytesCount /= 1024
+    return (
+        f"{bytesCount:.0f} {unit}"
+        if unit == "B"
+        else f"{bytesCount:.1f} {unit}"
+    )
+
+
+def executeSyncQuery(
+    job: Job,
+    serviceURL: str,
+    queryText: str,
+    buffer: ResultBuffer
+) -> ResultBuffer:
+    """
+    The same as `pyvo.dal.TAPService(serviceURL).search(queryText)`,
+    but results are parsed as they arrive and appended to the buffer
+    in chunks. Reading the response can be abandoned by cancelling
+    the job.
+    """
+    import pyvo
+    import requests
+
+    job.reportProgress("Sending query")
+    service = getService(serviceURL)
+    query = service.create_query(queryText)
+
+    # waiting for the response headers is not interruptible,
+    # but the response gets closed as soon as the job is cancelled
+    try:
+        with buffer.stats.measure("response"):
+            response = query.submit()
+    except requests.RequestException as ex:
+        raise pyvo.dal.DALServiceError.from_except(ex, query.queryurl)
+    streamResults(job, response, query.queryurl, buffer)
+    return buffer
+
+
+def streamResults(
+    job: Job,
+    response: requests.Response,
+    url: str,
+    buffer: ResultBuffer
+) -> None:
+    """
+    Reads the (streamed) response in chunks, feeding them to VOTable
+    parser and appending parsed rows to the buffer, checking for the job
+    being cancelled in between. Cancelling closes the response, which
+    abandons the HTTP request.
+    """
+    import pyvo
+    import requests
+    from .votable import VOTableStreamParser
+
+    job.onCancel(response.close)
+    job.checkCancelled()
+
+    parser = VOTableStreamParser(
+        config.resultsChunkRows,
+        config.resultsFirstChunkRows
+    )
+    stats = buffer.stats
+    bytesCount: int = 0
+    try:
+        if not response.ok:
+            raiseResponseError(response, url)
+        downloadStart: float = time.perf_counter()
+        for data in response.iter_content(
+            chunk_size=config.downloadChunkSize
+        ):
+            stats.add("download", time.perf_counter() - downloadStart)
+            job.checkCancelled()
+            bytesCount += len(data)
+            with stats.measure("parse"):
+                chunks = parser.feed(data)
+            # appending is measured by the buffer itself
+            for chunk in chunks:
+                buffer.append(chunk)
+            job.reportProgress(
+                " ".join((
+                    f"Receiving results: {parser.rowsCount} rows,",
+                    formatBytes(bytesCount)
+                ))
+            )
+            downloadStart = time.perf_counter()
+        job.checkCancelled()
+        job.reportProgress("Parsing results")
+        with stats.measure("parse"):
+            lastChunks = parser.close()
+    except requests.RequestException as ex:
+        job.checkCancelled()
+        raise pyvo.dal.DALServiceError.from_except(ex, url)
+    except expat.ExpatError as ex:
+        job.checkCancelled()
+        raise pyvo.dal.DALFormatError(ex, url)
+    finally:
+        response.close()
+        stats.bytesCount += bytesCount
+    logging.debug(
+        " ".join((
+            f"Received {formatBytes(bytesCount)} of results,",
+            f"{parser.rowsCount} rows"
+        ))
+    )
+
+    if parser.queryStatus == "ERROR":
+        raise pyvo.dal.DALQueryError(
+            parser.errorMessage or "Service reported an error",
+            url=url
+        )
+    for chunk in lastChunks:
+        buffer.append(chunk)
+    if buffer.isEmpty:
+        raise pyvo.dal.DALFormatError(
+            reason="Response doesn't contain a results table",
+            url=url
+        )
+    buffer.overflow = parser.overflow
+    job.reportProgress("Finishing results")
+    buffer.finish()
+
+
+def raiseResponseError(response: requests.Response, url: str) -> None:
+    """
+    Services tend to report query errors with 400 status code, but then
+    put the actual error message into the VOTable in the response body.
+    """
+    import pyvo
+    from .votable import VOTableStreamParser
+
+    errorMessage: str = ""
+    if "xml" in response.headers.get("content-type", ""):
+        try:
+            parser = VOTableStreamParser(config.resultsChunkRows)
+            parser.feed(response.content)
+            parser.close()
+            errorMessage = parser.errorMessage
+        except Exception as ex:
+            logging.debug(f"Couldn't parse error response: {ex}")
+    if errorMessage:
+        raise pyvo.dal.DALQueryError(errorMessage, url=url)
+    response.raise_for_status()
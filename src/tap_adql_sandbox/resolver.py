@@ -0,0 +1,203 @@
+"""
+Resolving object identifiers into all the identifiers Simbad has
+for the same objects. Many identifiers are resolved with one TAP query
+against the Simbad `ident` table (instead of a request per identifier),
+and resolved ones are cached on disk for `config.simbadCacheAgeMax`
+seconds, so looking up the same objects again doesn't ask Simbad.
+"""
+
+# standard libraries
+#
+import json
+import os
+import threading
+import time
+import logging
+import typing
+#
+# own stuff
+#
+from . import config
+from . import stats
+from . import simbadCacheFile
+from .execution import fetchResults
+from .jobs import Job
+
+simbadCacheLock: threading.Lock = threading.Lock()
+
+
+def normalizeIdentifier(identifier: str) -> str:
+    return " ".join(identifier.split())
+
+
+def getCacheKey(identifier: str) -> str:
+    # Simbad doesn't care about the case of identifiers either
+    return normalizeIdentifier(identifier).casefold()
+
+
+def loadCache() -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+    try:
+        with open(simbadCacheFile, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as ex:
+        logging.warning(
+            f"Couldn't read Simbad IDs cache [{simbadCacheFile}]: {ex}"
+        )
+        return {}
+    if not isinstance(cache, dict):
+        logging.warning(f"Unexpected contents of [{simbadCacheFile}]")
+        return {}
+    return cache
+
+
+def saveCache(cache: typing.Dict[str, typing.Dict[str, typing.Any]]) -> None:
+    try:
+        cacheFileTmp = f"{simbadCacheFile}.tmp"
+        with open(cacheFileTmp, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(cacheFileTmp, simbadCacheFile)
+    except OSError as ex:
+        logging.warning(
+            f"Couldn't save Simbad IDs cache to [{simbadCacheFile}]: {ex}"
+        )
+
+
+def isExpired(entry: typing.Dict[str, typing.Any], now: float) -> bool:
+    return now - entry.get("resolved", 0) > config.simbadCacheAgeMax
+
+
+def getCachedIDs(
+    identifiers: typing.List[str]
+) -> typing.Dict[str, typing.List[str]]:
+    """
+    IDs of the identifiers that are in cache and haven't expired yet.
+    """
+    now: float = time.time()
+    with simbadCacheLock:
+        cache = loadCache()
+    cachedIDs: typing.Dict[str, typing.List[str]] = {}
+    for identifier in identifiers:
+        entry = cache.get(getCacheKey(identifier))
+        if entry is not None and not isExpired(entry, now):
+            cachedIDs[identifier] = entry["ids"]
+    return cachedIDs
+
+
+def cacheIDs(resolvedIDs: typing.Dict[str, typing.List[str]]) -> None:
+    """
+    Adds resolved IDs to cache (objects that Simbad doesn't know too,
+    with no IDs), dropping the expired ones.
+    """
+    now: float = time.time()
+    with simbadCacheLock:
+        cache = {
+            k: e for k, e in loadCache().items() if not isExpired(e, now)
+        }
+        for identifier, ids in resolvedIDs.items():
+            cache[getCacheKey(identifier)] = {"ids": ids, "resolved": now}
+        saveCache(cache)
+
+
+def buildQuery(identifiers: typing.List[str]) -> str:
+    """
+    A query with a sub-query for every identifier, so every row tells
+    exactly which of the requested identifiers it is for, however
+    differently Simbad might have them written (`M31` is `M  31`).
+    """
+    subQueries: typing.List[str] = []
+    for identifier in identifiers:
+        literal: str = identifier.replace("'", "''")
+        subQueries.append(
+            "\n".join((
+                f"SELECT '{literal}' AS requested, i.id",
+                "FROM ident AS r JOIN ident AS i ON i.oidref = r.oidref",
+                f"WHERE r.id = '{literal}'"
+            ))
+        )
+    return "\nUNION ALL\n".join(subQueries)
+
+
+def toText(value: typing.Any) -> str:
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return str(value)
+
+
+def queryIDs(
+    job: Job,
+    identifiers: typing.List[str]
+) -> typing.Dict[str, typing.List[str]]:
+    from .results import ResultBuffer
+
+    queryText: str = buildQuery(identifiers)
+    buffer = ResultBuffer()
+    buffer.stats = stats.QueryStats(config.simbadServiceURL, queryText)
+    fetchResults(
+        job,
+        config.simbadServiceURL,
+        queryText,
+        buffer,
+        # these are cached here, by identifiers
+        useCache=False
+    )
+    if buffer.overflow:
+        logging.warning(
+            " ".join((
+                "Simbad has truncated the results, so some objects",
+                "might be missing some of their IDs"
+            ))
+        )
+    resolvedIDs: typing.Dict[str, typing.List[str]] = {
+        i: [] for i in identifiers
+    }
+    data = buffer.toDataFrame()
+    for requested, identifier in zip(data["requested"], data["id"]):
+        ids = resolvedIDs.get(normalizeIdentifier(toText(requested)))
+        if ids is not None:
+            ids.append(toText(identifier))
+    return resolvedIDs
+
+
+def resolveIdentifiers(
+    job: Job,
+    identifiers: typing.Iterable[str],
+    useCache: bool = True
+) -> typing.Tuple[typing.Dict[str, typing.List[str]], int]:
+    """
+    Runs in a worker thread. Returns IDs of every (normalized and
+    deduplicated) identifier, in the same order, with no IDs for objects
+    that Simbad doesn't know, and how many of them were taken from cache.
+    Identifiers that aren't in cache are resolved
+    by `config.simbadBatchMax` in one query.
+    """
+    # the first spelling of every identifier (ignoring the case)
+    spellings: typing.Dict[str, str] = {}
+    for identifier in identifiers:
+        if identifier.strip():
+            spellings.setdefault(
+                getCacheKey(identifier),
+                normalizeIdentifier(identifier)
+            )
+    requested: typing.List[str] = list(spellings.values())
+    resolvedIDs: typing.Dict[str, typing.List[str]] = (
+        getCachedIDs(requested) if useCache else {}
+    )
+    cachedCount: int = len(resolvedIDs)
+    missing: typing.List[str] = [
+        i for i in requested if i not in resolvedIDs
+    ]
+    for start in range(0, len(missing), config.simbadBatchMax):
+        job.checkCancelled()
+        job.reportProgress(
+            f"Resolving {len(missing) - start} identifiers in Simbad",
+            start / len(missing)
+        )
+        batchIDs = queryIDs(
+            job,
+            missing[start:start + config.simbadBatchMax]
+        )
+        cacheIDs(batchIDs)
+        resolvedIDs.update(batchIDs)
+    return {i: resolvedIDs[i] for i in requested}, cachedCount
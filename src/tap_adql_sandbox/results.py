@@ -0,0 +1,556 @@
+# 3rd-party dependencies
+#
+import numpy
+import pandas
+import pyarrow
+#
+# standard libraries
+#
+import bisect
+import json
+import threading
+import logging
+import typing
+#
+# own stuff
+#
+from . import config
+from .compact import (
+    categorizeStrings,
+    columnTypes,
+    compactTypes,
+    mergeTypes,
+    numericTypes,
+    restoreTypes,
+    widenedTypes,
+    widenTypes
+)
+from .spill import SpillStorage
+from .stats import QueryStats
+
+# chunk is either in memory or spilled to disk
+Chunk = typing.Union[pandas.DataFrame, pyarrow.Table]
+
+
+def toDataFrame(chunk: Chunk) -> pandas.DataFrame:
+    if isinstance(chunk, pyarrow.Table):
+        return chunk.to_pandas()
+    return chunk
+
+
+def emptyDataFrame(chunk: Chunk) -> pandas.DataFrame:
+    """
+    DataFrame with the same columns as the chunk, but without rows.
+    """
+    if isinstance(chunk, pyarrow.Table):
+        return chunk.schema.empty_table().to_pandas()
+    return chunk.iloc[0:0]
+
+
+def restoreArrowTypes(
+    table: pyarrow.Table,
+    types: typing.Dict[str, numpy.dtype]
+) -> pyarrow.Table:
+    """
+    The same as `restoreTypes()`, but for Arrow tables. Pandas metadata
+    gets the restored types too, otherwise the table would be converted
+    to pandas with the compact types again.
+    """
+    restored: typing.Dict[str, numpy.dtype] = {}
+    for field in table.schema:
+        dtype = types.get(field.name)
+        if (
+            dtype is not None
+            and
+            (
+                pyarrow.types.is_integer(field.type)
+                or
+                pyarrow.types.is_floating(field.type)
+            )
+            and
+            field.type != pyarrow.from_numpy_dtype(dtype)
+        ):
+            restored[field.name] = dtype
+    if not restored:
+        return table
+    metadata = table.schema.metadata
+    pandasMetadata = table.schema.pandas_metadata
+    if pandasMetadata is not None:
+        for column in pandasMetadata["columns"]:
+            dtype = restored.get(column["name"])
+            if dtype is None:
+                continue
+            column["pandas_type"] = str(dtype)
+            # nullable types are the ones with capital letters
+            if column["numpy_type"][:1].isupper():
+                column["numpy_type"] = "".join((
+                    {"i": "Int", "u": "UInt", "f": "Float"}[dtype.kind],
+                    str(dtype.itemsize * 8)
+                ))
+            else:
+                column["numpy_type"] = str(dtype)
+        metadata = {
+            **metadata,
+            b"pandas": json.dumps(pandasMetadata).encode("utf-8")
+        }
+    return table.cast(
+        pyarrow.schema(
+            [
+                field.with_type(pyarrow.from_numpy_dtype(restored[field.name]))
+                if field.name in restored
+                else field
+                for field in table.schema
+            ],
+            metadata=metadata
+        )
+    )
+
+
+def chunkMemory(chunk: Chunk) -> int:
+    # spilled chunks are memory-mapped, so they don't really count
+    if isinstance(chunk, pyarrow.Table):
+        return 0
+    return int(chunk.memory_usage(index=False, deep=True).sum())
+
+
+class ResultBuffer:
+    """
+    Query results, accumulated chunk by chunk as they arrive. Rows can be
+    read (by the results table, for example) while the chunks are still
+    being appended from a worker thread. Once all the chunks are there,
+    `finish()` puts them together into a single DataFrame.
+
+    Unless `config.resultsCompactTypes` is disabled, columns of every
+    chunk are converted to the most compact types that can hold their
+    values, and all the chunks have the same column types. That is only
+    how they are stored: rows that are read have numeric columns
+    in the types they came in.
+
+    Once the results take more than `config.resultsSpillThreshold` bytes
+    of memory, their chunks are spilled to memory-mapped files on disk
+    (see `SpillStorage`), so results can be larger than the memory.
+    Reading rows works the same way for spilled chunks, only the rows
+    that are read get loaded.
+    """
+
+    def __init__(self):
+        self.columns: typing.List[str] = []
+        self.rowsCount: int = 0
+        # results were truncated by the service (MAXREC)
+        self.overflow: bool = False
+        self.finished: bool = False
+        # when the results were saved to cache, if they were taken from there
+        self.cachedTime: typing.Optional[float] = None
+        # called from the thread that appends chunks
+        self.onAppended: typing.Optional[
+            typing.Callable[["ResultBuffer"], None]
+        ] = None
+        # bytes taken by the chunks that are in memory
+        self.memorySize: int = 0
+        # of the query that the results come from
+        self.stats: QueryStats = QueryStats()
+
+        self._chunks: typing.List[Chunk] = []
+        # number of the first row of each chunk
+        self._offsets: typing.List[int] = []
+        # column types of the chunks appended so far
+        self._types: typing.Dict[str, typing.Any] = {}
+        # types of numeric columns before they were compacted, which
+        # they are converted back to when rows are read
+        self._originalTypes: typing.Dict[str, numpy.dtype] = {}
+        self._spillStorage: typing.Optional[SpillStorage] = None
+        # including the ones of other buffers, which chunks were taken over
+        self._spillStorages: typing.List[SpillStorage] = []
+        self._spillFailed: bool = False
+        self._lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def fromDataFrame(cls, data: pandas.DataFrame) -> "ResultBuffer":
+        buffer = cls()
+        buffer.append(data)
+        buffer.finish()
+        return buffer
+
+    @property
+    def columnsCount(self) -> int:
+        return len(self.columns)
+
+    @property
+    def isEmpty(self) -> bool:
+        return not self._chunks
+
+    @property
+    def isSpilled(self) -> bool:
+        return bool(self._spillStorages)
+
+    @property
+    def spilledSize(self) -> int:
+        """
+        Bytes taken by the chunks that are spilled to disk.
+        """
+        return sum(s.size for s in self._spillStorages)
+
+    def append(self, chunk: pandas.DataFrame) -> None:
+        with self.stats.measure("convert"):
+            if config.resultsCompactTypes and len(chunk):
+                self._originalTypes = mergeTypes(
+                    self._originalTypes,
+                    numericTypes(chunk)
+                )
+                chunk = compactTypes(chunk, self._types)
+                types = columnTypes(chunk)
+                widened = widenedTypes(self._types, types)
+                if widened:
+                    self._widenChunks(widened)
+                self._types = types
+            self._appendChunk(chunk)
+            if self._shouldSpill():
+                self.spill()
+        if self.onAppended is not None:
+            self.onAppended(self)
+
+    def extend(self, other: "ResultBuffer") -> None:
+        """
+        Takes over the chunks of another buffer (without copying them),
+        appending them one after another.
+        """
+        with other._lock:
+            chunks = list(other._chunks)
+        # spilled chunks stay in the files of the other buffer
+        self._spillStorages.extend(other._spillStorages)
+        self._originalTypes = mergeTypes(
+            self._originalTypes,
+            other._originalTypes
+        )
+        for chunk in chunks:
+            # empty chunk is only needed for getting the columns
+            if not len(chunk) and not self.isEmpty:
+                continue
+            if isinstance(chunk, pyarrow.Table):
+                self._appendChunk(chunk)
+                if self.onAppended is not None:
+                    self.onAppended(self)
+            else:
+                self.append(chunk)
+        self.overflow = self.overflow or other.overflow
+
+    def finish(self, concatenate: bool = True) -> None:
+        """
+        Marks the results as complete. Chunks are put together into
+        a single DataFrame, unless `concatenate` is false, in which case
+        they are kept as they are, so results don't take twice the memory
+        while they are being concatenated. Results that are spilled
+        to disk are never concatenated.
+        """
+        with self.stats.measure("convert"):
+            if self.isSpilled:
+                self.spill()
+                concatenate = False
+            with self._lock:
+                chunks = list(self._chunks)
+            # concatenating outside of the lock, so reading rows
+            # in the meantime doesn't have to wait for it
+            if concatenate and chunks:
+                data = (
+                    pandas.concat(chunks, ignore_index=True)
+                    if len(chunks) > 1
+                    else chunks[0]
+                )
+                if config.resultsCompactTypes:
+                    data = categorizeStrings(data)
+                self._replaceChunks(0, len(chunks), [data])
+        self.finished = True
+
+    def spill(self) -> None:
+        """
+        Moves the chunks that are in memory to disk, in files
+        of about `config.resultsSpillFileSize` bytes each. Should only
+        be called from the thread that appends chunks (or once they
+        are all appended).
+        """
+        if self._spillFailed:
+            return
+        i: int = 0
+        while i < len(self._chunks):
+            if isinstance(self._chunks[i], pyarrow.Table):
+                i += 1
+                continue
+            # consecutive chunks that are in memory, up to the file size
+            j: int = i
+            size: int = 0
+            while (
+                j < len(self._chunks)
+                and
+                not isinstance(self._chunks[j], pyarrow.Table)
+                and
+                (j == i or size < config.resultsSpillFileSize)
+            ):
+                size += chunkMemory(self._chunks[j])
+                j += 1
+            if not any(len(c) for c in self._chunks[i:j]):
+                i = j
+                continue
+            try:
+                if self._spillStorage is None:
+                    self._spillStorage = SpillStorage()
+                    self._spillStorages.append(self._spillStorage)
+                table = self._spillStorage.write(
+                    pandas.concat(self._chunks[i:j], ignore_index=True)
+                    if j - i > 1
+                    else self._chunks[i]
+                )
+            except Exception as ex:
+                # such as columns with mixed objects, which Arrow
+                # doesn't know what to do with, or disk being full
+                logging.warning(
+                    f"Couldn't spill results to disk, keeping in memory: {ex}"
+                )
+                self._spillFailed = True
+                return
+            self._replaceChunks(i, j, [table])
+            i += 1
+
+    def slice(self, start: int, stop: int) -> pandas.DataFrame:
+        """
+        Returns rows from `start` to `stop` (not including), taking them
+        from however many chunks they are spread across.
+        """
+        pieces = self._slicePieces(start, stop)
+        if not pieces:
+            with self._lock:
+                chunks = list(self._chunks)
+            return (
+                self._toDataFrame(emptyDataFrame(chunks[0]))
+                if chunks
+                else pandas.DataFrame()
+            )
+        if len(pieces) == 1:
+            return self._toDataFrame(pieces[0])
+        return pandas.concat(
+            [self._toDataFrame(p) for p in pieces],
+            ignore_index=True
+        )
+
+    def sliceArrow(self, start: int, stop: int) -> pyarrow.Table:
+        """
+        The same as `slice()`, but returns an Arrow table, which for
+        spilled chunks is taken right from the memory-mapped files.
+        """
+        pieces = [
+            restoreArrowTypes(p, self._originalTypes)
+            if isinstance(p, pyarrow.Table)
+            else pyarrow.Table.from_pandas(
+                self._toDataFrame(p),
+                preserve_index=False
+            )
+            for p in self._slicePieces(start, stop)
+        ]
+        if not pieces:
+            return pyarrow.Table.from_pandas(
+                self.slice(start, stop),
+                preserve_index=False
+            )
+        if len(pieces) == 1:
+            return pieces[0]
+        try:
+            return pyarrow.concat_tables(pieces)
+        except pyarrow.ArrowInvalid:
+            # chunks have different column types
+            return pyarrow.Table.from_pandas(
+                self.slice(start, stop),
+                preserve_index=False
+            )
+
+    def take(self, rows: numpy.ndarray) -> pandas.DataFrame:
+        """
+        Returns the rows with these numbers (in the same order), taking
+        from every chunk only the rows that are there.
+        """
+        with self._lock:
+            chunks = list(self._chunks)
+            offsets = numpy.array(self._offsets, dtype=numpy.int64)
+        rows = numpy.asarray(rows, dtype=numpy.int64)
+        if not len(rows) or not chunks:
+            return self.slice(0, 0)
+        chunkNumbers = numpy.searchsorted(offsets, rows, side="right") - 1
+        pieces: typing.List[pandas.DataFrame] = []
+        positions: typing.List[numpy.ndarray] = []
+        for i in numpy.unique(chunkNumbers):
+            inChunk = numpy.flatnonzero(chunkNumbers == i)
+            chunkRows = rows[inChunk] - offsets[i]
+            chunk = chunks[i]
+            pieces.append(
+                self._toDataFrame(
+                    chunk.take(chunkRows)
+                    if isinstance(chunk, pyarrow.Table)
+                    else chunk.iloc[chunkRows]
+                )
+            )
+            positions.append(inChunk)
+        data = (
+            pandas.concat(pieces, ignore_index=True)
+            if len(pieces) > 1
+            else pieces[0].reset_index(drop=True)
+        )
+        # rows are grouped by chunks now, putting them back in order
+        order = numpy.argsort(numpy.concatenate(positions), kind="stable")
+        return data.take(order).reset_index(drop=True)
+
+    def iterateChunks(
+        self,
+        columns: typing.Optional[typing.List[str]] = None
+    ) -> typing.Iterator[typing.Tuple[int, pandas.DataFrame]]:
+        """
+        Yields the number of the first row and the data of every chunk
+        (only of these columns, if they are given), so all the results
+        can be processed without having them in memory all at once.
+        """
+        with self._lock:
+            chunks = list(self._chunks)
+            offsets = list(self._offsets)
+        for offset, chunk in zip(offsets, chunks):
+            if columns is not None:
+                chunk = (
+                    chunk.select(columns)
+                    if isinstance(chunk, pyarrow.Table)
+                    else chunk[columns]
+                )
+            yield offset, self._toDataFrame(chunk)
+
+    def memoryUsage(self) -> typing.List[typing.Tuple[str, str, int]]:
+        """
+        Column names, types and how many bytes of memory each of them
+        takes (not counting the spilled chunks).
+        """
+        with self._lock:
+            chunks = list(self._chunks)
+        usage: typing.Dict[str, int] = dict.fromkeys(self.columns, 0)
+        for chunk in chunks:
+            if isinstance(chunk, pyarrow.Table):
+                continue
+            for c, size in chunk.memory_usage(index=False, deep=True).items():
+                usage[str(c)] += int(size)
+        types: typing.Dict[str, str] = (
+            {
+                str(c): str(t)
+                for c, t in emptyDataFrame(chunks[-1]).dtypes.items()
+            }
+            if chunks
+            else {}
+        )
+        return [(c, types.get(c, ""), size) for c, size in usage.items()]
+
+    def toDataFrame(self) -> pandas.DataFrame:
+        """
+        All the results as one DataFrame. Spilled chunks get loaded
+        into memory, so it is better to read large results by slices.
+        """
+        with self._lock:
+            chunks = list(self._chunks)
+        if not chunks:
+            return pandas.DataFrame(columns=self.columns)
+        if len(chunks) == 1:
+            return self._toDataFrame(chunks[0])
+        return pandas.concat(
+            [self._toDataFrame(c) for c in chunks],
+            ignore_index=True
+        )
+
+    def _toDataFrame(self, chunk: Chunk) -> pandas.DataFrame:
+        """
+        Rows of the chunk in the types they are read in. Spilled chunks
+        keep the types they were spilled with, so columns that got wider
+        types since then are converted here, and then numeric columns
+        get back the types they came in.
+        """
+        data: pandas.DataFrame = toDataFrame(chunk)
+        if isinstance(chunk, pyarrow.Table):
+            widened = widenedTypes(columnTypes(data), self._types)
+            if widened:
+                data = widenTypes(data, widened)
+        return restoreTypes(data, self._originalTypes)
+
+    def _widenChunks(self, widened: typing.Dict[str, typing.Any]) -> None:
+        """
+        Converts the chunks that are in memory to the wider types.
+        Spilled chunks are not loaded back into memory for that, they
+        are converted only when their rows are read.
+        """
+        for i, chunk in enumerate(list(self._chunks)):
+            if not isinstance(chunk, pyarrow.Table):
+                self._replaceChunks(i, i + 1, [widenTypes(chunk, widened)])
+
+    def _appendChunk(self, chunk: Chunk) -> None:
+        with self._lock:
+            if not self._chunks:
+                self.columns = [
+                    str(c)
+                    for c in (
+                        chunk.column_names
+                        if isinstance(chunk, pyarrow.Table)
+                        else chunk.columns
+                    )
+                ]
+            self._offsets.append(self.rowsCount)
+            self._chunks.append(chunk)
+            self.rowsCount += len(chunk)
+            self.memorySize += chunkMemory(chunk)
+
+    def _replaceChunks(
+        self,
+        start: int,
+        stop: int,
+        chunks: typing.List[Chunk]
+    ) -> None:
+        """
+        Replaces chunks from `start` to `stop` with the same rows
+        in other chunks. Chunks are only ever replaced by the thread
+        that appends them, so they can be read here without the lock.
+        """
+        offsets: typing.List[int] = []
+        offset: int = self._offsets[start] if start < len(self._offsets) else 0
+        for chunk in chunks:
+            offsets.append(offset)
+            offset += len(chunk)
+        memorySize: int = (
+            self.memorySize
+            - sum(chunkMemory(c) for c in self._chunks[start:stop])
+            + sum(chunkMemory(c) for c in chunks)
+        )
+        with self._lock:
+            self._chunks[start:stop] = chunks
+            self._offsets[start:stop] = offsets
+            self.memorySize = memorySize
+
+    def _shouldSpill(self) -> bool:
+        """
+        Results start being spilled once they don't fit into the memory
+        threshold, and after that every time there is enough of new rows
+        in memory for another file.
+        """
+        if config.resultsSpillThreshold <= 0 or self._spillFailed:
+            return False
+        if self.isSpilled:
+            return self.memorySize >= config.resultsSpillFileSize
+        return self.memorySize > config.resultsSpillThreshold
+
+    def _slicePieces(self, start: int, stop: int) -> typing.List[Chunk]:
+        with self._lock:
+            chunks = list(self._chunks)
+            offsets = list(self._offsets)
+        if not chunks:
+            return []
+        stop = min(stop, offsets[-1] + len(chunks[-1]))
+        pieces: typing.List[Chunk] = []
+        i: int = max(bisect.bisect_right(offsets, start) - 1, 0)
+        while i < len(chunks) and offsets[i] < stop:
+            chunkStart: int = max(start - offsets[i], 0)
+            chunkStop: int = stop - offsets[i]
+            chunk = chunks[i]
+            pieces.append(
+                chunk.slice(chunkStart, chunkStop - chunkStart)
+                if isinstance(chunk, pyarrow.Table)
+                else chunk.iloc[chunkStart:chunkStop]
+            )
+            i += 1
+        return pieces
@@ -0,0 +1,175 @@
+# 3rd-party dependencies
+#
+# PyVO and requests take quite a while to import, so they are imported
+# only when the first query (or request for metadata) is made
+#
+# standard libraries
+#
+from urllib.parse import urlsplit
+import io
+import threading
+import time
+import logging
+import typing
+#
+# own stuff
+#
+from . import config
+
+if typing.TYPE_CHECKING:
+    import pyvo
+    import requests
+
+# one session per scheme and host, so keep-alive connections
+# are reused by everything that talks to that host
+sessions: typing.Dict[str, "requests.Session"] = {}
+# one service per base URL
+services: typing.Dict[str, "pyvo.dal.TAPService"] = {}
+# (base URL, metadata kind) => (time fetched, metadata)
+metadataCache: typing.Dict[
+    typing.Tuple[str, str],
+    typing.Tuple[float, typing.Any]
+] = {}
+
+registryLock: threading.Lock = threading.Lock()
+
+
+def normalizeServiceURL(serviceURL: str) -> str:
+    return serviceURL.strip().rstrip("/")
+
+
+def getSession(url: str) -> "requests.Session":
+    from pyvo.utils.http import create_session
+    from .connections import MeasuredHTTPAdapter
+
+    parts = urlsplit(url)
+    origin: str = f"{parts.scheme}://{parts.netloc}".lower()
+    with registryLock:
+        session = sessions.get(origin)
+        if session is None:
+            session = create_session()
+            adapter = MeasuredHTTPAdapter(
+                pool_maxsize=config.servicesConnectionsMax
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            sessions[origin] = session
+    return session
+
+
+def getService(serviceURL: str) -> "pyvo.dal.TAPService":
+    """
+    Returns the same service object (and so the same HTTP session)
+    for every query to this URL.
+    """
+    import pyvo
+
+    serviceURL = normalizeServiceURL(serviceURL)
+    session = getSession(serviceURL)
+    with registryLock:
+        service = services.get(serviceURL)
+        if service is None:
+            service = pyvo.dal.TAPService(serviceURL, session=session)
+            services[serviceURL] = service
+    return service
+
+
+def fetchAvailability(serviceURL: str) -> typing.Any:
+    import pyvo
+    from pyvo.io import vosi
+    import requests
+
+    # PyVO has deprecated its availability property
+    url: str = f"{serviceURL}/availability"
+    try:
+        response = getSession(url).get(url)
+        response.raise_for_status()
+    except requests.RequestException as ex:
+        raise pyvo.dal.DALServiceError.from_except(ex, url)
+    return vosi.parse_availability(io.BytesIO(response.content))
+
+
+def fetchMetadata(serviceURL: str, kind: str) -> typing.Any:
+    import pyvo
+
+    if kind == "availability":
+        return fetchAvailability(serviceURL)
+    # not the shared service object, which PyVO keeps its own copy
+    # of metadata in, so this one fetches it again, but with the shared
+    # session
+    service = pyvo.dal.TAPService(
+        serviceURL,
+        session=getSession(serviceURL)
+    )
+    if kind == "capabilities":
+        return service.capabilities
+    if kind == "tables":
+        return service.tables
+    raise ValueError(f"Unknown service metadata: {kind}")
+
+
+def getMetadata(serviceURL: str, kind: str) -> typing.Any:
+    """
+    Returns service `capabilities`, `availability` or `tables`, fetching
+    them only if they haven't been fetched for longer than the time
+    configured for this kind of metadata.
+    """
+    serviceURL = normalizeServiceURL(serviceURL)
+    ttl: float = config.servicesMetadataTTL[kind]
+    with registryLock:
+        cached = metadataCache.get((serviceURL, kind))
+    if cached is not None and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+
+    logging.debug(f"Fetching {kind} of [{serviceURL}]")
+    metadata = fetchMetadata(serviceURL, kind)
+    with registryLock:
+        metadataCache[(serviceURL, kind)] = (time.monotonic(), metadata)
+    return metadata
+
+
+def getCapabilities(serviceURL: str) -> typing.Any:
+    return getMetadata(serviceURL, "capabilities")
+
+
+def getAvailability(serviceURL: str) -> typing.Any:
+    return getMetadata(serviceURL, "availability")
+
+
+def getTables(serviceURL: str) -> typing.Any:
+    return getMetadata(serviceURL, "tables")
+
+
+def getOutputLimits(
+    serviceURL: str
+) -> typing.Tuple[typing.Optional[int], typing.Optional[int]]:
+    """
+    Default and maximum number of rows (MAXREC) that the service returns,
+    if its capabilities tell that.
+    """
+    from pyvo.io.vosi import tapregext
+
+    for capability in getCapabilities(serviceURL):
+        if not isinstance(capability, tapregext.TableAccess):
+            continue
+        outputLimit = capability.outputlimit
+        if outputLimit is None:
+            break
+        limits: typing.List[typing.Optional[int]] = []
+        for limit in (outputLimit.default, outputLimit.hard):
+            limits.append(
+                int(limit.content)
+                if limit is not None and limit.unit == "row"
+                else None
+            )
+        return limits[0], limits[1]
+    return None, None
+
+
+def closeSessions() -> None:
+    with registryLock:
+        for session in sessions.values():
+            session.close()
+        sessions.clear()
+        services.clear()
+        metadataCache.clear()
@@ -0,0 +1,272 @@
+"""
+Tables of the service from the main window and their columns, so there
+is no need to query `tap_schema` just to see what can be queried. Service
+metadata is taken from `services`, which fetches it only once in a while,
+so opening the same service again doesn't send any requests.
+"""
+
+from __future__ import annotations
+# 3rd-party dependencies
+#
+import dearpygui.dearpygui as dpg
+#
+# standard libraries
+#
+import logging
+import typing
+#
+# own stuff
+#
+from . import jobs
+from . import services
+from .table import ResultsTableView
+
+if typing.TYPE_CHECKING:
+    from .results import ResultBuffer
+
+# what to call to get the service URL from the main window and to put
+# a query there, set by serviceTablesWindow()
+getServiceURL: typing.Callable[[], str] = lambda: ""
+setQueryText: typing.Callable[[str], None] = lambda q: None
+
+tablesJob: typing.Optional[jobs.Job] = None
+columnsJob: typing.Optional[jobs.Job] = None
+# of the service which tables are listed
+tablesServiceURL: str = ""
+tableNames: typing.List[str] = []
+columnsView: typing.Optional[ResultsTableView] = None
+
+
+def fetchServiceTables(
+    job: jobs.Job,
+    serviceURL: str
+) -> typing.Tuple[typing.List[str], str]:
+    """
+    Runs in a worker thread. Returns names of the tables and what
+    the service tells about its availability and limits.
+    """
+    job.reportProgress("Fetching tables")
+    names: typing.List[str] = list(services.getTables(serviceURL).keys())
+
+    notes: typing.List[str] = [f"{len(names)} tables"]
+    job.checkCancelled()
+    job.reportProgress("Fetching capabilities")
+    try:
+        defaultLimit, hardLimit = services.getOutputLimits(serviceURL)
+        if defaultLimit is not None:
+            notes.append(f"returns {defaultLimit} rows by default")
+        if hardLimit is not None:
+            notes.append(f"{hardLimit} rows at most")
+    except Exception as ex:
+        logging.debug(f"Couldn't get capabilities of the service: {ex}")
+    job.checkCancelled()
+    job.reportProgress("Fetching availability")
+    try:
+        availability = services.getAvailability(serviceURL)
+        if availability.available is False:
+            notes.append("service reports that it is not available")
+        notes.extend(availability.notes)
+    except Exception as ex:
+        # plenty of services don't implement it
+        logging.debug(f"Couldn't get availability of the service: {ex}")
+    return names, ", ".join(notes)
+
+
+def fetchTableColumns(
+    job: jobs.Job,
+    serviceURL: str,
+    tableName: str
+) -> ResultBuffer:
+    import pandas
+    from .results import ResultBuffer
+
+    job.reportProgress(f"Fetching columns of {tableName}")
+    table = services.getTables(serviceURL)[tableName]
+    return ResultBuffer.fromDataFrame(
+        pandas.DataFrame(
+            [
+                (
+                    c.name,
+                    c.datatype.content if c.datatype is not None else "",
+                    c.unit or "",
+                    c.ucd or "",
+                    " ".join((c.description or "").split())
+                )
+                for c in table.columns
+            ],
+            columns=["name", "datatype", "unit", "ucd", "description"]
+        )
+    )
+
+
+def loadTables() -> None:
+    global tablesJob, tablesServiceURL, tableNames
+
+    cancelServiceTables()
+    tablesServiceURL = ""
+    tableNames = []
+    filterTables()
+    dpg.hide_item("btn_serviceTablesQuery")
+    serviceURL: str = getServiceURL()
+    dpg.hide_item("errorMessageServiceTables")
+    if not serviceURL:
+        showServiceTablesError("No TAP service in the main window.")
+        return
+
+    tablesJob = jobs.Job("service tables")
+    tablesJob.onProgress = serviceTablesProgressed
+    dpg.set_value("serviceTablesURL", serviceURL)
+    dpg.set_value("serviceTablesStatus", "")
+    jobs.submitJob(
+        tablesJob,
+        fetchServiceTables,
+        serviceURL,
+        onDone=tablesFetched,
+        onError=serviceTablesFailed
+    )
+
+
+def cancelServiceTables() -> None:
+    for job in (tablesJob, columnsJob):
+        if job is not None:
+            job.cancel()
+
+
+def serviceTablesProgressed(job: jobs.Job) -> None:
+    if job is tablesJob or job is columnsJob:
+        dpg.set_value("serviceTablesStatus", job.stage)
+
+
+def tablesFetched(
+    job: jobs.Job,
+    result: typing.Tuple[typing.List[str], str]
+) -> None:
+    global tablesServiceURL, tableNames
+
+    if job is not tablesJob:
+        return
+    tableNames, notes = result
+    tablesServiceURL = dpg.get_value("serviceTablesURL")
+    if columnsView is not None:
+        columnsView.clear()
+    dpg.set_value("serviceTablesStatus", notes)
+    filterTables()
+
+
+def serviceTablesFailed(job: jobs.Job, ex: Exception) -> None:
+    if job is tablesJob or job is columnsJob:
+        logging.debug(f"Fetching service tables failed: {ex}")
+        showServiceTablesError(str(ex))
+
+
+def showServiceTablesError(errorMessage: str) -> None:
+    dpg.set_value("serviceTablesStatus", "")
+    dpg.set_value("errorMessageServiceTables", errorMessage)
+    dpg.show_item("errorMessageServiceTables")
+
+
+def filterTables() -> None:
+    searchText: str = dpg.get_value("serviceTablesFilter").strip().lower()
+    dpg.configure_item(
+        "serviceTablesList",
+        items=[n for n in tableNames if searchText in n.lower()]
+    )
+
+
+def tableSelected(sender, app_data: str) -> None:
+    global columnsJob
+
+    if columnsJob is not None:
+        columnsJob.cancel()
+    dpg.hide_item("errorMessageServiceTables")
+    dpg.show_item("btn_serviceTablesQuery")
+    columnsJob = jobs.Job("table columns")
+    columnsJob.onProgress = serviceTablesProgressed
+    jobs.submitJob(
+        columnsJob,
+        fetchTableColumns,
+        tablesServiceURL,
+        app_data,
+        onDone=columnsFetched,
+        onError=serviceTablesFailed
+    )
+
+
+def columnsFetched(job: jobs.Job, columns: ResultBuffer) -> None:
+    if job is not columnsJob or columnsView is None:
+        return
+    dpg.set_value("serviceTablesStatus", f"{columns.rowsCount} columns")
+    try:
+        columnsView.setData(
+            columns,
+            dpg.get_item_width("window_serviceTables")
+        )
+    except Exception as ex:
+        logging.error(f"Couldn't generate the columns table. {ex}")
+        columnsView.clear()
+
+
+def querySelectedTable() -> None:
+    tableName: str = dpg.get_value("serviceTablesList")
+    if tableName:
+        setQueryText(f"SELECT TOP 10 *\nFROM {tableName}")
+
+
+def showServiceTablesWindow() -> None:
+    dpg.show_item("window_serviceTables")
+    if getServiceURL() != tablesServiceURL:
+        loadTables()
+
+
+def serviceTablesWindow(
+    serviceURLGetter: typing.Callable[[], str],
+    queryTextSetter: typing.Callable[[str], None]
+) -> None:
+    global getServiceURL, setQueryText, columnsView
+
+    getServiceURL = serviceURLGetter
+    setQueryText = queryTextSetter
+
+    with dpg.window(
+        tag="window_serviceTables",
+        label="Service tables",
+        min_size=(750, 600),
+        show=False,
+        on_close=cancelServiceTables
+    ):
+        with dpg.group(horizontal=True):
+            dpg.add_button(label="Load", callback=loadTables)
+            dpg.add_text(tag="serviceTablesURL", default_value="")
+        dpg.add_text(tag="serviceTablesStatus", default_value="", wrap=700)
+        dpg.add_text(
+            tag="errorMessageServiceTables",
+            default_value="",
+            wrap=700,
+            show=False
+        )
+        dpg.add_input_text(
+            tag="serviceTablesFilter",
+            hint="Filter tables",
+            width=-1,
+            callback=filterTables
+        )
+        dpg.add_listbox(
+            tag="serviceTablesList",
+            items=[],
+            width=-1,
+            num_items=10,
+            callback=tableSelected
+        )
+        dpg.add_button(
+            tag="btn_serviceTablesQuery",
+            label="Query this table in the main window",
+            callback=querySelectedTable,
+            show=False
+        )
+        dpg.add_spacer()
+        dpg.add_group(tag="serviceTablesColumnsGroup")
+
+    columnsView = ResultsTableView(
+        "serviceTablesColumnsGroup",
+        "serviceTablesColumnsTable"
+    )
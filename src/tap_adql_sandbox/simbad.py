@@ -1,12 +1,12 @@
+from __future__ import annotations
 # 3rd-party dependencies
 #
 import dearpygui.dearpygui as dpg
-from astroquery.simbad import Simbad
-from tabulate import tabulate
-from typing import Optional
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
 #
 # standard libraries
 #
+import pathlib
 import sys
 import traceback
 import logging
@@ -14,16 +14,55 @@ import logging
 # own stuff
 #
 from . import config
+from .jobs import Job, submitJob
+from .resolver import resolveIdentifiers
+from .table import ClickableCells, ResultsTableView, copyCellText
 from .theme import (
     stylePrimaryColor,
     stylePrimaryColorActive
 )
 
+if TYPE_CHECKING:
+    from .results import ResultBuffer
+
+# what to call to show results in the main window,
+# set by simbadWindow()
+showResults: Callable[[ResultBuffer, str], bool] = lambda b, s: False
+
+lookupJob: Optional[Job] = None
+batchJob: Optional[Job] = None
+batchResults: Optional[ResultBuffer] = None
+batchResultsView: Optional[ResultsTableView] = None
+
+
+def simbadCellClicked(
+    button: int,
+    row: int,
+    column: int,
+    cellID: int
+) -> None:
+    # mouse right click
+    if button == 1:
+        copyCellText(cellID)
+
+
+simbadCells: ClickableCells = ClickableCells(simbadCellClicked)
+
+
+def showLookupError(errorMessage: str) -> None:
+    dpg.set_value("errorMessageSimbadIDs", errorMessage)
+    dpg.show_item("errorMessageSimbadIDs")
+    dpg.hide_item("loadingAnimationSimbadIDs")
+    dpg.show_item("btn_getSimbadIDs")
+
 
 def getSimbadIDs() -> None:
+    global lookupJob
+
     dpg.hide_item("resultsGroupSimbadIDs")
     if dpg.does_item_exist("resultsTableSimbadIDs"):
         dpg.delete_item("resultsTableSimbadIDs")
+    simbadCells.clearCells()
     dpg.hide_item("errorMessageSimbadIDs")
     dpg.set_value("errorMessageSimbadIDs", "")
 
@@ -33,79 +72,53 @@ def getSimbadIDs() -> None:
     idToLookUpInSimbad: str = dpg.get_value("idToLookUpInSimbad").strip()
 
     if not idToLookUpInSimbad:
-        dpg.set_value("errorMessageSimbadIDs", "No ID provided.")
-        dpg.show_item("errorMessageSimbadIDs")
-        dpg.hide_item("loadingAnimationSimbadIDs")
-        dpg.show_item("btn_getSimbadIDs")
+        showLookupError("No ID provided.")
         return
 
-    oids = None
-    try:
-        oids = Simbad.query_objectids(idToLookUpInSimbad)
-    except Exception as ex:
-        dpg.set_value("errorMessageSimbadIDs", ex)
-        dpg.show_item("errorMessageSimbadIDs")
-        dpg.hide_item("loadingAnimationSimbadIDs")
-        dpg.show_item("btn_getSimbadIDs")
+    # the lookup goes in the background, so the window doesn't freeze
+    lookupJob = submitJob(
+        Job("simbad-ids"),
+        resolveIdentifiers,
+        [idToLookUpInSimbad],
+        onDone=simbadIDsFound,
+        onError=simbadLookupFailed
+    )
+
+
+def simbadLookupFailed(job: Job, ex: Exception) -> None:
+    if job is lookupJob:
+        showLookupError(str(ex))
+
+
+def simbadIDsFound(
+    job: Job,
+    result: Tuple[Dict[str, List[str]], int]
+) -> None:
+    if job is not lookupJob:
         return
+    resolvedIDs, cachedCount = result
+    oids: List[str] = next(iter(resolvedIDs.values()), [])
 
     if oids:
         oidsCnt: int = len(oids)
-        logging.debug(f"IDs found in Simbad: {oidsCnt}")
+        logging.debug(
+            f"IDs found in Simbad: {oidsCnt}"
+            + (" (from cache)" if cachedCount else "")
+        )
         if config.debugMode:
+            import pandas
+            from .debugging import printResults
+            from .results import ResultBuffer
+
             try:
-                # won't look nice with logging.debug(), so it's a print()
-                print(
-                    tabulate(
-                        oids,
-                        headers=oids.colnames,
-                        tablefmt="psql",
-                        floatfmt=config.tabulateFloatfmtPrecision
-                    )
+                printResults(
+                    job,
+                    ResultBuffer.fromDataFrame(pandas.DataFrame({"id": oids})),
+                    "simbad-ids"
                 )
             except Exception as ex:
                 logging.warning(f"Couldn't print results. {ex}")
 
-        # before astroquery version 0.4.8 this table had
-        # an upper-cased `ID` column key, but starting
-        # with version 0.4.8 it is now lower-cased `id`
-        #
-        # https://github.com/astropy/astropy/issues/17695
-        idColumnKey: str = "ID"
-        # or compare `astroquery.__version__` with `0.4.7`
-        if idColumnKey not in oids.colnames:
-            logging.debug(
-                " ".join((
-                    "There is no upper-cased [ID] key",
-                    "in the resulting table, will try",
-                    "with lower-cased [id] key"
-                ))
-            )
-            idColumnKey = idColumnKey.lower()  # "id"
-            if idColumnKey not in oids.colnames:
-                errorMsg = "Resulting table has neither [ID] nor [id] column"
-                logging.error(errorMsg)
-                if len(oids.colnames) > 0:
-                    logging.debug(
-                        " ".join((
-                            "Here are all the columns/keys",
-                            "in this table:",
-                            ", ".join(oids.colnames)
-                        ))
-                    )
-                else:
-                    logging.debug(
-                        " ".join((
-                            "There are no columns/keys",
-                            "in this table at all"
-                        ))
-                    )
-                dpg.set_value("errorMessageSimbadIDs", f"{errorMsg}.")
-                dpg.show_item("errorMessageSimbadIDs")
-                dpg.hide_item("loadingAnimationSimbadIDs")
-                dpg.show_item("btn_getSimbadIDs")
-                return
-
         try:
             with dpg.table(
                 parent="resultsGroupSimbadIDs",
@@ -124,10 +137,10 @@ def getSimbadIDs() -> None:
             ):
                 if not config.noEnumerationColumn and oidsCnt > 1:
                     dpg.add_table_column(label="#", init_width_or_weight=0.05)
-                for header in oids.colnames:
-                    dpg.add_table_column(label=header)
+                dpg.add_table_column(label="id")
 
                 index: int = 0
+                idCells: List[List[int]] = []
                 for o in oids:
                     # reveal_type(index)
 
@@ -136,41 +149,139 @@ def getSimbadIDs() -> None:
                             with dpg.table_cell():
                                 dpg.add_text(default_value=f"{index+1}")
                         with dpg.table_cell():
-                            cellID = f"cellSimbadID-{index+1}"
-                            dpg.add_text(
-                                tag=cellID,
-                                default_value=o[idColumnKey]
-                            )
-                            dpg.bind_item_handler_registry(
-                                cellID,
-                                "cell-handler"
-                            )
+                            idCells.append([dpg.add_text(default_value=o)])
                         index += 1
+            # only the IDs can be clicked, not their numbers
+            simbadCells.setCells(idCells, "resultsGroupSimbadIDs")
         except Exception as ex:
             errorMsg = "Couldn't generate the results table"
             logging.error(f"{errorMsg}. {ex}")
             if config.debugMode:
                 traceback.print_exc(file=sys.stderr)
-            dpg.set_value(
-                "errorMessageSimbadIDs",
+            showLookupError(
                 f"{errorMsg}. There might be more details in console/stderr."
             )
-            dpg.show_item("errorMessageSimbadIDs")
-            dpg.hide_item("loadingAnimationSimbadIDs")
-            dpg.show_item("btn_getSimbadIDs")
             return
         dpg.hide_item("loadingAnimationSimbadIDs")
         dpg.show_item("btn_getSimbadIDs")
         dpg.show_item("resultsGroupSimbadIDs")
     else:
-        dpg.set_value(
-            "errorMessageSimbadIDs",
-            "Simbad doesn't have any IDs for this object"
+        showLookupError("Simbad doesn't have any IDs for this object")
+
+
+def resolveBatch() -> None:
+    global batchJob
+
+    cancelBatch()
+    dpg.hide_item("errorMessageSimbadBatch")
+    dpg.hide_item("btn_simbadBatchShow")
+    identifiers: List[str] = [
+        line for line in dpg.get_value("simbadBatchIDs").splitlines()
+        if line.strip() and not line.lstrip().startswith("#")
+    ]
+    if not identifiers:
+        showBatchError("No IDs provided.")
+        return
+
+    batchJob = Job("simbad-batch")
+    batchJob.onProgress = batchProgressed
+    dpg.set_value("simbadBatchStatus", "")
+    dpg.show_item("btn_simbadBatchCancel")
+    submitJob(
+        batchJob,
+        resolveIdentifiers,
+        identifiers,
+        onDone=batchResolved,
+        onError=batchFailed,
+        onCancelled=batchCancelled
+    )
+
+
+def cancelBatch() -> None:
+    if batchJob is not None:
+        batchJob.cancel()
+
+
+def batchProgressed(job: Job) -> None:
+    if job is batchJob:
+        dpg.set_value("simbadBatchStatus", job.stage)
+
+
+def batchResolved(
+    job: Job,
+    result: Tuple[Dict[str, List[str]], int]
+) -> None:
+    global batchResults
+
+    if job is not batchJob or batchResultsView is None:
+        return
+    import pandas
+    from .results import ResultBuffer
+
+    resolvedIDs, cachedCount = result
+    # one row for every ID, and a row without IDs for unknown objects
+    noIDs: List[Optional[str]] = [None]
+    rows: List[Tuple[str, Optional[str]]] = [
+        (requested, i)
+        for requested, ids in resolvedIDs.items()
+        for i in (ids or noIDs)
+    ]
+    batchResults = ResultBuffer.fromDataFrame(
+        pandas.DataFrame(rows, columns=["requested", "id"])
+    )
+    foundCount: int = sum(1 for ids in resolvedIDs.values() if ids)
+    dpg.hide_item("btn_simbadBatchCancel")
+    dpg.set_value(
+        "simbadBatchStatus",
+        " ".join((
+            f"Found {foundCount} of {len(resolvedIDs)} objects,",
+            f"{cachedCount} from cache"
+        ))
+    )
+    try:
+        batchResultsView.setData(
+            batchResults,
+            dpg.get_item_width("window_simbadIDs")
         )
-        dpg.show_item("errorMessageSimbadIDs")
-        dpg.hide_item("loadingAnimationSimbadIDs")
-        dpg.show_item("btn_getSimbadIDs")
+    except Exception as ex:
+        logging.error(f"Couldn't generate the results table. {ex}")
+        batchResultsView.clear()
+    dpg.show_item("btn_simbadBatchShow")
+
+
+def batchFailed(job: Job, ex: Exception) -> None:
+    if job is not batchJob:
         return
+    logging.debug(f"Resolving IDs in Simbad failed: {ex}")
+    showBatchError(str(ex))
+
+
+def batchCancelled(job: Job) -> None:
+    if job is batchJob:
+        showBatchError("Resolving was cancelled.")
+
+
+def showBatchError(errorMessage: str) -> None:
+    dpg.hide_item("btn_simbadBatchCancel")
+    dpg.set_value("simbadBatchStatus", "")
+    dpg.set_value("errorMessageSimbadBatch", errorMessage)
+    dpg.show_item("errorMessageSimbadBatch")
+
+
+def loadBatchFile(sender, app_data) -> None:
+    batchFile: pathlib.Path = pathlib.Path(app_data["file_path_name"])
+    try:
+        dpg.set_value(
+            "simbadBatchIDs",
+            batchFile.read_text(encoding="utf-8")
+        )
+    except (OSError, UnicodeDecodeError) as ex:
+        showBatchError(f"Couldn't read [{batchFile.name}]: {ex}")
+
+
+def showBatchInMainWindow() -> None:
+    if batchResults is not None:
+        showResults(batchResults, "(IDs resolved in Simbad)")
 
 
 def showSimbadIDsWindow() -> None:
@@ -178,7 +289,13 @@ def showSimbadIDsWindow() -> None:
     dpg.show_item("window_simbadIDs")
 
 
-def simbadWindow():
+def simbadWindow(
+    resultsShower: Callable[[ResultBuffer, str], bool]
+) -> None:
+    global showResults, batchResultsView
+
+    showResults = resultsShower
+
     with dpg.window(
         tag="window_simbadIDs",
         label="Simbad IDs",
@@ -222,3 +339,64 @@ def simbadWindow():
             dpg.add_text(default_value="Found the following IDs:")
             with dpg.table(tag="resultsTableSimbadIDs"):
                 dpg.add_table_column(label="ResultsSimbadIDs")
+
+        dpg.add_spacer()
+
+        with dpg.collapsing_header(label="Many IDs at once"):
+            dpg.add_text(
+                default_value=" ".join((
+                    "One ID per line (lines starting with # are skipped),",
+                    "all of them are resolved with one query."
+                )),
+                wrap=500
+            )
+            dpg.add_input_text(
+                tag="simbadBatchIDs",
+                multiline=True,
+                tab_input=True,
+                width=-1,
+                height=120
+            )
+            with dpg.group(horizontal=True):
+                dpg.add_button(label="Resolve", callback=resolveBatch)
+                dpg.add_button(
+                    label="Load from file",
+                    callback=lambda: dpg.show_item("dialogSimbadBatchFile")
+                )
+                dpg.add_button(
+                    tag="btn_simbadBatchCancel",
+                    label="Cancel",
+                    callback=cancelBatch,
+                    show=False
+                )
+                dpg.add_button(
+                    tag="btn_simbadBatchShow",
+                    label="Show in main window",
+                    callback=showBatchInMainWindow,
+                    show=False
+                )
+            dpg.add_text(tag="simbadBatchStatus", default_value="")
+            dpg.add_text(
+                tag="errorMessageSimbadBatch",
+                default_value="",
+                wrap=500,
+                show=False
+            )
+            dpg.add_group(tag="simbadBatchResultsGroup")
+
+    with dpg.file_dialog(
+        id="dialogSimbadBatchFile",
+        directory_selector=False,
+        width=800,
+        height=600,
+        modal=True,
+        show=False,
+        callback=loadBatchFile
+    ):
+        dpg.add_file_extension(".txt", color=(30, 225, 0))
+        dpg.add_file_extension(".*")
+
+    batchResultsView = ResultsTableView(
+        "simbadBatchResultsGroup",
+        "simbadBatchResultsTable"
+    )
@@ -0,0 +1,65 @@
+# 3rd-party dependencies
+#
+import pandas
+import pyarrow
+import pyarrow.ipc
+#
+# standard libraries
+#
+import pathlib
+import shutil
+import tempfile
+import weakref
+import logging
+#
+# own stuff
+#
+from . import config
+
+
+class SpillStorage:
+    """
+    Temporary directory with results that don't fit into memory. Every
+    file is written once, in Arrow IPC format, and then it is
+    memory-mapped, so the operating system pages its data in and out
+    of memory as it is being read, and slices of it are taken without
+    copying anything. The directory is deleted together with the object
+    (or on exit).
+    """
+
+    def __init__(self):
+        self.path: pathlib.Path = pathlib.Path(
+            tempfile.mkdtemp(
+                prefix="tap-adql-sandbox-",
+                dir=config.resultsSpillPath
+            )
+        )
+        self.filesCount: int = 0
+        # total size of the files, in bytes
+        self.size: int = 0
+        self._finalizer = weakref.finalize(
+            self,
+            shutil.rmtree,
+            str(self.path),
+            ignore_errors=True
+        )
+        logging.debug(f"Spilling results to [{self.path}]")
+
+    def write(self, data: pandas.DataFrame) -> pyarrow.Table:
+        """
+        Writes the data to a new file and returns a memory-mapped table
+        with its contents.
+        """
+        table = pyarrow.Table.from_pandas(data, preserve_index=False)
+        filePath = self.path / f"{self.filesCount}.arrow"
+        self.filesCount += 1
+        with pyarrow.OSFile(str(filePath), "wb") as f:
+            with pyarrow.ipc.new_file(f, table.schema) as writer:
+                writer.write_table(table)
+        self.size += filePath.stat().st_size
+        return pyarrow.ipc.open_file(
+            pyarrow.memory_map(str(filePath))
+        ).read_all()
+
+    def remove(self) -> None:
+        self._finalizer()
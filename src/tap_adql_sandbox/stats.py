@@ -0,0 +1,149 @@
+# standard libraries
+#
+import contextlib
+import json
+import pathlib
+import threading
+import time
+import typing
+#
+# own stuff
+#
+from . import config
+
+# phases of executing a query, in the order they happen
+phaseNames: typing.Dict[str, str] = {
+    "cache": "Looking up results in cache",
+    "connect": "DNS lookup and connecting",
+    "submit": "Submitting async job",
+    "server": "Waiting for async job",
+    "response": "Waiting for the first byte",
+    "download": "Downloading",
+    "parse": "Parsing VOTable",
+    "convert": "Converting and storing results",
+    "ui": "Building results table"
+}
+
+
+# phases that are being measured in every thread, the innermost last,
+# each as its stats and the time of the phases measured inside of it
+measuring: threading.local = threading.local()
+
+
+def measuringStack() -> typing.List[typing.List[typing.Any]]:
+    if not hasattr(measuring, "stack"):
+        measuring.stack = []
+    return measuring.stack
+
+
+class QueryStats:
+    """
+    How long each phase of executing a query took and how much data
+    was downloaded. Phases can be measured several times (for every
+    chunk of results, for example), their time is summed up. Stats
+    of partitions or pages of the query are merged into the stats
+    of the whole query, so their phases might take longer in total
+    than the query itself, as partitions are executed in parallel.
+    """
+
+    def __init__(self, serviceURL: str = "", queryText: str = ""):
+        self.serviceURL: str = serviceURL
+        self.queryText: str = queryText
+        self.startedTime: float = time.time()
+        # phase => seconds
+        self.phases: typing.Dict[str, float] = {}
+        self.bytesCount: int = 0
+        self.rowsCount: int = 0
+        self.fromCache: bool = False
+        self.status: str = "running"
+        self.totalTime: float = 0.0
+
+        self._startCounter: float = time.perf_counter()
+        # partitions are measured from several threads
+        self._lock: threading.Lock = threading.Lock()
+
+    @property
+    def throughput(self) -> float:
+        """
+        Download speed, in bytes per second.
+        """
+        downloadTime: float = self.phases.get("download", 0.0)
+        return self.bytesCount / downloadTime if downloadTime > 0 else 0.0
+
+    def add(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def measure(self, phase: str):
+        """
+        Adds the time of the block to the phase, except for the time
+        of the phases that are measured inside of it in the same thread
+        (such as opening a connection while waiting for the response).
+        """
+        stack = measuringStack()
+        measured: typing.List[typing.Any] = [self, 0.0]
+        stack.append(measured)
+        startTime: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds: float = time.perf_counter() - startTime
+            stack.pop()
+            self.add(phase, seconds - measured[1])
+            if stack:
+                stack[-1][1] += seconds
+
+    def merge(self, other: "QueryStats") -> None:
+        for phase, seconds in list(other.phases.items()):
+            self.add(phase, seconds)
+        with self._lock:
+            self.bytesCount += other.bytesCount
+
+    def finish(self, status: str, rowsCount: int = 0) -> None:
+        self.status = status
+        self.rowsCount = rowsCount
+        self.totalTime = time.perf_counter() - self._startCounter
+
+    def toDict(self) -> typing.Dict[str, typing.Any]:
+        return {
+            "serviceURL": self.serviceURL,
+            "query": self.queryText,
+            "started": self.startedTime,
+            "status": self.status,
+            "fromCache": self.fromCache,
+            "rows": self.rowsCount,
+            "bytes": self.bytesCount,
+            "throughput": self.throughput,
+            "total": self.totalTime,
+            "phases": dict(self.phases)
+        }
+
+
+# stats of the last `config.queryStatsHistoryMax` queries, the latest last
+history: typing.List[QueryStats] = []
+
+
+def addToHistory(stats: QueryStats) -> None:
+    history.append(stats)
+    del history[:-config.queryStatsHistoryMax]
+
+
+def exportHistory(filePath: pathlib.Path) -> None:
+    with open(filePath, "w", encoding="utf-8") as f:
+        json.dump([s.toDict() for s in history], f, indent=4)
+
+
+@contextlib.contextmanager
+def measureConnecting():
+    """
+    Measures opening of a new connection as the `connect` phase
+    of the query, which phase is being measured in this thread (if any),
+    see `connections.py`.
+    """
+    stack = measuringStack()
+    if not stack:
+        yield
+        return
+    with stack[-1][0].measure("connect"):
+        yield
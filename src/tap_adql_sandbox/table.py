@@ -0,0 +1,880 @@
+from __future__ import annotations
+# 3rd-party dependencies
+#
+import dearpygui.dearpygui as dpg
+#
+# standard libraries
+#
+import logging
+import typing
+import weakref
+#
+# own stuff
+#
+from . import config
+from . import jobs
+from .theme import (
+    styleScrollbarWidth,
+    getCellHighlightedTheme,
+    getCellSelectedTheme
+)
+
+# NumPy and pandas take a while to import, so they (and the modules
+# that need them) are imported only when there are results to show
+if typing.TYPE_CHECKING:
+    import numpy
+    import pandas
+    from .results import ResultBuffer
+
+copiedCellText: str = "[copied]"
+
+# modifier keys are named differently in different versions of Dear PyGui
+shiftKeys: typing.Tuple[str, ...] = (
+    "mvKey_ModShift", "mvKey_LShift", "mvKey_RShift", "mvKey_Shift"
+)
+controlKeys: typing.Tuple[str, ...] = (
+    "mvKey_ModCtrl", "mvKey_ModSuper",
+    "mvKey_LControl", "mvKey_RControl", "mvKey_Control"
+)
+
+
+# one mouse click handler for all the tables, which finds the clicked cell
+# by positions of the cells, instead of every cell having a handler
+clickHandler: str = "cells-click-handler"
+clickTargets: "weakref.WeakSet[ClickableCells]" = weakref.WeakSet()
+
+
+def isKeyDown(keys: typing.Tuple[str, ...]) -> bool:
+    return any(
+        dpg.is_key_down(getattr(dpg, k)) for k in keys if hasattr(dpg, k)
+    )
+
+
+def getWindow(item: typing.Union[int, str]) -> typing.Union[int, str]:
+    parent = dpg.get_item_parent(item)
+    while parent:
+        item = parent
+        parent = dpg.get_item_parent(item)
+    return item
+
+
+def getVisibleRects(
+    cells: typing.Sequence[int]
+) -> typing.List[typing.Tuple[int, typing.List[float]]]:
+    """
+    Indexes and top left corners of the cells, that were visible
+    in the last frame (not clipped, in a shown window and tab).
+    """
+    rects: typing.List[typing.Tuple[int, typing.List[float]]] = []
+    for i, cellID in enumerate(cells):
+        state = dpg.get_item_state(cellID)
+        if state.get("visible"):
+            rects.append((i, state["rect_min"]))
+    return rects
+
+
+class ClickableCells:
+    """
+    Cells of a table, clicks on which are resolved to (row, column)
+    by where the cells are: rows are found by the tops of the cells
+    of a visible column, and columns by the left sides of the cells
+    of a visible row, so only those have to be looked at, and only
+    when there is a click. Cells are given as rows of IDs, in the order
+    they are shown, inside of the `bounds` item.
+    """
+
+    def __init__(
+        self,
+        onClick: typing.Callable[[int, int, int, int], None]
+    ):
+        # called with mouse button, row, column and cell ID
+        self.onClick = onClick
+        self.rows: typing.List[typing.List[int]] = []
+        self.bounds: typing.Union[int, str] = 0
+        clickTargets.add(self)
+
+    def setCells(
+        self,
+        rows: typing.List[typing.List[int]],
+        bounds: typing.Union[int, str]
+    ) -> None:
+        if not dpg.does_item_exist(clickHandler):
+            with dpg.handler_registry(tag=clickHandler):
+                dpg.add_mouse_click_handler(callback=cellsClicked)
+        self.rows = rows
+        self.bounds = bounds
+
+    def clearCells(self) -> None:
+        self.rows = []
+        self.bounds = 0
+
+    def isHovered(self) -> bool:
+        """
+        Whether the mouse is over the window of the cells and not over
+        another window on top of it. A window might not count as hovered
+        while the mouse is over a child window inside of it (such as
+        a table that scrolls horizontally), so the cells bounds are
+        checked as well.
+        """
+        return bool(
+            dpg.is_item_hovered(getWindow(self.bounds))
+            or
+            dpg.is_item_hovered(self.bounds)
+        )
+
+    def cellAt(
+        self,
+        x: float,
+        y: float
+    ) -> typing.Optional[typing.Tuple[int, int]]:
+        if (
+            not self.rows
+            or
+            not dpg.does_item_exist(self.bounds)
+            or
+            not dpg.is_item_visible(self.bounds)
+        ):
+            return None
+        boundsMin = dpg.get_item_rect_min(self.bounds)
+        boundsMax = dpg.get_item_rect_max(self.bounds)
+        if not (
+            boundsMin[0] <= x < boundsMax[0]
+            and
+            boundsMin[1] <= y < boundsMax[1]
+        ):
+            return None
+        # the first column, unless the table is scrolled horizontally
+        rowsRects: typing.List[typing.Tuple[int, typing.List[float]]] = []
+        for c in range(len(self.rows[0])):
+            rowsRects = getVisibleRects([r[c] for r in self.rows])
+            if rowsRects:
+                break
+        row: typing.Optional[int] = next(
+            (r for r, rect in reversed(rowsRects) if rect[1] <= y),
+            None
+        )
+        if row is None:
+            return None
+        columnsRects = getVisibleRects(self.rows[row])
+        column: typing.Optional[int] = next(
+            (c for c, rect in reversed(columnsRects) if rect[0] <= x),
+            None
+        )
+        if column is None:
+            return None
+        return row, column
+
+
+def cellsClicked(sender, app_data) -> None:
+    # states of items (visibility, positions) are only valid
+    # for the frame that has just been rendered, and this is called
+    # from the callbacks thread, so finding the cell is left
+    # to the render loop, which gets to it between frames
+    x, y = dpg.get_mouse_pos(local=False)
+    jobs.callOnUiThread(findClickedCell, app_data, x, y)
+
+
+def findClickedCell(button: int, x: float, y: float) -> None:
+    hits: typing.List[
+        typing.Tuple[ClickableCells, typing.Tuple[int, int]]
+    ] = []
+    for target in list(clickTargets):
+        cell = target.cellAt(x, y)
+        # the click is for whatever window is on top, which might
+        # not have clickable cells at all, like the Simbad window
+        if cell is not None and target.isHovered():
+            hits.append((target, cell))
+    if hits:
+        target, (row, column) = hits[0]
+        target.onClick(button, row, column, target.rows[row][column])
+
+
+def showCellCopied(
+    cellID: int,
+    restore: typing.Callable[[], None]
+) -> None:
+    """
+    Shows in the cell that its value was copied, and calls `restore()`
+    from the render loop after a while, without blocking anything.
+    """
+    dpg.set_value(cellID, copiedCellText)
+    dpg.bind_item_theme(cellID, getCellHighlightedTheme())
+    jobs.callLater(config.cellCopiedFeedbackTime, restore)
+
+
+def restoreCopiedCell(cellID: int, cellValue: str) -> None:
+    if (
+        dpg.does_item_exist(cellID)
+        and
+        dpg.get_value(cellID) == copiedCellText
+    ):
+        dpg.set_value(cellID, cellValue)
+        dpg.bind_item_theme(cellID, 0)
+
+
+def copyCellText(cellID: int) -> None:
+    """
+    Copies the value of the cell, as it is shown.
+    """
+    cellValue: str = dpg.get_value(cellID)
+    if cellValue == copiedCellText:
+        return
+    dpg.set_clipboard_text(cellValue)
+    showCellCopied(cellID, lambda: restoreCopiedCell(cellID, cellValue))
+
+
+def cellText(value: typing.Any) -> str:
+    """
+    Value as it is in results, not as it is formatted in the table.
+    """
+    import numpy
+    import pandas
+
+    if numpy.ndim(value) == 0 and pandas.isna(value):
+        return ""
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return str(value)
+
+
+def rowsToText(
+    data: pandas.DataFrame,
+    separator: str,
+    header: bool = True
+) -> str:
+    """
+    Rows as delimited text (TSV or CSV), with values in full precision
+    and strings of bytes decoded.
+    """
+    # a single value goes as it is, without quotes for an empty one
+    if data.shape == (1, 1) and not header:
+        return cellText(data.iat[0, 0])
+    decoded = {
+        c: data[c].map(
+            lambda v: v.decode("utf-8", errors="replace")
+            if isinstance(v, bytes)
+            else v
+        )
+        for c in data.columns
+        if data[c].dtype == object
+    }
+    return data.assign(**decoded).to_csv(
+        sep=separator,
+        index=False,
+        header=header
+    ).rstrip("\r\n")
+
+
+class ResultsTableView:
+    """
+    Paged view of a results buffer. Only the rows that fit into
+    the page (`config.resultsTableRowsVisible`) are created as widgets,
+    and scrolling just changes the values of those, so the time it takes
+    to build the table does not depend on the number of rows in results.
+    The buffer can still be receiving rows, in which case the view
+    is told about that with `dataAppended()`.
+
+    Rows can be sorted by clicking column headers, filtered by
+    an expression and searched for a text. That only changes which rows
+    of the buffer go into the page cells, the table isn't rebuilt.
+
+    Clicking a cell selects it, clicking a row number selects the whole
+    row, and Ctrl+click selects the whole column. Shift+click extends
+    the selection to a rectangle, even across pages. Selected values
+    are copied from the buffer (not from the cells, which only show
+    formatted values of a single page) as TSV or CSV. Right click copies
+    the value of a single cell.
+    """
+
+    def __init__(
+        self,
+        parent: typing.Union[int, str],
+        tag: str,
+        selectable: bool = True
+    ):
+        self.parent = parent
+        self.tag: str = tag
+        self.clickableCells: typing.Optional[ClickableCells] = (
+            ClickableCells(self.cellClicked) if selectable else None
+        )
+        self.data: typing.Optional[ResultBuffer] = None
+        self.firstRow: int = 0
+        self.pageRows: int = 0
+        self.isPaged: bool = False
+        self.windowWidth: int = 0
+        self.enumerationCells: typing.List[int] = []
+        self.cells: typing.List[typing.List[int]] = []
+        self.rangeText: int = 0
+        self.scrollbar: int = 0
+        # row numbers of the buffer in the order they are shown,
+        # None is all of them as they are
+        self.rows: typing.Optional[numpy.ndarray] = None
+        self.sortColumn: typing.Optional[str] = None
+        self.sortAscending: bool = True
+        self.filterExpression: str = ""
+        self.searchText: str = ""
+        self.orderStatus: int = 0
+        # table column ID => results column name
+        self.columnIDs: typing.Dict[int, str] = {}
+        # selected cells: (first row, last row, first column, last column),
+        # with rows numbered as they are shown, and the cell where
+        # the selection started, with None instead of a row or a column
+        # for selecting whole columns or rows
+        self.selection: typing.Optional[
+            typing.Tuple[int, int, int, int]
+        ] = None
+        self.selectionAnchor: typing.Optional[
+            typing.Tuple[typing.Optional[int], typing.Optional[int]]
+        ] = None
+        self.selectedCells: typing.Set[int] = set()
+        self.selectionGroup: int = 0
+        self.selectionStatus: int = 0
+        self.copyJob: typing.Optional[jobs.Job] = None
+
+    @property
+    def rowsCount(self) -> int:
+        """
+        How many rows are shown (after filtering).
+        """
+        if self.data is None:
+            return 0
+        return self.data.rowsCount if self.rows is None else len(self.rows)
+
+    @property
+    def lastFirstRow(self) -> int:
+        return max(0, self.rowsCount - self.pageRows)
+
+    def clear(self) -> None:
+        if dpg.does_item_exist(self.tag):
+            dpg.delete_item(self.tag)
+        self.data = None
+        self.firstRow = 0
+        self.pageRows = 0
+        self.isPaged = False
+        self.enumerationCells = []
+        self.cells = []
+        self.rangeText = 0
+        self.scrollbar = 0
+        self.orderStatus = 0
+        self.columnIDs = {}
+        self.selection = None
+        self.selectionAnchor = None
+        self.selectedCells = set()
+        self.selectionGroup = 0
+        self.selectionStatus = 0
+        if self.clickableCells is not None:
+            self.clickableCells.clearCells()
+        self.resetOrder()
+
+    def destroy(self) -> None:
+        self.clear()
+        if self.clickableCells is not None:
+            clickTargets.discard(self.clickableCells)
+
+    def resetOrder(self) -> None:
+        self.rows = None
+        self.sortColumn = None
+        self.sortAscending = True
+        self.filterExpression = ""
+        self.searchText = ""
+
+    def setData(
+        self,
+        data: ResultBuffer,
+        windowWidth: int,
+        firstRow: int = 0
+    ) -> None:
+        # rebuilding the table for the same results keeps their order
+        order = (
+            (
+                self.sortColumn,
+                self.sortAscending,
+                self.filterExpression,
+                self.searchText
+            )
+            if data is self.data
+            else None
+        )
+        self.clear()
+        self.data = data
+        if order is not None:
+            (
+                self.sortColumn,
+                self.sortAscending,
+                self.filterExpression,
+                self.searchText
+            ) = order
+        self.windowWidth = windowWidth
+        rowsCount: int = data.rowsCount
+        columnsCount: int = data.columnsCount
+        self.pageRows = min(rowsCount, config.resultsTableRowsVisible)
+        isPaged: bool = rowsCount > self.pageRows
+        self.isPaged = isPaged
+        hasEnumerationColumn: bool = (
+            not config.noEnumerationColumn and rowsCount > 1
+        )
+        # when there isn't that many columns,
+        # squeezed table doesn't look nice
+        addHorizontalScroll = windowWidth / max(columnsCount, 1) < 150
+
+        with dpg.group(parent=self.parent, tag=self.tag):
+            with dpg.group(horizontal=True):
+                dpg.add_input_text(
+                    hint="filter, such as: ra > 10 and dec < 0",
+                    default_value=self.filterExpression,
+                    width=300,
+                    on_enter=True,
+                    callback=self.filterChanged
+                )
+                dpg.add_input_text(
+                    hint="search text",
+                    default_value=self.searchText,
+                    width=200,
+                    on_enter=True,
+                    callback=self.searchChanged
+                )
+                dpg.add_button(label="Reset", callback=self.orderReset)
+                self.orderStatus = dpg.add_text(default_value="")
+            with dpg.group(
+                horizontal=True,
+                show=False
+            ) as self.selectionGroup:
+                dpg.add_button(
+                    label="Copy TSV",
+                    callback=lambda: self.copySelection("\t")
+                )
+                dpg.add_button(
+                    label="Copy CSV",
+                    callback=lambda: self.copySelection(",")
+                )
+                dpg.add_button(label="Clear", callback=self.clearSelection)
+                self.selectionStatus = dpg.add_text(default_value="")
+            with dpg.group(horizontal=True, show=isPaged):
+                dpg.add_button(
+                    label="<<",
+                    callback=lambda: self.scrollTo(0)
+                )
+                dpg.add_button(
+                    label="<",
+                    callback=lambda: self.scrollBy(-self.pageRows)
+                )
+                dpg.add_button(
+                    label=">",
+                    callback=lambda: self.scrollBy(self.pageRows)
+                )
+                dpg.add_button(
+                    label=">>",
+                    callback=lambda: self.scrollTo(self.lastFirstRow)
+                )
+                self.rangeText = dpg.add_text(default_value="")
+            with dpg.group(horizontal=True):
+                # clicks on cells are resolved by their positions
+                # inside of that group, which is just as large as the table
+                with dpg.group() as tableBounds:
+                    with dpg.table(
+                        header_row=True,
+                        resizable=True,
+                        sortable=True,
+                        callback=self.sortChanged,
+                        borders_outerH=True,
+                        borders_innerV=True,
+                        borders_innerH=True,
+                        borders_outerV=True,
+                        # row_background=True,
+                        # freeze_rows=0,
+                        # freeze_columns=1,
+                        # scrollY=True,
+                        policy=(
+                            dpg.mvTable_SizingFixedSame
+                            if addHorizontalScroll
+                            else dpg.mvTable_SizingStretchProp
+                        ),
+                        scrollX=addHorizontalScroll,
+                        # leave some space for the scrollbar
+                        width=(-2 * styleScrollbarWidth if isPaged else 0)
+                    ):
+                        if hasEnumerationColumn:
+                            dpg.add_table_column(label="#", no_sort=True)
+                        for header in data.columns:
+                            isSorted: bool = header == self.sortColumn
+                            columnID = dpg.add_table_column(
+                                label=header,
+                                default_sort=isSorted,
+                                prefer_sort_ascending=(
+                                    isSorted and self.sortAscending
+                                ),
+                                prefer_sort_descending=(
+                                    isSorted and not self.sortAscending
+                                )
+                            )
+                            self.columnIDs[columnID] = header
+                        for r in range(self.pageRows):
+                            with dpg.table_row():
+                                if hasEnumerationColumn:
+                                    self.enumerationCells.append(
+                                        dpg.add_text(default_value="")
+                                    )
+                                self.cells.append(
+                                    [
+                                        dpg.add_text(default_value="")
+                                        for c in range(columnsCount)
+                                    ]
+                                )
+                if isPaged:
+                    # vertical slider has its minimum at the bottom,
+                    # so its value is inverted to act as a scrollbar
+                    self.scrollbar = dpg.add_slider_int(
+                        vertical=True,
+                        min_value=0,
+                        max_value=self.lastFirstRow,
+                        default_value=self.lastFirstRow,
+                        format="",
+                        width=styleScrollbarWidth,
+                        height=self.pageRows * config.resultsTableRowHeight,
+                        callback=lambda sender, app_data: self.scrollTo(
+                            self.lastFirstRow - app_data
+                        )
+                    )
+                    # once the table is rendered, the scrollbar
+                    # can get exactly the same height
+                    dpg.set_frame_callback(
+                        dpg.get_frame_count() + 1,
+                        callback=lambda: self.fitScrollbar(tableBounds)
+                    )
+
+        if self.clickableCells is not None:
+            # the first column has row numbers, if there is one
+            self.clickableCells.setCells(
+                [
+                    [e] + rowCells
+                    for e, rowCells in zip(self.enumerationCells, self.cells)
+                ]
+                if self.enumerationCells
+                else self.cells,
+                tableBounds
+            )
+        self.applyOrder(firstRow)
+
+    def dataAppended(self) -> None:
+        """
+        Catches up with the rows that were appended to the buffer since
+        the table was built. The table only needs to be rebuilt while
+        the page isn't full yet, otherwise it is enough to let the pager
+        and the scrollbar know about the new rows count.
+        """
+        if self.data is None:
+            return
+        pageRows: int = min(
+            self.data.rowsCount,
+            config.resultsTableRowsVisible
+        )
+        isPaged: bool = self.data.rowsCount > pageRows
+        if pageRows != self.pageRows or isPaged != self.isPaged:
+            self.setData(self.data, self.windowWidth, self.firstRow)
+            return
+        # new rows might get in between the sorted or filtered ones
+        if self.rows is not None:
+            self.clearSelection()
+        self.applyOrder(self.firstRow)
+
+    def applyOrder(self, firstRow: int = 0) -> None:
+        """
+        Sorts and filters the rows (if that is set) and shows the page
+        starting with `firstRow`. Sort indexes of columns are computed
+        once, so sorting by the same column again takes no time.
+        """
+        from .ordering import orderRows
+
+        if self.data is None:
+            return
+        try:
+            self.rows = orderRows(
+                self.data,
+                self.sortColumn,
+                self.sortAscending,
+                self.filterExpression,
+                self.searchText
+            )
+            status: str = (
+                ""
+                if self.rows is None
+                else f"{len(self.rows)} of {self.data.rowsCount} rows"
+            )
+        except Exception as ex:
+            logging.debug(f"Couldn't filter results. {ex}")
+            self.rows = None
+            status = f"Invalid filter: {ex}"
+        if self.orderStatus:
+            dpg.set_value(self.orderStatus, status)
+        if self.scrollbar:
+            dpg.configure_item(self.scrollbar, max_value=self.lastFirstRow)
+        self.scrollTo(firstRow)
+
+    def sortChanged(self, sender, app_data) -> None:
+        # app_data is [[column ID, direction]], or None if sorting
+        # was turned off
+        if app_data:
+            columnID, direction = app_data[0]
+            self.sortColumn = self.columnIDs.get(columnID)
+            self.sortAscending = direction >= 0
+        else:
+            self.sortColumn = None
+        self.clearSelection()
+        self.applyOrder()
+
+    def filterChanged(self, sender, app_data: str) -> None:
+        self.filterExpression = app_data.strip()
+        self.clearSelection()
+        self.applyOrder()
+
+    def searchChanged(self, sender, app_data: str) -> None:
+        self.searchText = app_data.strip()
+        self.clearSelection()
+        self.applyOrder()
+
+    def orderReset(self) -> None:
+        # the table is rebuilt to reset the inputs and sorting headers
+        self.resetOrder()
+        data = self.data
+        if data is None:
+            return
+        self.data = None
+        self.setData(data, self.windowWidth)
+
+    def fitScrollbar(self, tableBounds: int) -> None:
+        if not dpg.does_item_exist(tableBounds) or not self.scrollbar:
+            return
+        tableHeight = dpg.get_item_rect_size(tableBounds)[1]
+        if tableHeight > 0:
+            dpg.configure_item(self.scrollbar, height=tableHeight)
+
+    def scrollBy(self, rows: int) -> None:
+        self.scrollTo(self.firstRow + rows)
+
+    def scrollTo(self, firstRow: int) -> None:
+        self.firstRow = max(0, min(firstRow, self.lastFirstRow))
+        self.refresh()
+
+    def refresh(self) -> None:
+        """
+        Puts the values of the current page rows into the cells.
+        """
+        import numpy
+        from .formatting import formatRows
+
+        if self.data is None:
+            return
+        pageStop: int = self.firstRow + self.pageRows
+        if self.rows is None:
+            page = self.data.slice(self.firstRow, pageStop)
+            pageRows = numpy.arange(self.firstRow, self.firstRow + len(page))
+        else:
+            pageRows = self.rows[self.firstRow:pageStop]
+            page = self.data.take(pageRows)
+        pageColumns = formatRows(page)
+        # filtered rows might not fill the whole page
+        shownCount: int = len(page)
+        for r, rowCells in enumerate(self.cells):
+            for c, cellID in enumerate(rowCells):
+                dpg.set_value(
+                    cellID,
+                    pageColumns[c][r] if r < shownCount else ""
+                )
+        # numbers of rows in the results, whichever way they are sorted
+        for r, cellID in enumerate(self.enumerationCells):
+            dpg.set_value(
+                cellID,
+                f"{pageRows[r] + 1}" if r < shownCount else ""
+            )
+
+        if self.rangeText:
+            dpg.set_value(
+                self.rangeText,
+                "".join((
+                    f"rows {self.firstRow + 1}-",
+                    f"{self.firstRow + shownCount} ",
+                    f"of {self.rowsCount}"
+                ))
+                if shownCount
+                else "no rows"
+            )
+        if self.scrollbar:
+            dpg.set_value(self.scrollbar, self.lastFirstRow - self.firstRow)
+        self.highlightSelection()
+
+    def cellClicked(
+        self,
+        button: int,
+        pageRow: int,
+        clickedColumn: int,
+        cellID: int
+    ) -> None:
+        # row numbers are the first column, if there is one,
+        # clicking them selects whole rows
+        column: typing.Optional[int] = (
+            clickedColumn - 1 if self.enumerationCells else clickedColumn
+        )
+        if column is not None and column < 0:
+            column = None
+        row: int = self.firstRow + pageRow
+        if row >= self.rowsCount:
+            return
+        if button == 1 and column is not None:
+            self.copyCell(cellID, row, column)
+        elif button == 0:
+            wholeColumn: bool = column is not None and isKeyDown(controlKeys)
+            self.select(
+                None if wholeColumn else row,
+                column,
+                isKeyDown(shiftKeys)
+            )
+
+    def bufferRows(self, firstRow: int, lastRow: int) -> numpy.ndarray:
+        """
+        Numbers of the buffer rows, which are shown at these positions.
+        """
+        import numpy
+
+        if self.rows is None:
+            return numpy.arange(firstRow, lastRow + 1)
+        return self.rows[firstRow:lastRow + 1]
+
+    def copyCell(self, cellID: int, row: int, column: int) -> None:
+        if self.data is None or dpg.get_value(cellID) == copiedCellText:
+            return
+        value = self.data.take(self.bufferRows(row, row)).iat[0, column]
+        dpg.set_clipboard_text(cellText(value))
+        self.selectedCells.discard(cellID)
+        showCellCopied(cellID, lambda: self.cellCopied(cellID))
+
+    def cellCopied(self, cellID: int) -> None:
+        if not dpg.does_item_exist(cellID):
+            return
+        dpg.bind_item_theme(cellID, 0)
+        self.refresh()
+
+    def select(
+        self,
+        row: typing.Optional[int],
+        column: typing.Optional[int],
+        extend: bool = False
+    ) -> None:
+        """
+        Selects the cell, or the whole row (if column is None) or column
+        (if row is None). Extending makes a rectangle with the cell where
+        the selection started.
+        """
+        if self.data is None:
+            return
+        if not extend or self.selectionAnchor is None:
+            self.selectionAnchor = (row, column)
+        anchorRow, anchorColumn = self.selectionAnchor
+        rows = (
+            (0, self.rowsCount - 1)
+            if row is None or anchorRow is None
+            else (min(row, anchorRow), max(row, anchorRow))
+        )
+        columns = (
+            (0, self.data.columnsCount - 1)
+            if column is None or anchorColumn is None
+            else (min(column, anchorColumn), max(column, anchorColumn))
+        )
+        selection = rows + columns
+        # clicking the only selected cell (row, column) again unselects it
+        if not extend and selection == self.selection:
+            self.clearSelection()
+            return
+        self.selection = selection
+        self.highlightSelection()
+
+    def clearSelection(self) -> None:
+        self.selection = None
+        self.selectionAnchor = None
+        self.highlightSelection()
+
+    def highlightSelection(self) -> None:
+        """
+        Highlights the selected cells of the current page, changing
+        themes only of the cells which selection has changed.
+        """
+        selectedCells: typing.Set[int] = set()
+        if self.selection is not None:
+            firstRow, lastRow, firstColumn, lastColumn = self.selection
+            for r, rowCells in enumerate(self.cells):
+                if firstRow <= self.firstRow + r <= lastRow:
+                    selectedCells.update(
+                        rowCells[firstColumn:lastColumn + 1]
+                    )
+        for cellID in self.selectedCells - selectedCells:
+            dpg.bind_item_theme(cellID, 0)
+        for cellID in selectedCells - self.selectedCells:
+            dpg.bind_item_theme(cellID, getCellSelectedTheme())
+        self.selectedCells = selectedCells
+
+        if self.selectionGroup:
+            dpg.configure_item(
+                self.selectionGroup,
+                show=self.selection is not None
+            )
+        if self.selectionStatus and self.selection is not None:
+            firstRow, lastRow, firstColumn, lastColumn = self.selection
+            dpg.set_value(
+                self.selectionStatus,
+                " ".join((
+                    f"{lastRow - firstRow + 1} rows",
+                    f"x {lastColumn - firstColumn + 1} columns selected"
+                ))
+            )
+
+    def copySelection(self, separator: str) -> None:
+        """
+        Copies the selected values, with a header if there is more than
+        one row. Converting many rows to text takes a while, so that
+        is done in a background job.
+        """
+        if self.selection is None or self.data is None:
+            return
+        if self.copyJob is not None:
+            self.copyJob.cancel()
+        firstRow, lastRow, firstColumn, lastColumn = self.selection
+        rows = self.bufferRows(firstRow, lastRow)
+        isOrdered: bool = self.rows is not None
+        columns: typing.List[str] = (
+            self.data.columns[firstColumn:lastColumn + 1]
+        )
+        dpg.set_value(self.selectionStatus, "Copying...")
+        self.copyJob = jobs.submitJob(
+            jobs.Job("copy selection"),
+            lambda job, data: rowsToText(
+                (
+                    data.take(rows)
+                    if isOrdered
+                    else data.slice(firstRow, lastRow + 1)
+                )[columns],
+                separator,
+                header=len(rows) > 1
+            ),
+            self.data,
+            onDone=self.selectionCopied,
+            onError=self.selectionCopyFailed
+        )
+
+    def selectionCopied(self, job: jobs.Job, text: str) -> None:
+        if job is not self.copyJob:
+            return
+        self.copyJob = None
+        dpg.set_clipboard_text(text)
+        if self.selectionStatus:
+            dpg.set_value(self.selectionStatus, "Copied")
+            jobs.callLater(
+                config.cellCopiedFeedbackTime,
+                self.highlightSelection
+            )
+
+    def selectionCopyFailed(self, job: jobs.Job, ex: Exception) -> None:
+        if job is not self.copyJob:
+            return
+        self.copyJob = None
+        logging.error(f"Couldn't copy selected values. {ex}")
+        if self.selectionStatus:
+            dpg.set_value(self.selectionStatus, f"Couldn't copy. {ex}")
@@ -0,0 +1,200 @@
+from __future__ import annotations
+# 3rd-party dependencies
+#
+import dearpygui.dearpygui as dpg
+#
+# standard libraries
+#
+import time
+import logging
+import typing
+#
+# own stuff
+#
+from . import config
+from . import jobs
+from .query import formatBytes
+from .table import ResultsTableView
+
+if typing.TYPE_CHECKING:
+    from .results import ResultBuffer
+
+
+class ResultsTab:
+    def __init__(
+        self,
+        tabID: int,
+        title: str,
+        buffer: ResultBuffer,
+        view: ResultsTableView,
+        key: typing.Optional[str] = None
+    ):
+        self.tabID: int = tabID
+        self.title: str = title
+        self.buffer: ResultBuffer = buffer
+        self.view: ResultsTableView = view
+        # tabs with a key get new results instead of new tabs being opened
+        self.key: typing.Optional[str] = key
+        # where the results came from, shown above the table
+        self.status: str = ""
+        self.lastActive: float = time.monotonic()
+        self.spilling: bool = False
+
+    @property
+    def label(self) -> str:
+        if self.buffer.memorySize == 0 and self.buffer.isSpilled:
+            return f"{self.title} (on disk)"
+        return f"{self.title} ({formatBytes(self.buffer.memorySize)})"
+
+
+class ResultsTabs:
+    """
+    Results of several queries, each in its own tab with its own table
+    view, so they can be compared side by side. Once all the tabs
+    together take more than `config.resultsTabsMemoryMax` bytes
+    of memory, results of the tabs that haven't been looked at
+    for the longest time are spilled to disk (see `ResultBuffer.spill()`),
+    and they are read from there if those tabs are opened again.
+    """
+
+    def __init__(self, tabBar: str):
+        self.tabBar: str = tabBar
+        self.tabs: typing.List[ResultsTab] = []
+        self.activeTab: typing.Optional[ResultsTab] = None
+        # called when another tab gets active (with None when the last
+        # tab is closed) or when memory taken by the tabs changes
+        self.onChanged: typing.Optional[
+            typing.Callable[[typing.Optional[ResultsTab]], None]
+        ] = None
+        self._tabsCount: int = 0
+
+    @property
+    def memorySize(self) -> int:
+        return sum(t.buffer.memorySize for t in self.tabs)
+
+    def findTab(
+        self,
+        buffer: ResultBuffer,
+        key: typing.Optional[str] = None
+    ) -> typing.Optional[ResultsTab]:
+        for tab in self.tabs:
+            if tab.buffer is buffer or (key is not None and tab.key == key):
+                return tab
+        return None
+
+    def getTab(
+        self,
+        buffer: ResultBuffer,
+        key: typing.Optional[str] = None
+    ) -> ResultsTab:
+        """
+        Returns the tab with these results (or with that key, which then
+        gets these results), opening a new one if there isn't such.
+        The tab becomes active.
+        """
+        tab = self.findTab(buffer, key)
+        if tab is None:
+            self._tabsCount += 1
+            title: str = f"Results {self._tabsCount}"
+            tabID: int = dpg.add_tab(parent=self.tabBar, label=title)
+            tab = ResultsTab(
+                tabID,
+                title,
+                buffer,
+                ResultsTableView(tabID, f"resultsTable-{self._tabsCount}"),
+                key
+            )
+            self.tabs.append(tab)
+        tab.buffer = buffer
+        self.activate(tab)
+        return tab
+
+    def activate(self, tab: ResultsTab) -> None:
+        if dpg.get_value(self.tabBar) != tab.tabID:
+            dpg.set_value(self.tabBar, tab.tabID)
+        self._setActive(tab)
+
+    def tabSelected(self, sender, app_data) -> None:
+        """
+        Callback of the tab bar, app_data is the ID of the selected tab.
+        """
+        tab = next((t for t in self.tabs if t.tabID == app_data), None)
+        if tab is not None and tab is not self.activeTab:
+            self._setActive(tab)
+
+    def closeTab(self, tab: ResultsTab) -> None:
+        tab.view.destroy()
+        dpg.delete_item(tab.tabID)
+        self.tabs.remove(tab)
+        if tab is not self.activeTab:
+            return
+        self.activeTab = None
+        if self.tabs:
+            self.activate(max(self.tabs, key=lambda t: t.lastActive))
+        elif self.onChanged is not None:
+            self.onChanged(None)
+
+    def updateLabels(self) -> None:
+        for tab in self.tabs:
+            dpg.configure_item(tab.tabID, label=tab.label)
+
+    def enforceBudget(self) -> None:
+        """
+        Spills the least recently active tabs, until the rest fit
+        into the memory budget. The active tab and the tabs which
+        results are still arriving are not spilled.
+        """
+        if config.resultsTabsMemoryMax <= 0:
+            return
+        memorySize: int = self.memorySize
+        for tab in sorted(self.tabs, key=lambda t: t.lastActive):
+            if memorySize <= config.resultsTabsMemoryMax:
+                break
+            if (
+                tab is self.activeTab
+                or
+                tab.spilling
+                or
+                not tab.buffer.finished
+                or
+                tab.buffer.memorySize == 0
+            ):
+                continue
+            memorySize -= tab.buffer.memorySize
+            self._spillTab(tab)
+
+    def _setActive(self, tab: ResultsTab) -> None:
+        self.activeTab = tab
+        tab.lastActive = time.monotonic()
+        if self.onChanged is not None:
+            self.onChanged(tab)
+        self.enforceBudget()
+
+    def _spillTab(self, tab: ResultsTab) -> None:
+        logging.debug(
+            " ".join((
+                f"Spilling results of [{tab.title}] to disk,",
+                f"{formatBytes(tab.buffer.memorySize)}"
+            ))
+        )
+        tab.spilling = True
+        jobs.submitJob(
+            jobs.Job(f"spill {tab.title}"),
+            lambda job, buffer: buffer.spill(),
+            tab.buffer,
+            onDone=lambda job, result: self._tabSpilled(tab),
+            onError=lambda job, ex: self._tabSpilled(tab, ex)
+        )
+
+    def _tabSpilled(
+        self,
+        tab: ResultsTab,
+        ex: typing.Optional[Exception] = None
+    ) -> None:
+        tab.spilling = False
+        if ex is not None:
+            logging.warning(f"Couldn't spill results of [{tab.title}]: {ex}")
+        if tab in self.tabs:
+            dpg.configure_item(tab.tabID, label=tab.label)
+            if self.onChanged is not None:
+                self.onChanged(self.activeTab)
@@ -1,5 +1,5 @@
 import dearpygui.dearpygui as dpg
-from typing import Tuple
+from typing import Callable, Dict, Optional, Tuple
 from . import applicationPath
 
 styleRounding: int = 0
@@ -10,18 +10,199 @@ styleSecondaryColorActive: Tuple[int, int, int, int] = (111, 111, 111, 100)
 styleHorizontalPadding: int = 12
 styleScrollbarWidth: int = 16
 
+# colors by their names in themes, for every palette; the base colors
+# of the dark palette are the Dear PyGui defaults, the light one
+# has to replace them all
+palettes: Dict[str, Dict[str, Tuple[int, ...]]] = {
+    "dark": {
+        "text": (255, 255, 255),
+        "textDisabled": (128, 128, 128),
+        "windowBg": (37, 37, 38),
+        "popupBg": (37, 37, 38),
+        "border": (78, 78, 78),
+        "frameBg": (51, 51, 55),
+        "button": (51, 51, 55),
+        "header": (51, 51, 55),
+        "menuBarBg": (51, 51, 55),
+        "scrollbarBg": (51, 51, 55),
+        "scrollbarGrab": (82, 82, 85),
+        "scrollbarGrabHovered": (90, 90, 95),
+        "tab": (51, 51, 55),
+        "tableHeaderBg": (48, 48, 51),
+        "tableBorderStrong": (79, 79, 89),
+        "tableBorderLight": (59, 59, 64),
+        "tableRowBgAlt": (255, 255, 255, 15),
+        "primary": stylePrimaryColor,
+        "primaryActive": stylePrimaryColorActive,
+        "secondary": styleSecondaryColor,
+        "secondaryActive": styleSecondaryColorActive,
+        "titleBg": (30, 80, 0),
+        "titleBgCollapsed": (30, 70, 0),
+        "error": (255, 30, 30),
+        "cellCopied": (255, 255, 0),
+        "cellSelected": (90, 180, 255),
+        "hyperlink": (29, 151, 236),
+        "hyperlinkHovered": (29, 151, 236, 25)
+    },
+    "light": {
+        "text": (20, 20, 20),
+        "textDisabled": (130, 130, 130),
+        "windowBg": (240, 240, 240),
+        "popupBg": (250, 250, 250),
+        "border": (180, 180, 180),
+        "frameBg": (255, 255, 255),
+        "button": (222, 222, 222),
+        "header": (215, 215, 215),
+        "menuBarBg": (225, 225, 225),
+        "scrollbarBg": (230, 230, 230),
+        "scrollbarGrab": (190, 190, 190),
+        "scrollbarGrabHovered": (170, 170, 170),
+        "tab": (215, 215, 215),
+        "tableHeaderBg": (220, 220, 220),
+        "tableBorderStrong": (170, 170, 170),
+        "tableBorderLight": (205, 205, 205),
+        "tableRowBgAlt": (0, 0, 0, 10),
+        "primary": (120, 190, 90),
+        "primaryActive": (100, 175, 70),
+        "secondary": (111, 111, 111, 60),
+        "secondaryActive": (111, 111, 111, 80),
+        "titleBg": (160, 205, 140),
+        "titleBgCollapsed": (175, 215, 160),
+        "error": (200, 0, 0),
+        "cellCopied": (190, 120, 0),
+        "cellSelected": (0, 90, 200),
+        "hyperlink": (0, 100, 200),
+        "hyperlinkHovered": (0, 100, 200, 25)
+    }
+}
+currentPalette: str = "dark"
+
+# Dear PyGui color => its name in palettes
+globalThemeColors: Tuple[Tuple[int, str], ...] = (
+    (dpg.mvThemeCol_Text, "text"),
+    (dpg.mvThemeCol_TextDisabled, "textDisabled"),
+    (dpg.mvThemeCol_WindowBg, "windowBg"),
+    (dpg.mvThemeCol_ChildBg, "windowBg"),
+    (dpg.mvThemeCol_PopupBg, "popupBg"),
+    (dpg.mvThemeCol_Border, "border"),
+    (dpg.mvThemeCol_Separator, "border"),
+    (dpg.mvThemeCol_FrameBg, "frameBg"),
+    (dpg.mvThemeCol_FrameBgHovered, "secondary"),
+    (dpg.mvThemeCol_FrameBgActive, "secondaryActive"),
+    (dpg.mvThemeCol_TitleBgActive, "primary"),
+    (dpg.mvThemeCol_TitleBg, "titleBg"),
+    (dpg.mvThemeCol_TitleBgCollapsed, "titleBgCollapsed"),
+    (dpg.mvThemeCol_MenuBarBg, "menuBarBg"),
+    (dpg.mvThemeCol_ScrollbarBg, "scrollbarBg"),
+    (dpg.mvThemeCol_ScrollbarGrab, "scrollbarGrab"),
+    (dpg.mvThemeCol_ScrollbarGrabHovered, "scrollbarGrabHovered"),
+    (dpg.mvThemeCol_ScrollbarGrabActive, "scrollbarGrabHovered"),
+    (dpg.mvThemeCol_CheckMark, "primary"),
+    (dpg.mvThemeCol_SliderGrab, "primary"),
+    (dpg.mvThemeCol_SliderGrabActive, "primaryActive"),
+    (dpg.mvThemeCol_Button, "button"),
+    (dpg.mvThemeCol_ButtonHovered, "primary"),
+    (dpg.mvThemeCol_ButtonActive, "primaryActive"),
+    (dpg.mvThemeCol_Header, "header"),
+    (dpg.mvThemeCol_HeaderHovered, "primary"),
+    (dpg.mvThemeCol_HeaderActive, "primaryActive"),
+    (dpg.mvThemeCol_Tab, "tab"),
+    (dpg.mvThemeCol_TabHovered, "primary"),
+    (dpg.mvThemeCol_TabActive, "primaryActive"),
+    (dpg.mvThemeCol_TabUnfocused, "primary"),
+    (dpg.mvThemeCol_TabUnfocusedActive, "primaryActive"),
+    (dpg.mvThemeCol_TableHeaderBg, "tableHeaderBg"),
+    (dpg.mvThemeCol_TableBorderStrong, "tableBorderStrong"),
+    (dpg.mvThemeCol_TableBorderLight, "tableBorderLight"),
+    (dpg.mvThemeCol_TableRowBgAlt, "tableRowBgAlt")
+)
+
+# theme name => theme ID; every theme is built only once and then
+# bound to as many items as needed
+themes: Dict[str, int] = {}
+# theme color ID => its name in palettes, so another palette can be
+# applied by changing the colors of the themes that are already built
+themeColors: Dict[int, str] = {}
+globalFont: Optional[int] = None
+
+
+def addPaletteColor(target: int, colorName: str) -> None:
+    colorID: int = dpg.add_theme_color(
+        target,
+        palettes[currentPalette][colorName],
+        category=dpg.mvThemeCat_Core
+    )
+    themeColors[colorID] = colorName
+
+
+def applyPalette(paletteName: str) -> None:
+    """
+    Switches colors of all the themes to another palette. Items keep
+    their themes, so nothing needs to be rebuilt or bound again.
+    """
+    global currentPalette
+
+    palette = palettes[paletteName]
+    currentPalette = paletteName
+    for colorID, colorName in themeColors.items():
+        color = palette[colorName]
+        # alpha has to be set too, otherwise the previous one stays
+        dpg.set_value(colorID, color if len(color) == 4 else (*color, 255))
+
 
 def getGlobalFont():
-    with dpg.font_registry():
-        with dpg.font(
-            applicationPath / "fonts" / "JetBrainsMono-Thin.ttf",
-            24
-        ) as globalFont:
-            dpg.add_font_range_hint(dpg.mvFontRangeHint_Cyrillic)
-            return globalFont
+    global globalFont
+
+    if globalFont is None:
+        with dpg.font_registry():
+            with dpg.font(
+                applicationPath / "fonts" / "JetBrainsMono-Thin.ttf",
+                24
+            ) as globalFont:
+                dpg.add_font_range_hint(dpg.mvFontRangeHint_Cyrillic)
+    return globalFont
+
+
+def getTheme(name: str) -> int:
+    if name not in themes:
+        themes[name] = themeBuilders[name]()
+    return themes[name]
+
+
+def buildThemes() -> None:
+    """
+    Builds all the themes at once, so there is nothing to build later,
+    when they are bound to items.
+    """
+    for name in themeBuilders:
+        getTheme(name)
 
 
 def getGlobalTheme():
+    return getTheme("global")
+
+
+def getErrorTheme():
+    return getTheme("error")
+
+
+def getCellHighlightedTheme():
+    return getTheme("cellCopied")
+
+
+def getCellSelectedTheme():
+    return getTheme("cellSelected")
+
+
+def getWindowTheme():
+    return getTheme("window")
+
+
+def getHyperlinkTheme():
+    return getTheme("hyperlink")
+
+
+def buildGlobalTheme():
     with dpg.theme() as globalTheme:
         with dpg.theme_component(dpg.mvAll):
             dpg.add_theme_style(
@@ -71,124 +252,22 @@ def getGlobalTheme():
             )
 
             # --- colors
-            dpg.add_theme_color(
-                dpg.mvThemeCol_TitleBgActive,
-                stylePrimaryColor,
-                category=dpg.mvThemeCat_Core
-            )
-            dpg.add_theme_color(
-                dpg.mvThemeCol_TitleBg,
-                (30, 80, 0),
-                category=dpg.mvThemeCat_Core
-            )
-            dpg.add_theme_color(
-                dpg.mvThemeCol_TitleBgCollapsed,
-                (30, 70, 0),
-                category=dpg.mvThemeCat_Core
-            )
-            dpg.add_theme_color(
-                dpg.mvThemeCol_FrameBgHovered,
-                styleSecondaryColor,
-                category=dpg.mvThemeCat_Core
-            )
-            dpg.add_theme_color(
-                dpg.mvThemeCol_FrameBgActive,
-                styleSecondaryColorActive,
-                category=dpg.mvThemeCat_Core
-            )
-            dpg.add_theme_color(
-                dpg.mvThemeCol_CheckMark,
-                stylePrimaryColor,
-                category=dpg.mvThemeCat_Core
-            )
-            dpg.add_theme_color(
-                dpg.mvThemeCol_SliderGrab,
-                stylePrimaryColor,
-                category=dpg.mvThemeCat_Core
-            )
-            dpg.add_theme_color(
-                dpg.mvThemeCol_SliderGrabActive,
-                stylePrimaryColorActive,
-                category=dpg.mvThemeCat_Core
-            )
-            dpg.add_theme_color(
-                dpg.mvThemeCol_ButtonHovered,
-                stylePrimaryColor,
-                category=dpg.mvThemeCat_Core
-            )
-            dpg.add_theme_color(
-                dpg.mvThemeCol_ButtonActive,
-                stylePrimaryColorActive,
-                category=dpg.mvThemeCat_Core
-            )
-            dpg.add_theme_color(
-                dpg.mvThemeCol_HeaderHovered,
-                stylePrimaryColor,
-                category=dpg.mvThemeCat_Core
-            )
-            dpg.add_theme_color(
-                dpg.mvThemeCol_HeaderActive,
-                stylePrimaryColorActive,
-                category=dpg.mvThemeCat_Core
-            )
-            dpg.add_theme_color(
-                dpg.mvThemeCol_TabHovered,
-                stylePrimaryColor,
-                category=dpg.mvThemeCat_Core
-            )
-            dpg.add_theme_color(
-                dpg.mvThemeCol_TabActive,
-                stylePrimaryColorActive,
-                category=dpg.mvThemeCat_Core
-            )
-            dpg.add_theme_color(
-                dpg.mvThemeCol_TabUnfocused,
-                stylePrimaryColor,
-                category=dpg.mvThemeCat_Core
-            )
-            dpg.add_theme_color(
-                dpg.mvThemeCol_TabUnfocusedActive,
-                stylePrimaryColorActive,
-                category=dpg.mvThemeCat_Core
-            )
+            for target, colorName in globalThemeColors:
+                addPaletteColor(target, colorName)
 
         return globalTheme
 
 
-def getErrorTheme():
-    with dpg.theme() as errorTheme:
-        with dpg.theme_component(dpg.mvAll):
-            dpg.add_theme_color(
-                dpg.mvThemeCol_Text,
-                (255, 30, 30),
-                category=dpg.mvThemeCat_Core
-            )
-        return errorTheme
-
-
-def getCellHighlightedTheme():
-    with dpg.theme() as cellHighlightedTheme:
-        with dpg.theme_component(dpg.mvAll):
-            dpg.add_theme_color(
-                dpg.mvThemeCol_Text,
-                (255, 255, 0),
-                category=dpg.mvThemeCat_Core
-            )
-        return cellHighlightedTheme
+def buildTextTheme(colorName: str) -> Callable[[], int]:
+    def build():
+        with dpg.theme() as textTheme:
+            with dpg.theme_component(dpg.mvAll):
+                addPaletteColor(dpg.mvThemeCol_Text, colorName)
+            return textTheme
+    return build
 
 
-def getCellDefaultTheme():
-    with dpg.theme() as cellDefaultTheme:
-        with dpg.theme_component(dpg.mvAll):
-            dpg.add_theme_color(
-                dpg.mvThemeCol_Text,
-                (255, 255, 255),
-                category=dpg.mvThemeCat_Core
-            )
-        return cellDefaultTheme
-
-
-def getWindowTheme():
+def buildWindowTheme():
     with dpg.theme() as aboutTheme:
         with dpg.theme_component(dpg.mvAll):
             dpg.add_theme_style(
@@ -199,14 +278,21 @@ def getWindowTheme():
         return aboutTheme
 
 
-def getHyperlinkTheme():
+def buildHyperlinkTheme():
     with dpg.theme() as hyperlinkTheme:
         with dpg.theme_component(dpg.mvButton):
             dpg.add_theme_color(dpg.mvThemeCol_Button, [0, 0, 0, 0])
             dpg.add_theme_color(dpg.mvThemeCol_ButtonActive, [0, 0, 0, 0])
-            dpg.add_theme_color(
-                dpg.mvThemeCol_ButtonHovered,
-                [29, 151, 236, 25]
-            )
-            dpg.add_theme_color(dpg.mvThemeCol_Text, [29, 151, 236])
+            addPaletteColor(dpg.mvThemeCol_ButtonHovered, "hyperlinkHovered")
+            addPaletteColor(dpg.mvThemeCol_Text, "hyperlink")
         return hyperlinkTheme
+
+
+themeBuilders: Dict[str, Callable[[], int]] = {
+    "global": buildGlobalTheme,
+    "error": buildTextTheme("error"),
+    "cellCopied": buildTextTheme("cellCopied"),
+    "cellSelected": buildTextTheme("cellSelected"),
+    "window": buildWindowTheme,
+    "hyperlink": buildHyperlinkTheme
+}
@@ -0,0 +1,199 @@
+# 3rd-party dependencies
+#
+# PyVO and requests are imported only when a query is executed,
+# see `services.py`
+#
+# standard libraries
+#
+import json
+import threading
+from datetime import datetime
+import logging
+import typing
+#
+# own stuff
+#
+from . import config
+from . import jobs
+from . import asyncJobsFile
+from .query import streamResults
+from .services import getService, getSession
+
+if typing.TYPE_CHECKING:
+    import pyvo
+    from .results import ResultBuffer
+
+# jobs which are neither going to change their phase
+# nor to produce results anymore
+finalPhases: typing.Set[str] = {"COMPLETED", "ERROR", "ABORTED", "ARCHIVED"}
+
+pendingJobsLock: threading.Lock = threading.Lock()
+
+
+def loadPendingJobs() -> typing.List[typing.Dict[str, str]]:
+    try:
+        with open(asyncJobsFile, "r", encoding="utf-8") as f:
+            pendingJobs = json.load(f)
+    except FileNotFoundError:
+        return []
+    except (OSError, ValueError) as ex:
+        logging.warning(
+            f"Couldn't read async jobs from [{asyncJobsFile}]: {ex}"
+        )
+        return []
+    if not isinstance(pendingJobs, list):
+        logging.warning(f"Unexpected contents of [{asyncJobsFile}]")
+        return []
+    return pendingJobs
+
+
+def savePendingJobs(pendingJobs: typing.List[typing.Dict[str, str]]) -> None:
+    try:
+        with open(asyncJobsFile, "w", encoding="utf-8") as f:
+            json.dump(pendingJobs, f, indent=4)
+    except OSError as ex:
+        logging.warning(
+            f"Couldn't save async jobs to [{asyncJobsFile}]: {ex}"
+        )
+
+
+def rememberJob(jobURL: str, serviceURL: str, queryText: str) -> None:
+    with pendingJobsLock:
+        pendingJobs = [
+            j for j in loadPendingJobs() if j.get("jobURL") != jobURL
+        ]
+        pendingJobs.append(
+            {
+                "jobURL": jobURL,
+                "serviceURL": serviceURL,
+                "query": queryText,
+                "submitted": datetime.now().isoformat(timespec="seconds")
+            }
+        )
+        savePendingJobs(pendingJobs)
+
+
+def forgetJob(jobURL: str) -> None:
+    with pendingJobsLock:
+        pendingJobs = loadPendingJobs()
+        remainingJobs = [j for j in pendingJobs if j.get("jobURL") != jobURL]
+        if len(remainingJobs) != len(pendingJobs):
+            savePendingJobs(remainingJobs)
+
+
+def getJobPhase(job: jobs.Job, jobURL: str) -> str:
+    import pyvo
+
+    job.reportProgress("Checking async job phase")
+    return pyvo.dal.AsyncTAPJob(jobURL, session=getSession(jobURL)).phase
+
+
+def deleteJob(job: jobs.Job, jobURL: str) -> None:
+    """
+    Deletes the job on the service (which also aborts it, if it is still
+    running) and forgets about it. The job is forgotten even if it cannot
+    be deleted, as most likely the service has already destroyed it.
+    """
+    import pyvo
+
+    job.reportProgress("Deleting async job")
+    try:
+        pyvo.dal.AsyncTAPJob(jobURL, session=getSession(jobURL)).delete()
+    except Exception as ex:
+        logging.warning(f"Couldn't delete async job [{jobURL}]: {ex}")
+    forgetJob(jobURL)
+
+
+def waitForJob(job: jobs.Job, asyncJob: "pyvo.dal.AsyncTAPJob") -> str:
+    """
+    Polls the job phase with an increasing interval until the job
+    reaches one of the final phases.
+    """
+    interval: float = config.asyncPollIntervalMin
+    while True:
+        job.checkCancelled()
+        phase: str = asyncJob.phase
+        logging.debug(f"Async job [{asyncJob.url}] phase: {phase}")
+        if phase in finalPhases:
+            return phase
+        if phase == "PENDING":
+            # the application might have been closed
+            # right after creating the job
+            asyncJob.run()
+        job.reportProgress(f"Async job is {phase.lower()}")
+        job.sleep(interval)
+        interval = min(
+            interval * config.asyncPollIntervalFactor,
+            config.asyncPollIntervalMax
+        )
+
+
+def executeAsyncQuery(
+    job: jobs.Job,
+    serviceURL: str,
+    queryText: str,
+    buffer: "ResultBuffer",
+    jobURL: typing.Optional[str] = None
+) -> "ResultBuffer":
+    """
+    Executes the query as an async (UWS) job, or resumes waiting for
+    the already submitted job, if its URL is provided. The job is
+    remembered until its results are downloaded, so it survives
+    application restarts.
+
+    Cancelling deletes the job on the service, unless that happens
+    because the application is closing.
+    """
+    import pyvo
+    import requests
+
+    isNewJob: bool = jobURL is None
+    if isNewJob:
+        job.reportProgress("Submitting async job")
+        with buffer.stats.measure("submit"):
+            asyncJob = getService(serviceURL).submit_job(queryText)
+        logging.debug(f"Submitted async job: {asyncJob.url}")
+        rememberJob(asyncJob.url, serviceURL, queryText)
+    else:
+        job.reportProgress("Resuming async job")
+        asyncJob = pyvo.dal.AsyncTAPJob(
+            jobURL,
+            session=getSession(typing.cast(str, jobURL))
+        )
+    jobURL = asyncJob.url
+
+    try:
+        if isNewJob:
+            asyncJob.run()
+        with buffer.stats.measure("server"):
+            phase: str = waitForJob(job, asyncJob)
+        if phase != "COMPLETED":
+            forgetJob(jobURL)
+            # gets the error message, if the service provided any
+            asyncJob.raise_if_error()
+            raise pyvo.dal.DALServiceError(
+                f"Async job has finished in [{phase}] phase",
+                url=jobURL
+            )
+
+        resultURL: str = asyncJob.result_uri
+        job.reportProgress("Downloading results")
+        try:
+            with buffer.stats.measure("response"):
+                response = getSession(resultURL).get(resultURL, stream=True)
+        except requests.RequestException as ex:
+            raise pyvo.dal.DALServiceError.from_except(ex, resultURL)
+        streamResults(job, response, resultURL, buffer)
+    except jobs.JobCancelledError:
+        if not jobs.shuttingDown:
+            deleteJob(job, jobURL)
+        raise
+
+    forgetJob(jobURL)
+    if config.asyncDeleteFinishedJobs:
+        try:
+            asyncJob.delete()
+        except Exception as ex:
+            logging.warning(f"Couldn't delete async job [{jobURL}]: {ex}")
+
+    return buffer
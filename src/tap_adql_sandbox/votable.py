@@ -0,0 +1,675 @@
+# 3rd-party dependencies
+#
+import numpy
+import pandas
+#
+# standard libraries
+#
+from xml.parsers import expat
+import base64
+import binascii
+import io
+import struct
+import logging
+import typing
+
+# VOTable datatype: (big-endian NumPy type of one item, its size in bytes)
+binaryTypes: typing.Dict[str, typing.Tuple[str, int]] = {
+    "boolean": ("S1", 1),
+    "bit": ("u1", 1),
+    "unsignedByte": (">u1", 1),
+    "short": (">i2", 2),
+    "int": (">i4", 4),
+    "long": (">i8", 8),
+    "char": ("S1", 1),
+    "unicodeChar": (">u2", 2),
+    "float": (">f4", 4),
+    "double": (">f8", 8),
+    "floatComplex": (">c8", 8),
+    "doubleComplex": (">c16", 16)
+}
+
+integerTypes: typing.Set[str] = {"unsignedByte", "short", "int", "long"}
+floatTypes: typing.Set[str] = {"float", "double"}
+complexTypes: typing.Set[str] = {"floatComplex", "doubleComplex"}
+stringTypes: typing.Set[str] = {"char", "unicodeChar"}
+
+booleanValues: typing.Dict[str, bool] = {
+    "T": True, "t": True, "1": True, "true": True, "True": True,
+    "F": False, "f": False, "0": False, "false": False, "False": False
+}
+
+# serializations that can be parsed incrementally
+streamableSerializations: typing.Set[str] = {"TABLEDATA", "BINARY", "BINARY2"}
+
+
+class IncompleteRowError(Exception):
+    pass
+
+
+def parseInteger(text: str) -> int:
+    try:
+        return int(text)
+    except ValueError:
+        # hexadecimal values are allowed too
+        return int(text, 16)
+
+
+class Field:
+    """
+    A column of a VOTable table, as described by its FIELD element.
+    """
+
+    def __init__(self, name: str, datatype: str, arraysize: str):
+        if datatype not in binaryTypes:
+            raise ValueError(f"Unknown VOTable datatype [{datatype}]")
+        self.name: str = name
+        self.datatype: str = datatype
+        self.arraysize: str = arraysize
+        self.nullValue: typing.Optional[str] = None
+        self.nullInteger: typing.Optional[int] = None
+
+        itemType, self.itemSize = binaryTypes[datatype]
+        self.itemType: numpy.dtype = numpy.dtype(itemType)
+        # single numbers/characters, as opposed to arrays and strings
+        self.isScalar: bool = not arraysize
+        self.isVariable: bool = arraysize.endswith("*")
+        # number of items in a value, if it is fixed
+        self.itemsCount: int = 1
+        if arraysize and not self.isVariable:
+            for dimension in arraysize.split("x"):
+                self.itemsCount *= int(dimension)
+
+    @property
+    def binarySize(self) -> int:
+        """
+        Size of a fixed-size value in BINARY serialization.
+        """
+        if self.datatype == "bit":
+            return (self.itemsCount + 7) // 8
+        return self.itemSize * self.itemsCount
+
+    def numpyType(self) -> typing.Optional[numpy.dtype]:
+        """
+        Type of the NumPy field for reading fixed-size values from
+        BINARY records as they are, or None if there is no such type.
+        """
+        if self.isVariable:
+            return None
+        if self.datatype == "char":
+            return numpy.dtype(f"S{self.itemsCount}")
+        if self.datatype in ("unicodeChar", "bit"):
+            return numpy.dtype(f"V{self.binarySize}")
+        if self.isScalar:
+            return self.itemType
+        return numpy.dtype((self.itemType, (self.itemsCount,)))
+
+    def parseText(self, text: str) -> typing.Tuple[typing.Any, bool]:
+        """
+        Converts TABLEDATA cell text to a value, returning it together
+        with a flag telling whether the value is missing.
+        """
+        if self.datatype in stringTypes or (
+            self.datatype == "bit" and not self.isScalar
+        ):
+            return text, False
+        text = text.strip()
+        if not text or text == self.nullValue:
+            return None, True
+        if self.datatype in ("boolean", "bit"):
+            value = booleanValues.get(text)
+            return value, value is None
+        if self.isScalar:
+            if self.datatype in integerTypes:
+                return parseInteger(text), False
+            if self.datatype in complexTypes:
+                real, imaginary = text.split()
+                return complex(float(real), float(imaginary)), False
+            return float(text), False
+        items = text.split()
+        if self.datatype in integerTypes:
+            return (
+                numpy.array(
+                    [parseInteger(i) for i in items],
+                    dtype=self.itemType.newbyteorder("=")
+                ),
+                False
+            )
+        if self.datatype in complexTypes:
+            parts = numpy.array(items, dtype=numpy.float64)
+            return parts[0::2] + 1j * parts[1::2], False
+        return numpy.array(items, dtype=self.itemType.newbyteorder("=")), False
+
+    def readBinary(
+        self,
+        data: bytearray,
+        offset: int
+    ) -> typing.Tuple[typing.Any, int]:
+        """
+        Reads one value from BINARY/BINARY2 stream, returning it together
+        with the offset of the next one.
+        """
+        itemsCount: int = self.itemsCount
+        if self.isVariable:
+            if offset + 4 > len(data):
+                raise IncompleteRowError()
+            itemsCount = struct.unpack_from(">I", data, offset)[0]
+            offset += 4
+        size: int = (
+            (itemsCount + 7) // 8
+            if self.datatype == "bit"
+            else self.itemSize * itemsCount
+        )
+        if offset + size > len(data):
+            raise IncompleteRowError()
+        raw = bytes(data[offset:offset + size])
+        return self.convertBinary(raw, itemsCount), offset + size
+
+    def convertBinary(self, raw: bytes, itemsCount: int) -> typing.Any:
+        if self.datatype == "char":
+            return raw.rstrip(b"\0").decode("utf-8", errors="replace")
+        if self.datatype == "unicodeChar":
+            return raw.decode("utf-16-be", errors="replace").rstrip("\0")
+        if self.datatype == "bit":
+            if self.isScalar:
+                # should be the most significant bit of the byte,
+                # but Astropy, for one, sets a different one
+                return raw[0] != 0
+            bits = numpy.unpackbits(numpy.frombuffer(raw, dtype=numpy.uint8))
+            return "".join(map(str, bits[:itemsCount].tolist()))
+        if self.datatype == "boolean":
+            if self.isScalar:
+                return raw.decode("ascii", errors="replace")
+            return raw
+        values = numpy.frombuffer(raw, dtype=self.itemType, count=itemsCount)
+        if self.isScalar:
+            return values[0].item()
+        return values.astype(self.itemType.newbyteorder("="))
+
+    def setNullValue(self, nullValue: str) -> None:
+        self.nullValue = nullValue
+        if self.datatype in integerTypes:
+            try:
+                self.nullInteger = parseInteger(nullValue.strip())
+            except ValueError:
+                logging.warning(
+                    f"Invalid null value [{nullValue}] of [{self.name}] field"
+                )
+
+    def isBinaryNull(self, value: typing.Any) -> bool:
+        """
+        BINARY (unlike BINARY2) has no null flags, missing integers
+        are marked with the value from VALUES element.
+        """
+        if self.datatype == "boolean" and self.isScalar:
+            return value not in booleanValues
+        if self.nullInteger is not None and self.isScalar:
+            return value == self.nullInteger
+        return False
+
+    def makeColumn(
+        self,
+        values: typing.Union[numpy.ndarray, typing.List],
+        nulls: numpy.ndarray
+    ) -> typing.Any:
+        """
+        Turns parsed values into something that pandas can put into
+        a DataFrame column without converting it once again.
+        """
+        hasNulls: bool = bool(nulls.any())
+        if self.isScalar and self.datatype in integerTypes:
+            values = numpy.asarray(
+                [0 if v is None else v for v in values]
+                if isinstance(values, list)
+                else values,
+                dtype=self.itemType.newbyteorder("=")
+            )
+            if hasNulls:
+                return pandas.arrays.IntegerArray(values, nulls)
+            return values
+        if self.isScalar and self.datatype in floatTypes | complexTypes:
+            values = numpy.array(
+                [0 if v is None else v for v in values]
+                if isinstance(values, list)
+                else values,
+                dtype=self.itemType.newbyteorder("=")
+            )
+            if hasNulls:
+                values[nulls] = numpy.nan
+            return values
+        if self.isScalar and self.datatype in ("boolean", "bit"):
+            flags = numpy.array(
+                [booleanValues.get(v, False) if isinstance(v, str) else bool(v)
+                 for v in values],
+                dtype=bool
+            )
+            if hasNulls:
+                return pandas.arrays.BooleanArray(flags, nulls)
+            return flags
+        column = numpy.empty(len(values), dtype=object)
+        column[:] = list(values)
+        if hasNulls:
+            column[nulls] = None
+        return column
+
+
+class VOTableStreamParser:
+    """
+    Incremental parser of a VOTable document, as it arrives from the
+    network. Only the first table is parsed, its rows are returned
+    as DataFrames of `chunkRows` rows (the first one can be smaller,
+    so something could be displayed sooner), and nothing else from the
+    document is kept in memory, except for the status INFO elements.
+
+    TABLEDATA, BINARY and BINARY2 serializations are parsed as they
+    come. Anything else (FITS or a STREAM referring to an external
+    resource) is buffered and parsed with Astropy at the end.
+    """
+
+    def __init__(self, chunkRows: int, firstChunkRows: int = 0):
+        self.chunkRows: int = max(chunkRows, 1)
+        self.firstChunkRows: int = (
+            min(firstChunkRows, self.chunkRows)
+            if firstChunkRows > 0
+            else self.chunkRows
+        )
+        self.fields: typing.List[Field] = []
+        self.serialization: typing.Optional[str] = None
+        self.queryStatus: typing.Optional[str] = None
+        self.errorMessage: str = ""
+        self.overflow: bool = False
+        self.rowsCount: int = 0
+
+        self._parser = expat.ParserCreate()
+        self._parser.StartElementHandler = self._startElement
+        self._parser.EndElementHandler = self._endElement
+        self._parser.CharacterDataHandler = self._characterData
+        self._parser.buffer_text = True
+
+        self._path: typing.List[str] = []
+        # the first TABLE is the one with results
+        self._tableState: str = "before"
+        self._text: typing.List[str] = []
+        self._collectText: bool = False
+        self._infoName: str = ""
+        self._infoValue: str = ""
+        # document is kept until it is known whether it can be streamed
+        self._raw: typing.Optional[typing.List[bytes]] = []
+        self._readyChunks: typing.List[pandas.DataFrame] = []
+        # values of the rows that are not in a chunk yet, per field
+        self._pendingValues: typing.List[typing.List] = []
+        # flags of single rows, or arrays of them when records are read
+        # all at once
+        self._pendingNulls: typing.List[
+            typing.List[typing.Union[bool, numpy.ndarray]]
+        ] = []
+        self._pendingRows: int = 0
+        self._chunksCount: int = 0
+        self._columnNames: typing.List[str] = []
+        # TABLEDATA
+        self._rowTexts: typing.List[str] = []
+        # BINARY/BINARY2
+        self._base64: str = ""
+        self._binary: bytearray = bytearray()
+        self._recordType: typing.Optional[numpy.dtype] = None
+        self._nullFlagsSize: int = 0
+        # fields which pending values are pieces of columns
+        # rather than values of individual rows
+        self._piecesFields: typing.Set[int] = set()
+
+    @property
+    def isStreamable(self) -> bool:
+        return self.serialization in streamableSerializations
+
+    def feed(self, data: bytes) -> typing.List[pandas.DataFrame]:
+        """
+        Parses the next piece of the document and returns the chunks
+        of rows that got completed.
+        """
+        if self._raw is not None:
+            self._raw.append(data)
+        self._parser.Parse(data, False)
+        return self._takeReadyChunks()
+
+    def close(self) -> typing.List[pandas.DataFrame]:
+        self._parser.Parse(b"", True)
+        if self._raw is not None and self.serialization is not None:
+            self._parseBuffered(b"".join(self._raw))
+        self._raw = None
+        if self._chunksCount == 0 and self.fields:
+            if self.serialization is None:
+                # table without DATA element
+                self._prepareColumns()
+            # so there is at least an empty DataFrame with the columns
+            self._flushRows()
+        elif self._pendingRows:
+            self._flushRows()
+        return self._takeReadyChunks()
+
+    def _takeReadyChunks(self) -> typing.List[pandas.DataFrame]:
+        chunks = self._readyChunks
+        self._readyChunks = []
+        return chunks
+
+    # --- XML events
+
+    def _startElement(self, name: str, attributes: typing.Dict) -> None:
+        # namespace prefix (if any) doesn't matter
+        name = name.rpartition(":")[2]
+        self._path.append(name)
+
+        if name == "INFO":
+            self._infoName = attributes.get("name", "")
+            self._infoValue = attributes.get("value", "")
+            self._startText()
+        elif name == "TABLE":
+            if self._tableState == "before":
+                self._tableState = "inside"
+        elif self._tableState != "inside":
+            return
+        elif name == "FIELD" and self._path[-2] == "TABLE":
+            self.fields.append(
+                Field(
+                    attributes.get("name", attributes.get("ID", "")),
+                    attributes.get("datatype", "char"),
+                    attributes.get("arraysize", "")
+                )
+            )
+        elif name == "VALUES" and self._path[-2] == "FIELD":
+            if "null" in attributes:
+                self.fields[-1].setNullValue(attributes["null"])
+        elif name in ("TABLEDATA", "BINARY", "BINARY2", "FITS"):
+            self._startData(name)
+        elif name == "STREAM" and self.isStreamable:
+            if attributes.get("href") or (
+                attributes.get("encoding", "base64") != "base64"
+            ):
+                # can't be streamed after all
+                logging.debug("VOTable refers to an external stream")
+                self.serialization = f"{self.serialization} (href)"
+                return
+            self._raw = None
+            self._startText()
+        elif name == "TR" and self.serialization == "TABLEDATA":
+            self._rowTexts = []
+        elif name == "TD" and self.serialization == "TABLEDATA":
+            self._startText()
+
+    def _endElement(self, name: str) -> None:
+        name = name.rpartition(":")[2]
+        self._path.pop()
+
+        if name == "INFO":
+            self._endInfo("".join(self._text).strip())
+            self._stopText()
+        elif self._tableState != "inside":
+            return
+        elif name == "TABLE":
+            self._tableState = "after"
+        elif name == "TD" and self.serialization == "TABLEDATA":
+            self._rowTexts.append("".join(self._text))
+            self._stopText()
+        elif name == "TR" and self.serialization == "TABLEDATA":
+            self._addTextRow(self._rowTexts)
+        elif name == "STREAM" and self._collectText:
+            self._stopText()
+            self._decodeBinary(final=True)
+        elif name == "DATA" and self._pendingRows:
+            self._flushRows()
+
+    def _characterData(self, text: str) -> None:
+        if not self._collectText:
+            return
+        if self._path[-1] == "STREAM":
+            self._base64 += "".join(text.split())
+            # decoding as it comes, otherwise the whole stream
+            # would end up in memory
+            if len(self._base64) >= 65536:
+                self._decodeBinary(final=False)
+        else:
+            self._text.append(text)
+
+    def _startText(self) -> None:
+        self._collectText = True
+        self._text = []
+
+    def _stopText(self) -> None:
+        self._collectText = False
+        self._text = []
+
+    def _endInfo(self, text: str) -> None:
+        if self._infoName != "QUERY_STATUS":
+            return
+        self.queryStatus = self._infoValue.upper()
+        if self.queryStatus == "OVERFLOW":
+            self.overflow = True
+        elif self.queryStatus == "ERROR":
+            self.errorMessage = text
+
+    # --- rows
+
+    def _startData(self, serialization: str) -> None:
+        self.serialization = serialization
+        self._prepareColumns()
+        if serialization == "TABLEDATA":
+            self._raw = None
+        elif serialization in ("BINARY", "BINARY2"):
+            self._nullFlagsSize = (
+                (len(self.fields) + 7) // 8
+                if serialization == "BINARY2"
+                else 0
+            )
+            self._recordType = self._makeRecordType()
+            if self._recordType is not None:
+                self._piecesFields = {
+                    i for i, f in enumerate(self.fields)
+                    if f.isScalar
+                    and
+                    f.datatype in integerTypes | floatTypes | complexTypes
+                }
+        else:
+            logging.debug(
+                f"VOTable serialization [{serialization}] can't be streamed"
+            )
+
+    def _prepareColumns(self) -> None:
+        names: typing.Dict[str, int] = {}
+        self._columnNames = []
+        for f in self.fields:
+            # pandas can handle duplicate names, but they would only
+            # bring confusion when sorting or exporting results
+            count = names.get(f.name, 0) + 1
+            names[f.name] = count
+            self._columnNames.append(
+                f.name if count == 1 else f"{f.name}_{count}"
+            )
+        self._resetPending()
+
+    def _resetPending(self) -> None:
+        self._pendingValues = [[] for f in self.fields]
+        self._pendingNulls = [[] for f in self.fields]
+        self._pendingRows = 0
+
+    def _addTextRow(self, texts: typing.List[str]) -> None:
+        for i, f in enumerate(self.fields):
+            value, isNull = (
+                f.parseText(texts[i])
+                if i < len(texts)
+                else (None, True)
+            )
+            self._pendingValues[i].append(value)
+            self._pendingNulls[i].append(isNull)
+        self._addedRows(1)
+
+    def _addedRows(self, rowsCount: int) -> None:
+        self._pendingRows += rowsCount
+        self.rowsCount += rowsCount
+        if self._pendingRows >= self._chunkLimit():
+            self._flushRows()
+
+    def _chunkLimit(self) -> int:
+        return (
+            self.firstChunkRows if self._chunksCount == 0 else self.chunkRows
+        )
+
+    def _flushRows(self) -> None:
+        columns: typing.Dict[str, typing.Any] = {}
+        for i, f in enumerate(self.fields):
+            values: typing.Any = self._pendingValues[i]
+            if i in self._piecesFields:
+                values = (
+                    numpy.concatenate(values)
+                    if values
+                    else numpy.empty(0, dtype=f.itemType)
+                )
+            nulls = (
+                numpy.concatenate(self._pendingNulls[i])
+                if self._recordType is not None and self._pendingNulls[i]
+                else numpy.array(self._pendingNulls[i], dtype=bool)
+            )
+            columns[self._columnNames[i]] = f.makeColumn(values, nulls)
+        self._readyChunks.append(pandas.DataFrame(columns, copy=False))
+        self._chunksCount += 1
+        self._resetPending()
+
+    # --- BINARY/BINARY2
+
+    def _makeRecordType(self) -> typing.Optional[numpy.dtype]:
+        """
+        If all the values have fixed size, then records can be read
+        with NumPy all at once instead of one by one.
+        """
+        recordFields: typing.List[typing.Tuple] = []
+        if self._nullFlagsSize:
+            recordFields.append(("nulls", "u1", (self._nullFlagsSize,)))
+        for i, f in enumerate(self.fields):
+            fieldType = f.numpyType()
+            if fieldType is None:
+                return None
+            recordFields.append((f"field{i}", fieldType))
+        return numpy.dtype(recordFields)
+
+    def _decodeBinary(self, final: bool) -> None:
+        usable: int = (
+            len(self._base64) if final else len(self._base64) // 4 * 4
+        )
+        try:
+            self._binary += base64.b64decode(self._base64[:usable])
+        except binascii.Error as ex:
+            raise ValueError(f"Corrupted VOTable binary stream: {ex}")
+        self._base64 = self._base64[usable:]
+        if self._recordType is not None:
+            self._readRecords()
+        else:
+            self._readRows()
+        if final and self._binary:
+            logging.warning(
+                f"{len(self._binary)} bytes left after the last VOTable row"
+            )
+            self._binary = bytearray()
+
+    def _readRecords(self) -> None:
+        recordType = typing.cast(numpy.dtype, self._recordType)
+        while len(self._binary) >= recordType.itemsize:
+            # not reading more than what is left until the end of the chunk
+            self._readRecordsBatch(
+                min(
+                    len(self._binary) // recordType.itemsize,
+                    self._chunkLimit() - self._pendingRows
+                )
+            )
+
+    def _readRecordsBatch(self, recordsCount: int) -> None:
+        recordType = typing.cast(numpy.dtype, self._recordType)
+        size: int = recordsCount * recordType.itemsize
+        records = numpy.frombuffer(
+            bytes(self._binary[:size]),
+            dtype=recordType
+        )
+        del self._binary[:size]
+
+        if self._nullFlagsSize:
+            nullFlags = numpy.unpackbits(
+                records["nulls"],
+                axis=1
+            )[:, :len(self.fields)].astype(bool)
+        for i, f in enumerate(self.fields):
+            column = records[f"field{i}"]
+            if i in self._piecesFields:
+                values = column.astype(f.itemType.newbyteorder("="))
+                nulls = (
+                    values == f.nullInteger
+                    if f.nullInteger is not None
+                    else numpy.zeros(recordsCount, dtype=bool)
+                )
+                self._pendingValues[i].append(values)
+            else:
+                rowValues = [
+                    f.convertBinary(
+                        v if isinstance(v, bytes) else v.tobytes(),
+                        f.itemsCount
+                    )
+                    for v in column
+                ]
+                nulls = numpy.array(
+                    [f.isBinaryNull(v) for v in rowValues],
+                    dtype=bool
+                )
+                self._pendingValues[i].extend(rowValues)
+            if self._nullFlagsSize:
+                nulls = nulls | nullFlags[:, i]
+            self._pendingNulls[i].append(nulls)
+        self._addedRows(recordsCount)
+
+    def _readRows(self) -> None:
+        data: bytearray = self._binary
+        offset: int = 0
+        while offset < len(data):
+            rowStart: int = offset
+            nullFlags: typing.Optional[numpy.ndarray] = None
+            try:
+                if self._nullFlagsSize:
+                    if offset + self._nullFlagsSize > len(data):
+                        raise IncompleteRowError()
+                    nullFlags = numpy.unpackbits(
+                        numpy.frombuffer(
+                            data,
+                            dtype=numpy.uint8,
+                            count=self._nullFlagsSize,
+                            offset=offset
+                        )
+                    ).astype(bool)
+                    offset += self._nullFlagsSize
+                row: typing.List = []
+                for f in self.fields:
+                    value, offset = f.readBinary(data, offset)
+                    row.append(value)
+            except IncompleteRowError:
+                offset = rowStart
+                break
+            for i, f in enumerate(self.fields):
+                self._pendingValues[i].append(row[i])
+                self._pendingNulls[i].append(
+                    (nullFlags is not None and bool(nullFlags[i]))
+                    or
+                    f.isBinaryNull(row[i])
+                )
+            self._addedRows(1)
+        del data[:offset]
+
+    # --- whatever cannot be streamed
+
+    def _parseBuffered(self, document: bytes) -> None:
+        # Astropy is needed only for what is rare, so it is imported
+        # only when that happens
+        from astropy.io.votable import parse as votableparse
+
+        logging.debug(
+            f"Parsing {len(document)} bytes of VOTable with Astropy"
+        )
+        votable = votableparse(io.BytesIO(document))
+        table = votable.get_first_table().to_table()
+        self.rowsCount = len(table)
+        self._readyChunks.append(table.to_pandas())
+        self._chunksCount += 1
+        self.fields = []
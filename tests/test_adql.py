@@ -0,0 +1,165 @@
+# 3rd-party dependencies
+#
+import pytest
+#
+# own stuff
+#
+from tap_adql_sandbox.adql import (
+    addCondition,
+    findTableName,
+    findTop,
+    formatValue,
+    keysetPageQuery,
+    normalizeQuery,
+    orderByKey,
+    partitionQuery
+)
+
+
+def test_normalizeQuery_ignores_whitespace_comments_and_semicolon():
+    assert normalizeQuery(
+        "SELECT ra ,  dec -- coordinates\nFROM   t\nWHERE id = 1 ;"
+    ) == normalizeQuery("SELECT ra,dec FROM t WHERE id=1")
+
+
+def test_normalizeQuery_keeps_literals():
+    assert (
+        normalizeQuery("SELECT 'a  --  b' FROM t")
+        != normalizeQuery("SELECT 'a -- b' FROM t")
+    )
+
+
+def test_addCondition_without_where():
+    assert addCondition(
+        "SELECT * FROM t ORDER BY ra",
+        "x > 1"
+    ) == "SELECT * FROM t\nWHERE x > 1\nORDER BY ra"
+
+
+def test_addCondition_with_where():
+    assert addCondition(
+        "SELECT * FROM t WHERE a = 1 OR b = 2;",
+        "x > 1"
+    ) == "SELECT * FROM t WHERE (x > 1)\nAND (a = 1 OR b = 2)"
+
+
+def test_addCondition_ignores_subqueries_and_literals():
+    query = " ".join((
+        "SELECT * FROM (SELECT * FROM s WHERE y = 'ORDER BY') AS q",
+        "GROUP BY id"
+    ))
+    assert addCondition(query, "x > 1") == "\n".join((
+        "SELECT * FROM (SELECT * FROM s WHERE y = 'ORDER BY') AS q",
+        "WHERE x > 1",
+        "GROUP BY id"
+    ))
+
+
+def test_addCondition_strips_comments():
+    assert addCondition(
+        "SELECT * FROM t WHERE a = 1 -- the first one",
+        "x > 1"
+    ) == "SELECT * FROM t WHERE (x > 1)\nAND (a = 1)"
+
+
+def test_addCondition_rejects_union():
+    with pytest.raises(ValueError):
+        addCondition("SELECT a FROM t UNION SELECT a FROM s", "x > 1")
+
+
+def test_findTop():
+    assert findTop("SELECT TOP 11 * FROM t") == 11
+    assert findTop("select distinct top 5 a from t") == 5
+    assert findTop("SELECT a FROM (SELECT TOP 3 a FROM t) AS q") is None
+    assert findTop("SELECT 'TOP 4' FROM t -- TOP 3") is None
+
+
+def test_findTableName():
+    assert findTableName(
+        "SELECT TOP 5 * FROM gaiadr3.gaia_source WHERE a = 1"
+    ) == "gaia_source"
+    assert findTableName(
+        'SELECT * -- FROM x\nFROM "TAP_SCHEMA" . "tables" AS t'
+    ) == "tables"
+    assert findTableName("SELECT (SELECT MAX(a) FROM s) FROM t") == "t"
+    assert findTableName("SELECT * FROM (SELECT * FROM t) AS q") is None
+
+
+def test_partitionQuery_integer_ranges_cover_everything():
+    queries = partitionQuery("SELECT * FROM t", "id", 0, 9, 3)
+    assert queries == [
+        "SELECT * FROM t\nWHERE id >= 0 AND id < 3",
+        "SELECT * FROM t\nWHERE id >= 3 AND id < 6",
+        "SELECT * FROM t\nWHERE id >= 6 AND id <= 9"
+    ]
+
+
+def test_partitionQuery_no_more_parts_than_integers():
+    assert len(partitionQuery("SELECT * FROM t", "id", 0, 1, 10)) == 2
+
+
+def test_partitionQuery_float_ranges():
+    queries = partitionQuery("SELECT * FROM t", "ra", 0.0, 360.0, 4)
+    assert queries[1] == "SELECT * FROM t\nWHERE ra >= 90 AND ra < 180"
+    assert queries[-1].endswith("ra >= 270 AND ra <= 360")
+
+
+def test_partitionQuery_keeps_large_integers_precise():
+    queries = partitionQuery(
+        "SELECT * FROM t",
+        "source_id",
+        4295806720,
+        6917528997577384320,
+        1
+    )
+    assert queries[0].endswith(
+        "source_id >= 4295806720 AND source_id <= 6917528997577384320"
+    )
+
+
+def test_partitionQuery_rejects_top():
+    with pytest.raises(ValueError, match="TOP"):
+        partitionQuery("SELECT TOP 100 * FROM t", "id", 0, 9, 3)
+
+
+def test_partitionQuery_rejects_reversed_range():
+    with pytest.raises(ValueError):
+        partitionQuery("SELECT * FROM t", "id", 9, 0, 3)
+
+
+def test_orderByKey_replaces_sorting():
+    assert orderByKey(
+        "SELECT * FROM t WHERE a = 1 ORDER BY ra DESC;",
+        "id"
+    ) == "SELECT * FROM t WHERE a = 1\nORDER BY id ASC"
+
+
+def test_orderByKey_rejects_offset():
+    with pytest.raises(ValueError):
+        orderByKey("SELECT * FROM t OFFSET 10", "id")
+
+
+def test_orderByKey_rejects_top():
+    with pytest.raises(ValueError, match="TOP 100"):
+        orderByKey("SELECT DISTINCT TOP 100 * FROM t ORDER BY ra", "id")
+    # TOP of a sub-query limits only that
+    assert orderByKey(
+        "SELECT * FROM (SELECT TOP 100 * FROM t) AS q",
+        "id"
+    ) == "SELECT * FROM (SELECT TOP 100 * FROM t) AS q\nORDER BY id ASC"
+
+
+def test_keysetPageQuery():
+    orderedQuery = orderByKey("SELECT * FROM t WHERE a = 1", "id")
+    assert keysetPageQuery(orderedQuery, "id", 42) == "\n".join((
+        "SELECT * FROM t WHERE (id > 42)",
+        "AND (a = 1)",
+        "ORDER BY id ASC"
+    ))
+
+
+def test_formatValue():
+    assert formatValue("O'Brien") == "'O''Brien'"
+    assert formatValue(b"M 31") == "'M 31'"
+    assert formatValue(3.0) == "3"
+    assert formatValue(2.5) == "2.5"
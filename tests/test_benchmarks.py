@@ -0,0 +1,46 @@
+# standard libraries
+#
+import json
+import pathlib
+import subprocess
+import sys
+
+benchmarksPath = pathlib.Path(__file__).parent.parent / "benchmarks"
+
+
+def runBenchmark(*args: str) -> str:
+    return subprocess.run(
+        [sys.executable, str(benchmarksPath / "pipeline.py"), *args],
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=300
+    ).stdout
+
+
+def test_pipeline_benchmark(tmp_path):
+    measurements = tmp_path / "measurements.json"
+    runBenchmark(
+        "--rows", "300",
+        "--columns", "9",
+        "--repeat", "2",
+        "--json", str(measurements)
+    )
+    cases = json.loads(measurements.read_text(encoding="utf-8"))["cases"]
+    assert [c["serialization"] for c in cases] == ["tabledata", "binary2"]
+    for case in cases:
+        assert case["rows"] == 300
+        assert case["bytes"] > 0
+        assert 0 < case["firstRows"]["p50"] <= case["total"]["p50"]
+        assert case["peakMemory"] > 0
+        assert {"download", "parse", "ui"} <= set(case["phases"])
+
+    output = runBenchmark(
+        "--rows", "300",
+        "--columns", "9",
+        "--repeat", "1",
+        "--serialization", "binary2",
+        "--no-table",
+        "--compare", str(measurements)
+    )
+    assert "compared to previous" in output
@@ -0,0 +1,91 @@
+# 3rd-party dependencies
+#
+import pandas
+import pytest
+#
+# own stuff
+#
+from tap_adql_sandbox import cache
+from tap_adql_sandbox import config
+
+serviceURL = "https://example.org/tap"
+
+
+@pytest.fixture(autouse=True)
+def cacheDir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "resultsCachePath", tmp_path)
+    monkeypatch.setattr(
+        cache,
+        "resultsCacheIndexFile",
+        tmp_path / "index.json"
+    )
+    return tmp_path
+
+
+def someResults(rows: int = 100) -> pandas.DataFrame:
+    return pandas.DataFrame({
+        "id": range(rows),
+        "name": [f"star {i}" for i in range(rows)]
+    })
+
+
+def test_store_and_get_same_query():
+    cache.storeResults(serviceURL, "SELECT * FROM t", someResults(), True)
+    cached = cache.getCachedResults(
+        f"{serviceURL}/",
+        "SELECT *\nFROM t -- again;"
+    )
+    assert cached is not None
+    data, entry = cached
+    pandas.testing.assert_frame_equal(data, someResults())
+    assert entry["overflow"] is True
+    assert entry["rows"] == 100
+
+
+def test_other_query_or_service_is_not_found():
+    cache.storeResults(serviceURL, "SELECT * FROM t", someResults())
+    assert cache.getCachedResults(serviceURL, "SELECT * FROM s") is None
+    assert cache.getCachedResults(
+        "https://example.com/tap",
+        "SELECT * FROM t"
+    ) is None
+
+
+def test_expired_results_are_removed(cacheDir, monkeypatch):
+    cache.storeResults(serviceURL, "SELECT * FROM t", someResults())
+    monkeypatch.setattr(config, "resultsCacheAgeMax", -1)
+    assert cache.getCachedResults(serviceURL, "SELECT * FROM t") is None
+    assert cache.loadIndex() == {}
+    assert not list(cacheDir.glob("*.parquet"))
+
+
+def test_least_recently_used_are_evicted(monkeypatch):
+    queries = [f"SELECT * FROM t{i}" for i in range(3)]
+    for q in queries[:2]:
+        cache.storeResults(serviceURL, q, someResults())
+    entrySize: int = next(iter(cache.loadIndex().values()))["size"]
+    monkeypatch.setattr(config, "resultsCacheSizeMax", entrySize * 2)
+    # the first one becomes the most recently used
+    assert cache.getCachedResults(serviceURL, queries[0]) is not None
+    cache.storeResults(serviceURL, queries[2], someResults())
+
+    assert cache.getCachedResults(serviceURL, queries[1]) is None
+    assert cache.getCachedResults(serviceURL, queries[0]) is not None
+    assert cache.getCachedResults(serviceURL, queries[2]) is not None
+
+
+def test_results_larger_than_cache_are_not_stored(cacheDir, monkeypatch):
+    cache.storeResults(serviceURL, "SELECT * FROM small", someResults(10))
+    monkeypatch.setattr(config, "resultsCacheSizeMax", 1)
+    cache.storeResults(serviceURL, "SELECT * FROM big", someResults(1000))
+
+    index = cache.loadIndex()
+    assert [e["query"] for e in index.values()] == ["SELECT * FROM small"]
+    assert len(list(cacheDir.glob("*.parquet"))) == 1
+
+
+def test_clearCache(cacheDir):
+    cache.storeResults(serviceURL, "SELECT * FROM t", someResults())
+    cache.clearCache()
+    assert cache.listCachedResults() == {}
+    assert not list(cacheDir.glob("*.parquet"))
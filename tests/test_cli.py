@@ -0,0 +1,44 @@
+# standard libraries
+#
+import argparse
+import pathlib
+#
+# own stuff
+#
+from tap_adql_sandbox import cli
+
+serviceURL = "https://example.org/tap"
+
+
+def parseArguments(*args: str) -> argparse.Namespace:
+    argParser = argparse.ArgumentParser()
+    cli.addRunArguments(argParser)
+    return argParser.parse_args(["--service", serviceURL, *args])
+
+
+def test_output_files_are_named_after_query_files(tmp_path):
+    cliArgs = parseArguments(
+        "--query", "a/q.adql", "b/r.adql", "-",
+        "--out", str(tmp_path),
+        "--format", "csv"
+    )
+    assert [cli.getOutputFile(cliArgs, q) for q in cliArgs.query] == [
+        tmp_path / "q.csv",
+        tmp_path / "r.csv",
+        tmp_path / "stdin.csv"
+    ]
+
+    cliArgs = parseArguments("--query", "a/q.adql", "--out", "q.fits")
+    assert cli.getOutputFile(cliArgs, "a/q.adql") == pathlib.Path("q.fits")
+
+
+def test_same_output_file_is_rejected(tmp_path, monkeypatch, caplog):
+    queried = []
+    monkeypatch.setattr(cli, "runQueryFile", lambda *args: queried.append(1))
+    cliArgs = parseArguments(
+        "--query", "a/q.adql", "b/q.adql",
+        "--out", str(tmp_path)
+    )
+    assert cli.run(cliArgs) == 1
+    assert "same" in caplog.text
+    assert not queried
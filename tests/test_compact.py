@@ -0,0 +1,117 @@
+# 3rd-party dependencies
+#
+import numpy
+import pandas
+import pytest
+#
+# own stuff
+#
+from tap_adql_sandbox import config
+from tap_adql_sandbox.compact import (
+    compactStringType,
+    compactTypes,
+    expandTypes,
+    widenedTypes,
+    columnTypes
+)
+from tap_adql_sandbox.results import ResultBuffer
+
+
+def someChunk(start: int, stop: int, scale: int = 1) -> pandas.DataFrame:
+    rows = numpy.arange(start, stop)
+    return pandas.DataFrame({
+        "id": rows * scale,
+        "flux": pandas.array(
+            [None if i % 5 == 0 else int(i) for i in rows],
+            dtype="Int64"
+        ),
+        "ra": (rows % 360).astype(numpy.float64),
+        "dec": rows / 7,
+        "name": [f"star {i}" for i in rows],
+        "kind": ["galaxy" if i % 2 else "star" for i in rows]
+    })
+
+
+@pytest.fixture
+def spillToDisk(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "resultsSpillThreshold", 1)
+    monkeypatch.setattr(config, "resultsSpillFileSize", 1)
+    monkeypatch.setattr(config, "resultsSpillPath", str(tmp_path))
+
+
+def test_compactTypes_loses_nothing():
+    chunk = someChunk(0, 100)
+    compacted = compactTypes(chunk)
+    assert compacted["id"].dtype == numpy.int8
+    assert compacted["flux"].dtype == "Int8"
+    assert compacted["ra"].dtype == numpy.float32
+    assert compacted["dec"].dtype == numpy.float64
+    assert compacted["name"].dtype == compactStringType
+    for c in chunk.columns:
+        assert compacted[c].tolist() == chunk[c].tolist()
+
+
+def test_compactTypes_not_narrower_than_previous_chunks():
+    previousTypes = columnTypes(compactTypes(someChunk(0, 1000)))
+    compacted = compactTypes(someChunk(0, 10), previousTypes)
+    assert compacted["id"].dtype == numpy.int16
+    assert compacted["flux"].dtype == "Int16"
+    assert widenedTypes(previousTypes, columnTypes(compacted)) == {}
+
+
+def test_expandTypes():
+    data = ResultBuffer.fromDataFrame(someChunk(0, 100)).toDataFrame()
+    assert isinstance(data["kind"].dtype, pandas.CategoricalDtype)
+    expanded = expandTypes(data)
+    for c in ("kind", "name"):
+        assert not isinstance(expanded[c].dtype, pandas.CategoricalDtype)
+        assert expanded[c].dtype != compactStringType
+    assert expanded["kind"].tolist() == data["kind"].tolist()
+
+
+@pytest.mark.parametrize("spilled", [False, True])
+def test_buffer_returns_original_types(request, spilled):
+    if spilled:
+        request.getfixturevalue("spillToDisk")
+    chunks = [
+        someChunk(0, 100),
+        someChunk(100, 200, scale=1000),
+        someChunk(200, 300)
+    ]
+    buffer = ResultBuffer()
+    for chunk in chunks:
+        buffer.append(chunk)
+    buffer.finish()
+    assert buffer.isSpilled == spilled
+
+    expected = pandas.concat(chunks, ignore_index=True)
+    data = buffer.toDataFrame()
+    for c in ("id", "flux", "ra", "dec"):
+        assert data[c].dtype == expected[c].dtype
+        assert data[c].tolist() == expected[c].tolist()
+    for c in ("name", "kind"):
+        assert data[c].astype(object).tolist() == expected[c].tolist()
+
+    rows = buffer.slice(95, 105)["id"]
+    assert rows.dtype == numpy.int64
+    assert rows.tolist() == expected["id"].iloc[95:105].tolist()
+    assert buffer.take(numpy.array([150, 5]))["id"].tolist() == [150000, 5]
+    assert buffer.sliceArrow(0, 300).to_pandas()["id"].tolist() == (
+        expected["id"].tolist()
+    )
+    for offset, chunk in buffer.iterateChunks(["id"]):
+        assert chunk["id"].dtype == numpy.int64
+
+
+def test_arithmetic_does_not_overflow():
+    buffer = ResultBuffer.fromDataFrame(
+        pandas.DataFrame({"a": numpy.arange(1000)})
+    )
+    assert buffer.toDataFrame().eval("a * 100 > 50000").sum() == 499
+
+
+def test_uncompacted_buffer(monkeypatch):
+    monkeypatch.setattr(config, "resultsCompactTypes", False)
+    chunk = someChunk(0, 100)
+    data = ResultBuffer.fromDataFrame(chunk).toDataFrame()
+    pandas.testing.assert_frame_equal(data, chunk)
@@ -0,0 +1,158 @@
+# 3rd-party dependencies
+#
+import numpy
+import pandas
+import pyarrow.ipc
+import pyarrow.parquet
+import pytest
+from astropy.io.votable import parse
+from astropy.table import Table
+#
+# standard libraries
+#
+import math
+import typing
+import warnings
+#
+# own stuff
+#
+from tap_adql_sandbox import config
+from tap_adql_sandbox.export import exportFormats, exportResults
+from tap_adql_sandbox.jobs import Job
+from tap_adql_sandbox.results import ResultBuffer
+from tap_adql_sandbox.votable import VOTableStreamParser
+
+rowsCount = 300
+
+
+@pytest.fixture(autouse=True)
+def smallChunks(monkeypatch):
+    # chunks of the buffer and of exporting don't line up
+    monkeypatch.setattr(config, "exportChunkRows", 70)
+
+
+def someResults() -> ResultBuffer:
+    buffer = ResultBuffer()
+    for start in range(0, rowsCount, 100):
+        rows = numpy.arange(start, start + 100)
+        buffer.append(pandas.DataFrame({
+            "id": rows,
+            "flux": pandas.array(
+                [None if i % 7 == 0 else int(i) * 10**12 for i in rows],
+                dtype="Int64"
+            ),
+            "mag": (rows % 100).astype(numpy.int16),
+            "ra": rows / 3,
+            "flag": rows % 2 == 0,
+            # strings get longer in later chunks
+            "name": [
+                f"star {'x' * (i // 10)}" if i % 9 else None for i in rows
+            ],
+            "uname": [f"звезда {i}" for i in rows],
+            "kind": ["galaxy" if i % 2 else "star" for i in rows]
+        }))
+    buffer.finish()
+    return buffer
+
+
+def asValue(value: typing.Any) -> typing.Any:
+    if value is None or value is pandas.NA or value is numpy.ma.masked:
+        return None
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    if isinstance(value, numpy.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def asRows(data: pandas.DataFrame) -> typing.List[tuple]:
+    return [
+        tuple(asValue(v) for v in row)
+        for row in data.astype(object).itertuples(index=False)
+    ]
+
+
+def readAstropy(filePath) -> pandas.DataFrame:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        if filePath.suffix == ".vot":
+            return parse(
+                str(filePath)
+            ).get_first_table().to_table().to_pandas()
+        return Table.read(filePath).to_pandas()
+
+
+readers: typing.Dict[str, typing.Callable[[typing.Any], pandas.DataFrame]] = {
+    ".parquet": pandas.read_parquet,
+    ".feather": lambda p: pyarrow.ipc.open_file(p).read_all().to_pandas(),
+    ".arrow": lambda p: pyarrow.ipc.open_file(p).read_all().to_pandas(),
+    ".fits": readAstropy,
+    ".vot": readAstropy,
+    ".h5": pandas.read_hdf,
+    ".csv": lambda p: pandas.read_csv(p, float_precision="round_trip"),
+    ".pkl": pandas.read_pickle
+}
+
+
+@pytest.mark.parametrize("extension", list(exportFormats))
+def test_round_trip(extension, tmp_path):
+    if extension == ".h5":
+        pytest.importorskip("tables")
+    buffer = someResults()
+    filePath = exportResults(
+        Job("export"),
+        buffer,
+        tmp_path / f"results{extension}"
+    )
+    data = readers[extension](filePath)
+    expected = buffer.toDataFrame()
+    if extension == ".fits":
+        # trailing spaces of FITS strings are insignificant
+        expected["name"] = expected["name"].str.rstrip()
+    elif extension == ".vot":
+        # Astropy reads missing strings of VOTable as empty
+        expected["name"] = expected["name"].astype(object).fillna("")
+    assert list(data.columns) == list(expected.columns)
+    assert asRows(data) == asRows(expected)
+
+
+def test_votable_is_read_by_own_parser(tmp_path):
+    buffer = someResults()
+    buffer.overflow = True
+    filePath = exportResults(Job("export"), buffer, tmp_path / "results.vot")
+    parser = VOTableStreamParser(1000)
+    chunks = parser.feed(filePath.read_bytes()) + parser.close()
+    assert parser.serialization == "BINARY2"
+    assert parser.overflow
+    assert asRows(pandas.concat(chunks, ignore_index=True)) == asRows(
+        buffer.toDataFrame()
+    )
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        exportResults(Job("export"), someResults(), tmp_path / "results.xls")
+
+
+@pytest.mark.parametrize("extension", [".parquet", ".feather"])
+def test_strings_are_not_dictionaries(extension, tmp_path):
+    buffer = someResults()
+    # stored as a categorical
+    kindType = buffer.slice(0, 1).dtypes["kind"]
+    assert isinstance(kindType, pandas.CategoricalDtype)
+    filePath = exportResults(
+        Job("export"),
+        buffer,
+        tmp_path / f"results{extension}"
+    )
+    table = (
+        pyarrow.parquet.read_table(filePath)
+        if extension == ".parquet"
+        else pyarrow.ipc.open_file(filePath).read_all()
+    )
+    assert not any(pyarrow.types.is_dictionary(f.type) for f in table.schema)
+    data = table.to_pandas()
+    assert not isinstance(data["kind"].dtype, pandas.CategoricalDtype)
+    assert data["kind"].tolist() == buffer.toDataFrame()["kind"].tolist()
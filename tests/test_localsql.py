@@ -0,0 +1,42 @@
+# 3rd-party dependencies
+#
+import pandas
+#
+# own stuff
+#
+from tap_adql_sandbox import localsql
+from tap_adql_sandbox.jobs import Job
+from tap_adql_sandbox.results import ResultBuffer
+
+
+def test_getCachedTableNames():
+    entries = {
+        "c": {"query": "SELECT * FROM gaiadr3.gaia_source", "created": 3},
+        "a": {"query": "SELECT * FROM gaiadr3.gaia_source -- 1", "created": 1},
+        "b": {"query": 'SELECT * FROM "Some-Table"', "created": 2},
+        "d": {"query": "SELECT * FROM (SELECT 1 AS a) AS q", "created": 4}
+    }
+    assert localsql.getCachedTableNames(entries) == {
+        "a": "cached_gaia_source",
+        "b": "cached_some_table",
+        "c": "cached_gaia_source_2",
+        "d": "cached_results"
+    }
+
+
+def test_executeWithSQLite():
+    results = ResultBuffer.fromDataFrame(
+        pandas.DataFrame({
+            "kind": ["star", "galaxy", "star"],
+            "mag": [1, 2, 3]
+        })
+    )
+    data = localsql.executeWithSQLite(
+        Job("test"),
+        " ".join((
+            "SELECT kind, SUM(mag) AS mag FROM results",
+            "GROUP BY kind ORDER BY kind"
+        )),
+        {"results": results}
+    )
+    assert data.to_dict("list") == {"kind": ["galaxy", "star"], "mag": [2, 4]}
@@ -0,0 +1,57 @@
+# 3rd-party dependencies
+#
+import numpy
+import pandas
+import pytest
+#
+# own stuff
+#
+from tap_adql_sandbox.ordering import filterRows, orderRows
+from tap_adql_sandbox.results import ResultBuffer
+
+
+def someResults() -> ResultBuffer:
+    buffer = ResultBuffer()
+    for start in range(0, 1000, 100):
+        rows = numpy.arange(start, start + 100)
+        buffer.append(pandas.DataFrame({
+            "a": rows,
+            # the service itself sent it as `short`
+            "mag": (rows % 400).astype(numpy.int16),
+            "flux": pandas.array(
+                [None if i % 10 == 0 else int(i) for i in rows],
+                dtype="Int16"
+            ),
+            "name": [f"star {i}" for i in rows]
+        }))
+    buffer.finish(concatenate=False)
+    return buffer
+
+
+def test_filterRows():
+    rows = filterRows(someResults(), "a >= 95 and a < 105 and a != 100")
+    assert rows.tolist() == [95, 96, 97, 98, 99, 101, 102, 103, 104]
+
+
+@pytest.mark.parametrize(
+    "expression, rowsCount",
+    [
+        # compacted to int16 for storing
+        ("a * 100 > 50000", 499),
+        # int16 from the start
+        ("mag * 100 > 30000", 198),
+        ("flux * 100 > 90000", 90)
+    ]
+)
+def test_filterRows_does_not_overflow(expression, rowsCount):
+    assert len(filterRows(someResults(), expression)) == rowsCount
+
+
+def test_filterRows_has_to_be_a_condition():
+    with pytest.raises(ValueError):
+        filterRows(someResults(), "a * 2")
+
+
+def test_orderRows_filters_sorts_and_searches():
+    rows = orderRows(someResults(), "a", False, "a * 100 > 50000", "star 9")
+    assert rows.tolist() == list(range(999, 899, -1))
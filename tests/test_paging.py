@@ -0,0 +1,108 @@
+# 3rd-party dependencies
+#
+import pandas
+import pytest
+#
+# standard libraries
+#
+import re
+#
+# own stuff
+#
+from tap_adql_sandbox import paging
+from tap_adql_sandbox.jobs import Job
+from tap_adql_sandbox.results import ResultBuffer
+
+serviceURL = "https://example.org/tap"
+
+
+class PagedService:
+    """
+    Stand-in for fetchResults() of a service that returns at most
+    `pageRows` rows of `rows` for every query.
+    """
+
+    def __init__(self, rows: int, pageRows: int):
+        self.rows = rows
+        self.pageRows = pageRows
+        self.queries = []
+
+    def __call__(
+        self,
+        job,
+        serviceURL,
+        queryText,
+        buffer,
+        asyncMode=False,
+        useCache=True
+    ):
+        self.queries.append(queryText)
+        after = re.search(r"id > (\d+)", queryText)
+        start = int(after.group(1)) + 1 if after else 0
+        stop = min(start + self.pageRows, self.rows)
+        buffer.overflow = stop - start == self.pageRows and stop < self.rows
+        buffer.append(pandas.DataFrame({"id": range(start, stop)}))
+        buffer.finish()
+        return buffer
+
+
+def test_pages_are_fetched_until_no_overflow(monkeypatch):
+    service = PagedService(25, 10)
+    monkeypatch.setattr(paging, "fetchResults", service)
+    buffer = paging.fetchPagedResults(
+        Job("test"),
+        serviceURL,
+        "SELECT * FROM t",
+        "id",
+        ResultBuffer(),
+        1000
+    )
+    assert buffer.toDataFrame()["id"].tolist() == list(range(25))
+    assert not buffer.overflow
+    assert service.queries == [
+        "SELECT * FROM t\nORDER BY id ASC",
+        "SELECT * FROM t\nWHERE id > 9\nORDER BY id ASC",
+        "SELECT * FROM t\nWHERE id > 19\nORDER BY id ASC"
+    ]
+
+
+def test_pages_stop_at_rows_limit(monkeypatch):
+    monkeypatch.setattr(paging, "fetchResults", PagedService(100, 10))
+    buffer = paging.fetchPagedResults(
+        Job("test"),
+        serviceURL,
+        "SELECT * FROM t",
+        "id",
+        ResultBuffer(),
+        15
+    )
+    assert buffer.toDataFrame()["id"].tolist() == list(range(15))
+    assert buffer.overflow
+
+
+def test_key_column_has_to_be_selected(monkeypatch):
+    monkeypatch.setattr(paging, "fetchResults", PagedService(25, 10))
+    with pytest.raises(ValueError, match="Key column"):
+        paging.fetchPagedResults(
+            Job("test"),
+            serviceURL,
+            "SELECT * FROM t",
+            "source_id",
+            ResultBuffer(),
+            1000
+        )
+
+
+def test_query_with_top_is_not_paginated(monkeypatch):
+    service = PagedService(25, 10)
+    monkeypatch.setattr(paging, "fetchResults", service)
+    with pytest.raises(ValueError, match="TOP"):
+        paging.fetchPagedResults(
+            Job("test"),
+            serviceURL,
+            "SELECT TOP 15 * FROM t",
+            "id",
+            ResultBuffer(),
+            1000
+        )
+    assert not service.queries
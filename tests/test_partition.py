@@ -0,0 +1,134 @@
+# 3rd-party dependencies
+#
+import pandas
+import pytest
+import pyvo
+#
+# standard libraries
+#
+import re
+import threading
+import time
+#
+# own stuff
+#
+from tap_adql_sandbox import config
+from tap_adql_sandbox import partition
+from tap_adql_sandbox.adql import partitionQuery
+from tap_adql_sandbox.jobs import Job
+from tap_adql_sandbox.results import ResultBuffer
+
+serviceURL = "https://example.org/tap"
+
+
+class PartitionedService:
+    """
+    Stand-in for fetchResults() that returns the rows of the range
+    in the query, with earlier partitions taking longer, and fails
+    the first `failures` attempts of every partition.
+    """
+
+    def __init__(self, failures: int = 0, error=ConnectionError):
+        self.failures = failures
+        self.error = error
+        self.attempts = {}
+        self.lock = threading.Lock()
+
+    def __call__(
+        self,
+        job,
+        serviceURL,
+        queryText,
+        buffer,
+        asyncMode=False,
+        useCache=True
+    ):
+        bounds = re.search(r"id >= (\d+) AND id (<=?) (\d+)", queryText)
+        start, stop = int(bounds.group(1)), int(bounds.group(3))
+        if bounds.group(2) == "<=":
+            stop += 1
+        with self.lock:
+            attempt = self.attempts.get(start, 0) + 1
+            self.attempts[start] = attempt
+        if attempt <= self.failures:
+            raise self.error("service is not feeling well")
+        time.sleep(0.01 * (10 - start // 10))
+        buffer.append(pandas.DataFrame({"id": range(start, stop)}))
+        buffer.finish()
+        return buffer
+
+
+@pytest.fixture(autouse=True)
+def noRetryDelay(monkeypatch):
+    monkeypatch.setattr(config, "partitionRetryDelay", 0)
+
+
+def test_partitions_are_merged_in_order(monkeypatch):
+    monkeypatch.setattr(partition, "fetchResults", PartitionedService())
+    buffer = partition.fetchPartitionedResults(
+        Job("test"),
+        serviceURL,
+        partitionQuery("SELECT * FROM t", "id", 0, 99, 10),
+        ResultBuffer()
+    )
+    assert buffer.toDataFrame()["id"].tolist() == list(range(100))
+
+
+def test_failed_partitions_are_retried(monkeypatch):
+    service = PartitionedService(failures=config.partitionRetries)
+    monkeypatch.setattr(partition, "fetchResults", service)
+    buffer = partition.fetchPartitionedResults(
+        Job("test"),
+        serviceURL,
+        partitionQuery("SELECT * FROM t", "id", 0, 29, 3),
+        ResultBuffer()
+    )
+    assert buffer.rowsCount == 30
+    assert set(service.attempts.values()) == {config.partitionRetries + 1}
+
+
+def test_partition_fails_after_retries(monkeypatch):
+    service = PartitionedService(failures=config.partitionRetries + 1)
+    monkeypatch.setattr(partition, "fetchResults", service)
+    with pytest.raises(RuntimeError, match="Partition"):
+        partition.fetchPartitionedResults(
+            Job("test"),
+            serviceURL,
+            partitionQuery("SELECT * FROM t", "id", 0, 9, 1),
+            ResultBuffer()
+        )
+
+
+def test_rejected_queries_are_not_retried(monkeypatch):
+    service = PartitionedService(
+        failures=1,
+        error=pyvo.dal.DALQueryError
+    )
+    monkeypatch.setattr(partition, "fetchResults", service)
+    with pytest.raises(RuntimeError):
+        partition.fetchPartitionedResults(
+            Job("test"),
+            serviceURL,
+            partitionQuery("SELECT * FROM t", "id", 0, 9, 1),
+            ResultBuffer()
+        )
+    assert service.attempts == {0: 1}
+
+
+def test_cancelling_is_registered_once_per_partition(monkeypatch):
+    service = PartitionedService(failures=config.partitionRetries)
+    monkeypatch.setattr(partition, "fetchResults", service)
+    job = Job("test")
+    cancelCallbacks = []
+    monkeypatch.setattr(job, "onCancel", cancelCallbacks.append)
+    buffer = partition.fetchPartition(
+        job,
+        serviceURL,
+        partitionQuery("SELECT * FROM t", "id", 0, 9, 1)[0],
+        1,
+        False,
+        True
+    )
+    assert buffer.rowsCount == 10
+    assert service.attempts == {0: config.partitionRetries + 1}
+    assert len(cancelCallbacks) == 1
@@ -0,0 +1,126 @@
+# 3rd-party dependencies
+#
+import pandas
+import pytest
+#
+# standard libraries
+#
+import json
+import re
+import time
+import typing
+#
+# own stuff
+#
+from tap_adql_sandbox import config
+from tap_adql_sandbox import resolver
+from tap_adql_sandbox.jobs import Job
+
+
+@pytest.fixture(autouse=True)
+def cacheFile(tmp_path, monkeypatch):
+    cacheFile = tmp_path / "simbad-ids.json"
+    monkeypatch.setattr(resolver, "simbadCacheFile", cacheFile)
+    return cacheFile
+
+
+@pytest.fixture
+def queries(monkeypatch) -> typing.List[typing.List[str]]:
+    """
+    Instead of Simbad, every identifier is an object with one more ID,
+    except for the ones starting with `unknown`. Identifiers of every
+    query are collected.
+    """
+    queries: typing.List[typing.List[str]] = []
+
+    def fetchResults(job, serviceURL, queryText, buffer, useCache):
+        requested = [
+            i.replace("''", "'")
+            for i in re.findall(r"WHERE r\.id = '((?:[^']|'')*)'", queryText)
+        ]
+        queries.append(requested)
+        rows = [
+            (i, id)
+            for i in requested if not i.startswith("unknown")
+            for id in (i, f"alias of {i}")
+        ]
+        buffer.append(pandas.DataFrame(rows, columns=["requested", "id"]))
+        buffer.finish()
+
+    monkeypatch.setattr(resolver, "fetchResults", fetchResults)
+    return queries
+
+
+def test_quotes_are_escaped():
+    queryText = resolver.buildQuery(["Barnard's star", "M31"])
+    assert "SELECT 'Barnard''s star' AS requested" in queryText
+    assert "WHERE r.id = 'Barnard''s star'" in queryText
+    assert queryText.count("UNION ALL") == 1
+
+
+def test_deduplicated_in_same_order(queries):
+    resolvedIDs, cachedCount = resolver.resolveIdentifiers(
+        Job("resolve"),
+        ["M31", "  HD  1 ", "m31", "", "unknown 1", "hd 1", "Barnard's star"]
+    )
+    assert list(resolvedIDs) == ["M31", "HD 1", "unknown 1", "Barnard's star"]
+    assert resolvedIDs["HD 1"] == ["HD 1", "alias of HD 1"]
+    assert resolvedIDs["Barnard's star"] == [
+        "Barnard's star",
+        "alias of Barnard's star"
+    ]
+    assert resolvedIDs["unknown 1"] == []
+    assert cachedCount == 0
+    assert len(queries) == 1
+
+
+def test_resolved_in_batches(queries, monkeypatch):
+    monkeypatch.setattr(config, "simbadBatchMax", 3)
+    identifiers = [f"HD {i}" for i in range(8)]
+    resolvedIDs, cachedCount = resolver.resolveIdentifiers(
+        Job("resolve"),
+        identifiers
+    )
+    assert queries == [identifiers[:3], identifiers[3:6], identifiers[6:]]
+    assert list(resolvedIDs) == identifiers
+
+
+def test_cached_are_not_queried_again(queries):
+    resolver.resolveIdentifiers(Job("resolve"), ["M31", "unknown 1"])
+    resolvedIDs, cachedCount = resolver.resolveIdentifiers(
+        Job("resolve"),
+        ["m31", "M 33", "unknown 1"]
+    )
+    assert cachedCount == 2
+    assert queries == [["M31", "unknown 1"], ["M 33"]]
+    assert resolvedIDs["m31"] == ["M31", "alias of M31"]
+    assert resolvedIDs["unknown 1"] == []
+
+    resolver.resolveIdentifiers(Job("resolve"), ["M31"], useCache=False)
+    assert queries[-1] == ["M31"]
+
+
+def test_expired_are_dropped(cacheFile, monkeypatch):
+    monkeypatch.setattr(config, "simbadCacheAgeMax", 100)
+    now = time.time()
+    assert not resolver.isExpired({"resolved": now - 99}, now)
+    assert resolver.isExpired({"resolved": now - 101}, now)
+    assert resolver.isExpired({}, now)
+
+    cacheFile.write_text(
+        json.dumps({
+            "old": {"ids": ["old"], "resolved": now - 1000},
+            "recent": {"ids": ["recent"], "resolved": now - 10}
+        }),
+        encoding="utf-8"
+    )
+    assert resolver.getCachedIDs(["old", "recent"]) == {"recent": ["recent"]}
+    resolver.cacheIDs({"M31": ["M31", "NGC 224"]})
+    cache = json.loads(cacheFile.read_text(encoding="utf-8"))
+    assert set(cache) == {"recent", "m31"}
+    assert cache["m31"]["ids"] == ["M31", "NGC 224"]
+
+
+def test_unreadable_cache_is_ignored(cacheFile):
+    cacheFile.write_text("not JSON", encoding="utf-8")
+    assert resolver.getCachedIDs(["M31"]) == {}
@@ -0,0 +1,53 @@
+# standard libraries
+#
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import time
+#
+# own stuff
+#
+from tap_adql_sandbox import services
+from tap_adql_sandbox.stats import QueryStats
+
+
+class Handler(BaseHTTPRequestHandler):
+    # keeping connections alive, as services do
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_nested_phases_are_not_counted_twice():
+    stats = QueryStats()
+    with stats.measure("response"):
+        time.sleep(0.02)
+        with stats.measure("connect"):
+            time.sleep(0.05)
+    assert stats.phases["connect"] >= 0.05
+    assert 0.02 <= stats.phases["response"] < 0.05
+
+
+def test_only_new_connections_are_measured():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/tap"
+        session = services.getSession(url)
+        first, second = QueryStats(url), QueryStats(url)
+        for stats in (first, second):
+            with stats.measure("response"):
+                session.get(url).raise_for_status()
+        assert first.phases["connect"] > 0
+        assert "connect" not in second.phases
+        # nothing is measured outside of a query
+        session.get(url).raise_for_status()
+    finally:
+        server.shutdown()
+        server.server_close()
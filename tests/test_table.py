@@ -0,0 +1,62 @@
+# 3rd-party dependencies
+#
+import pytest
+#
+# own stuff
+#
+from tap_adql_sandbox import table
+
+
+@pytest.fixture
+def clicks(monkeypatch):
+    """
+    Two tables, one in the main window and one in a floating window
+    on top of it, both of them under the mouse.
+    """
+    hovered = set()
+    monkeypatch.setattr(table, "getWindow", lambda bounds: f"{bounds}-window")
+    monkeypatch.setattr(
+        table.dpg,
+        "is_item_hovered",
+        lambda item: item in hovered
+    )
+    monkeypatch.setattr(
+        table.ClickableCells,
+        "cellAt",
+        lambda self, x, y: (0, 0) if self.rows else None
+    )
+    clicked = []
+    targets = []
+    for bounds in ("main", "floating"):
+        target = table.ClickableCells(
+            lambda button, row, column, cellID: clicked.append(cellID)
+        )
+        target.rows = [[len(targets)]]
+        target.bounds = bounds
+        targets.append(target)
+    yield hovered, clicked, targets
+    for target in targets:
+        table.clickTargets.discard(target)
+
+
+def test_click_goes_to_hovered_window(clicks):
+    hovered, clicked, targets = clicks
+    hovered.add("floating-window")
+    table.findClickedCell(0, 0, 0)
+    assert clicked == [1]
+
+
+def test_click_goes_to_hovered_table(clicks):
+    hovered, clicked, targets = clicks
+    # such as a table that scrolls horizontally
+    hovered.add("main")
+    table.findClickedCell(0, 0, 0)
+    assert clicked == [0]
+
+
+def test_click_on_window_without_cells_is_ignored(clicks):
+    hovered, clicked, targets = clicks
+    # the Simbad window over the results, for example
+    targets[1].clearCells()
+    table.findClickedCell(0, 0, 0)
+    assert clicked == []
@@ -0,0 +1,146 @@
+# 3rd-party dependencies
+#
+import numpy
+import pandas
+import pytest
+from astropy.io.votable import from_table, parse
+from astropy.table import MaskedColumn, Table
+#
+# standard libraries
+#
+import io
+import typing
+import warnings
+#
+# own stuff
+#
+from tap_adql_sandbox.votable import VOTableStreamParser
+
+rowsCount = 2503
+
+
+def someTable(variableSize: bool = True) -> Table:
+    rng = numpy.random.default_rng(1)
+    rows = numpy.arange(rowsCount)
+    table = Table(masked=True)
+    table["id"] = MaskedColumn(rows, mask=rows % 11 == 0)
+    table["mag"] = MaskedColumn(
+        (rows % 100).astype(numpy.int16),
+        mask=rows % 13 == 0
+    )
+    table["ra"] = MaskedColumn(rng.random(rowsCount) * 360, mask=rows % 7 == 0)
+    table["f"] = rng.random(rowsCount).astype(numpy.float32)
+    table["flag"] = MaskedColumn(rows % 2 == 0, mask=rows % 5 == 0)
+    table["vec"] = rng.random((rowsCount, 3))
+    if variableSize:
+        table["name"] = [f"star {i}" * (i % 3) for i in rows]
+        table["uname"] = [f"звезда {i}" for i in rows]
+    return table
+
+
+def toVOTable(table: Table, serialization: str) -> bytes:
+    votable = from_table(table)
+    for field in votable.get_first_table().fields:
+        if field.datatype == "long":
+            field.values.null = -1
+        elif field.datatype == "short":
+            field.values.null = -99
+    document = io.BytesIO()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        # C writer of TABLEDATA in Astropy writes a byte past its buffer,
+        # which crashes whatever runs in the process after it
+        votable.to_xml(
+            document,
+            tabledata_format=serialization,
+            _debug_python_based_parser=True
+        )
+    return document.getvalue()
+
+
+def parseInPieces(
+    document: bytes,
+    pieceSize: int = 4096
+) -> typing.Tuple[VOTableStreamParser, typing.List[pandas.DataFrame]]:
+    parser = VOTableStreamParser(1000, 50)
+    chunks: typing.List[pandas.DataFrame] = []
+    for i in range(0, len(document), pieceSize):
+        chunks.extend(parser.feed(document[i:i + pieceSize]))
+    chunks.extend(parser.close())
+    return parser, chunks
+
+
+def asValues(column: pandas.Series) -> list:
+    return column.astype(object).where(column.notna(), None).tolist()
+
+
+def assertSameAsAstropy(document: bytes, pieceSize: int = 4096) -> None:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        expected = parse(
+            io.BytesIO(document)
+        ).get_first_table().to_table().to_pandas()
+
+    parser, chunks = parseInPieces(document, pieceSize)
+    data = pandas.concat(chunks, ignore_index=True)
+    assert list(data.columns) == list(expected.columns)
+    assert len(data) == len(expected)
+    for c in expected.columns:
+        if c == "vec":
+            assert all(
+                numpy.allclose(a, b) for a, b in zip(expected[c], data[c])
+            )
+        else:
+            assert asValues(data[c]) == asValues(expected[c]), c
+
+
+@pytest.mark.parametrize(
+    "serialization, variableSize",
+    [
+        ("tabledata", True),
+        ("binary", True),
+        ("binary2", True),
+        # only fixed-size fields are parsed for all the rows at once
+        ("binary", False),
+        ("binary2", False)
+    ]
+)
+def test_same_as_astropy(serialization, variableSize):
+    document = toVOTable(someTable(variableSize), serialization)
+    parser, chunks = parseInPieces(document)
+    assert parser.serialization == serialization.upper()
+    assertSameAsAstropy(document)
+
+
+@pytest.mark.parametrize("serialization", ["tabledata", "binary2"])
+def test_single_bytes_at_a_time(serialization):
+    assertSameAsAstropy(
+        toVOTable(someTable()[:20], serialization),
+        pieceSize=1
+    )
+
+
+def test_first_chunk_is_smaller():
+    parser, chunks = parseInPieces(toVOTable(someTable(), "binary2"))
+    assert [len(c) for c in chunks[:3]] == [50, 1000, 1000]
+
+
+def test_overflow_and_error_status():
+    document = toVOTable(someTable()[:5], "tabledata").replace(
+        b"</TABLE>",
+        b"</TABLE>\n<INFO name=\"QUERY_STATUS\" value=\"OVERFLOW\"/>"
+    )
+    parser, chunks = parseInPieces(document)
+    assert parser.overflow
+
+    parser = VOTableStreamParser(1000)
+    parser.feed(
+        b"".join((
+            b"<?xml version=\"1.0\"?><VOTABLE><RESOURCE type=\"results\">",
+            b"<INFO name=\"QUERY_STATUS\" value=\"ERROR\">no such table",
+            b"</INFO></RESOURCE></VOTABLE>"
+        ))
+    )
+    parser.close()
+    assert parser.queryStatus == "ERROR"
+    assert parser.errorMessage == "no such table"